@@ -3,6 +3,11 @@
 
 """配置文件，存储数据库连接信息和网络配置"""
 
+import os
+
+# 缓存目录（系统维护中的"清理缓存"会清空该目录）
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
+
 # 登录窗口配置
 LOGIN_WINDOW_CONFIG = {
     'title': '学生管理系统登录',
@@ -61,4 +66,110 @@ USER_ROLES = {
     'admin': '管理员',
     'teacher': '教师',
     'student': '学生'
-}
\ No newline at end of file
+}
+
+# 实体缓存配置（学生、教师、课程按主键/业务键缓存）
+ENTITY_CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 5000,  # 每类实体最多缓存的记录数
+    'max_bytes': 8 * 1024 * 1024  # 每类实体缓存的内存上限（估算值）
+}
+
+# 搜索索引配置（内存 n-gram 倒排索引）
+SEARCH_CONFIG = {
+    'ngram': 2,  # 建立索引的最大 n-gram 长度（同时索引单字，便于单字检索）
+    'max_results': 200,  # 单次搜索返回的最大结果数
+    'suggest_limit': 10,  # 输入联想默认返回条数
+    'max_suggest_limit': 50,  # 输入联想最多返回条数
+    'suggest_delay': 250  # 客户端停止输入多久后才请求联想（毫秒）
+}
+
+# 课程成绩统计缓存配置（按课程+学期增量维护）
+SCORE_STATS_CACHE_CONFIG = {
+    'max_entries': 2000,  # 最多缓存的 (课程, 学期) 数
+    'verify_interval': 300  # 与全量重算对账的间隔（秒）
+}
+
+# 选课引擎配置（选课高峰期的准入控制）
+ENROLLMENT_CONFIG = {
+    'queue_size': 5000,  # 等待写库的选课请求上限，超过后直接返回繁忙
+    'workers': 4,  # 写库工作线程数
+    'timeout': 10  # 单个选课请求等待结果的最长时间（秒）
+}
+
+# 学期课程目录缓存配置（学生浏览可选课程时共享）
+CATALOGUE_CONFIG = {
+    'enabled': True,
+    'ttl': 30,  # 目录缓存有效期（秒），课程变更时立即失效；已选人数在有效期内可能略有滞后
+    'max_page_size': 200  # 单页最多返回的课程数
+}
+
+# 成绩批量导入配置
+SCORE_IMPORT_CONFIG = {
+    'chunk_size': 500,  # 每条 INSERT ... ON DUPLICATE KEY UPDATE 语句写入的行数
+    'max_rows': 10000  # 单次导入的最大行数
+}
+
+# 登录会话配置（断线重连时凭令牌恢复登录）
+SESSION_CONFIG = {
+    'ttl': 7 * 24 * 3600,  # 会话令牌有效期（秒）
+    'token_bytes': 32  # 令牌随机字节数
+}
+
+# 密码哈希配置（PBKDF2-SHA256，在独立进程池中计算）
+PASSWORD_CONFIG = {
+    'iterations': 200000,  # PBKDF2 迭代次数，调高后旧哈希会在下次登录时自动升级
+    'workers': 2,  # 哈希进程数
+    'max_pending': 32,  # 排队中的哈希任务上限，超过后登录直接返回繁忙
+    'timeout': 10  # 单次哈希等待结果的最长时间（秒）
+}
+
+# 登录限流配置（令牌桶：capacity 为可连续尝试次数，refill_rate 为每秒恢复的次数）
+RATE_LIMIT_CONFIG = {
+    'enabled': True,
+    'username': {'capacity': 5, 'refill_rate': 5 / 60},  # 同一用户名每分钟约 5 次
+    'address': {'capacity': 20, 'refill_rate': 20 / 60},  # 同一客户端地址每分钟约 20 次
+    'max_buckets': 10000  # 每类最多保留的令牌桶数，超出后淘汰最久未使用的
+}
+
+# 批量开户配置
+PROVISION_CONFIG = {
+    'chunk_size': 500,  # 每个事务写入的账号数
+    # 单次开户的最大行数：每个密码哈希约 0.1 秒、2 个哈希进程，200 行约 10 秒，
+    # 远小于客户端的请求超时；更大的名单由客户端按此大小分批提交
+    'max_rows': 200,
+    'min_password_length': 6  # 初始密码最短长度（未提供密码时自动生成）
+}
+
+# 客户端断线重连配置（指数退避 + 随机抖动，避免服务器重启后所有客户端同时重连）
+RECONNECT_CONFIG = {
+    'max_attempts': 6,  # 单次断线最多重连次数
+    'base_delay': 0.5,  # 首次重连的最大等待时间（秒），之后每次翻倍
+    'max_delay': 15,  # 单次等待时间上限（秒）
+    'connect_timeout': 5,  # 建立连接的超时时间（秒）
+    'request_timeout': 60  # 单个请求等待响应的最长时间（秒）
+}
+
+# 客户端响应缓存配置（条件请求：保存只读操作的上次响应及其版本号）
+PAYLOAD_CACHE_CONFIG = {
+    'max_entries': 200  # 最多保存的响应数，超出后淘汰最久未使用的
+}
+
+# 异步客户端配置（批量脚本并发读取、Qt 界面后台请求）
+ASYNC_CLIENT_CONFIG = {
+    'connections': 4,  # 连接数，请求分摊到各连接上并在连接内流水线发送
+    'timeout': 30  # 单个请求等待响应的最长时间（秒）
+}
+
+# 客户端请求遥测配置（按操作统计延迟直方图、收发字节和错误数）
+TELEMETRY_CONFIG = {
+    'enabled': True,  # 是否记录遥测数据
+    'upload_interval': 60,  # 向服务器上报增量汇总的间隔（秒），0 表示只在本地记录不上报
+    'max_actions': 64  # 最多单独统计的操作数，超出后计入 other
+}
+
+# 客户端本地快照配置（保存登录用户最近一次成功的只读响应，界面启动时先显示快照再与服务器核对）
+SNAPSHOT_CONFIG = {
+    'enabled': True,
+    'max_bytes': 20 * 1024 * 1024  # 全部快照的总大小上限（字节），超出后删除最早保存的
+}
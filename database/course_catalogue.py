@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""学期课程目录缓存模块
+
+选课期间大量学生浏览同一学期的课程，目录部分（课程、教师、上课时段）对所有学生相同，
+按学期缓存一份；每个学生只需再查询自己已选课程的ID集合。课程或教师变更时失效，
+选课、退课时以新记录替换缓存中该课程的记录来调整已选人数，不使缓存失效。
+"""
+
+import time
+import threading
+import logging
+from database.db_manager import db_manager
+from database.projections import columns
+from config.config import CATALOGUE_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('course_catalogue')
+
+
+class CourseCatalogue:
+    """学期课程目录缓存类"""
+
+    def __init__(self, ttl=None):
+        """初始化缓存
+
+        Args:
+            ttl: 缓存有效期（秒）
+        """
+        self.ttl = ttl or CATALOGUE_CONFIG['ttl']
+        self._entries = {}  # 学期 -> (加载时间, 课程列表, {课程ID: [(星期, 开始分钟, 结束分钟)]}, {课程ID: 列表下标})
+        self._lock = threading.Lock()
+        self._generation = 0  # 每次失效递增，避免加载期间发生的变更被旧数据覆盖
+        self._loading = {}  # 进行中的加载 -> 加载期间人数有变化的课程ID集合
+
+    def _load(self, semester):
+        """从数据库加载一个学期的课程目录"""
+        courses = db_manager.execute_query(f'''
+            SELECT {columns('course', 'c')}, t.name AS teacher_name, t.department AS department
+            FROM courses c
+            LEFT JOIN teachers t ON c.teacher_id = t.id
+            WHERE c.semester = %s
+            ORDER BY c.id
+        ''', (semester,))
+        if courses is None:
+            return None
+        sessions = {}
+        rows = db_manager.execute_query('''
+            SELECT cs.course_id, cs.weekday, cs.start_minute, cs.end_minute
+            FROM course_sessions cs
+            JOIN courses c ON c.id = cs.course_id
+            WHERE c.semester = %s
+        ''', (semester,)) or []
+        for row in rows:
+            sessions.setdefault(row['course_id'], []).append((row['weekday'], row['start_minute'], row['end_minute']))
+        return courses, sessions
+
+    def _reload_counts(self, courses, course_ids):
+        """重新读取指定课程的已选人数，写入尚未放入缓存的课程列表；查询失败返回 False"""
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        rows = db_manager.execute_query(
+            f"SELECT id, enrolled_count FROM courses WHERE id IN ({placeholders})", tuple(course_ids)
+        )
+        if rows is None:
+            return False
+        counts = {row['id']: row['enrolled_count'] for row in rows}
+        for course in courses:
+            if course['id'] in counts:
+                course['enrolled_count'] = counts[course['id']]
+        return True
+
+    def get(self, semester):
+        """获取学期目录，返回 (课程列表, 上课时段映射)；加载失败返回 None
+
+        返回的记录在缓存内共享，调用方不得修改。
+        """
+        now = time.time()
+        token = object()
+        touched = set()
+        with self._lock:
+            entry = self._entries.get(semester)
+            if entry and now - entry[0] < self.ttl:
+                return entry[1], entry[2]
+            generation = self._generation
+            self._loading[token] = touched
+        try:
+            loaded = self._load(semester)
+            if loaded is None:
+                return None
+            # 加载期间有选课/退课的课程重新读取人数，直到没有新的变化再放入缓存
+            for _ in range(3):
+                with self._lock:
+                    if generation != self._generation:
+                        return loaded
+                    if not touched:
+                        self._entries[semester] = (now, loaded[0], loaded[1],
+                                                   {course['id']: i for i, course in enumerate(loaded[0])})
+                        return loaded
+                    course_ids = sorted(touched)
+                    touched.clear()
+                if not self._reload_counts(loaded[0], course_ids):
+                    return loaded
+            return loaded
+        finally:
+            with self._lock:
+                del self._loading[token]
+
+    def adjust_enrolled(self, course_id, delta):
+        """选课/退课提交后调整缓存中该课程的已选人数
+
+        缓存中的记录可能正被其他线程读取，不就地修改，而是换上一份新记录；
+        进行中的加载记下该课程，放入缓存前重新读取其人数。
+        """
+        with self._lock:
+            for loading in self._loading.values():
+                loading.add(course_id)
+            for entry in self._entries.values():
+                index = entry[3].get(course_id)
+                if index is not None:
+                    course = dict(entry[1][index])
+                    course['enrolled_count'] = max((course.get('enrolled_count') or 0) + delta, 0)
+                    entry[1][index] = course
+
+    def invalidate(self, semester=None):
+        """使指定学期（或全部学期）的目录失效"""
+        with self._lock:
+            self._generation += 1
+            if semester is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(semester, None)
+
+
+# 创建全局课程目录缓存实例
+course_catalogue = CourseCatalogue()
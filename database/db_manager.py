@@ -10,7 +10,13 @@ import os
 import subprocess
 import datetime
 import shutil
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from database.entity_cache import clear_all_caches
+from utils.time_slots import parse_class_time
+from utils.passwords import hash_password
+from config.config import CACHE_DIR
 
 # 数据库配置
 DB_CONFIG = {
@@ -29,8 +35,26 @@ logger = logging.getLogger('db_manager')
 
 # 备份文件存储路径
 BACKUP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backups')
-# 缓存目录
-CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
+
+
+class SchemaInfo:
+    """数据库结构信息（表名 -> 列名元组），迁移完成后从 information_schema 一次性读取"""
+
+    def __init__(self, tables=None):
+        """初始化结构信息"""
+        self.tables = tables or {}
+
+    def has_table(self, table):
+        """判断表是否存在"""
+        return table in self.tables
+
+    def has_column(self, table, column):
+        """判断表中是否存在某列"""
+        return column in self.tables.get(table, ())
+
+    def columns(self, table):
+        """返回表的列名（按定义顺序），表不存在时返回空元组"""
+        return self.tables.get(table, ())
 
 
 class DatabaseManager:
@@ -40,6 +64,9 @@ class DatabaseManager:
         """初始化数据库连接"""
         self.connection = None
         self.cursor = None
+        self.schema = SchemaInfo()
+        # 服务端多个线程共享同一连接，事务期间需要独占
+        self._lock = threading.RLock()
         self.connect()
     
     def connect(self):
@@ -56,8 +83,9 @@ class DatabaseManager:
             )
             self.cursor = self.connection.cursor()
             logger.info("数据库连接成功")
-            # 连接成功后执行必要的迁移（如新增 email 字段）
+            # 连接成功后执行必要的迁移（如新增 email 字段），再读取迁移后的表结构
             self._migrate_schema()
+            self.refresh_schema()
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
             # 如果数据库不存在，尝试创建
@@ -86,7 +114,7 @@ class DatabaseManager:
                 CREATE TABLE IF NOT EXISTS users (
                     id INT PRIMARY KEY AUTO_INCREMENT,
                     username VARCHAR(50) UNIQUE NOT NULL,
-                    password VARCHAR(100) NOT NULL,
+                    password VARCHAR(255) NOT NULL,
                     role VARCHAR(20) NOT NULL,
                     name VARCHAR(50) NOT NULL,
                     email VARCHAR(100),
@@ -134,6 +162,9 @@ class DatabaseManager:
                     semester VARCHAR(20),
                     class_time VARCHAR(100),
                     class_location VARCHAR(100),
+                    capacity INT,
+                    enrolled_count INT NOT NULL DEFAULT 0,
+                    KEY idx_courses_semester (semester),
                     FOREIGN KEY (teacher_id) REFERENCES teachers(id) ON DELETE SET NULL
                 )
             ''')
@@ -167,11 +198,55 @@ class DatabaseManager:
                 )
             ''')
             
+            # 创建学生学业汇总表（每个学生每学期一行，semester='ALL' 为累计）
+            temp_cursor.execute('''
+                CREATE TABLE IF NOT EXISTS student_academic_summary (
+                    student_id INT NOT NULL,
+                    semester VARCHAR(20) NOT NULL,
+                    credits_attempted FLOAT NOT NULL DEFAULT 0,
+                    credits_earned FLOAT NOT NULL DEFAULT 0,
+                    weighted_points FLOAT NOT NULL DEFAULT 0,
+                    gpa FLOAT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    PRIMARY KEY (student_id, semester),
+                    FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+                )
+            ''')
+            
+            # 创建课程上课时段表（由 class_time 解析而来，每周可有多次上课）
+            temp_cursor.execute('''
+                CREATE TABLE IF NOT EXISTS course_sessions (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    course_id INT NOT NULL,
+                    weekday TINYINT NOT NULL,
+                    start_minute SMALLINT NOT NULL,
+                    end_minute SMALLINT NOT NULL,
+                    KEY idx_course_slot (course_id, weekday, start_minute, end_minute),
+                    FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+                )
+            ''')
+            
+            # 创建登录会话表（只保存令牌的哈希值）
+            temp_cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_sessions (
+                    id INT PRIMARY KEY AUTO_INCREMENT,
+                    user_id INT NOT NULL,
+                    token_hash CHAR(64) NOT NULL,
+                    client_address VARCHAR(64),
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at DATETIME NOT NULL,
+                    revoked_at DATETIME NULL,
+                    UNIQUE KEY uniq_token_hash (token_hash),
+                    KEY idx_user_sessions_user (user_id),
+                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                )
+            ''')
+            
             # 插入管理员用户
             temp_cursor.execute('''
                 INSERT IGNORE INTO users (username, password, role, name) 
-                VALUES ('admin', 'admin123', 'admin', '系统管理员')
-            ''')
+                VALUES ('admin', %s, 'admin', '系统管理员')
+            ''', (hash_password('admin123'),))
             
             temp_conn.commit()
             temp_cursor.close()
@@ -186,8 +261,23 @@ class DatabaseManager:
     def _migrate_schema(self):
         """执行必要的数据库迁移（幂等）"""
         try:
-            # 确保 users 表存在 email 字段（MySQL 8.0 支持 IF NOT EXISTS）
-            self.cursor.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS email VARCHAR(100)")
+            # 确保 users 表存在 email 字段（MariaDB 支持 IF NOT EXISTS，MySQL 需先检查字段）
+            try:
+                self.cursor.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS email VARCHAR(100)")
+            except Exception:
+                self.cursor.execute("SHOW COLUMNS FROM users LIKE 'email'")
+                if not self.cursor.fetchone():
+                    self.cursor.execute("ALTER TABLE users ADD COLUMN email VARCHAR(100)")
+            
+            # 旧版本的 password 字段为 VARCHAR(100)，放不下 PBKDF2 哈希
+            try:
+                self.cursor.execute("SHOW COLUMNS FROM users LIKE 'password'")
+                col = self.cursor.fetchone()
+                if col and col['Type'].lower() != 'varchar(255)':
+                    self.cursor.execute("ALTER TABLE users MODIFY COLUMN password VARCHAR(255) NOT NULL")
+                    logger.info("已将用户表密码字段扩展为 VARCHAR(255)")
+            except Exception as e:
+                logger.warning(f"扩展用户表密码字段失败: {e}")
             
             # 确保 courses 表存在 class_time 字段
             try:
@@ -213,7 +303,30 @@ class DatabaseManager:
                         self.cursor.execute("ALTER TABLE courses ADD COLUMN class_location VARCHAR(100)")
                 except Exception as inner_e:
                     logger.warning(f"添加课程表上课地点字段失败: {inner_e}")
+            
+            # 确保 courses 表存在容量与已选人数字段（capacity 为 NULL 表示不限）
+            try:
+                self.cursor.execute("ALTER TABLE courses ADD COLUMN IF NOT EXISTS capacity INT")
+                self.cursor.execute("ALTER TABLE courses ADD COLUMN IF NOT EXISTS enrolled_count INT NOT NULL DEFAULT 0")
+            except Exception:
+                try:
+                    self.cursor.execute("SHOW COLUMNS FROM courses LIKE 'capacity'")
+                    if not self.cursor.fetchone():
+                        self.cursor.execute("ALTER TABLE courses ADD COLUMN capacity INT")
+                    self.cursor.execute("SHOW COLUMNS FROM courses LIKE 'enrolled_count'")
+                    if not self.cursor.fetchone():
+                        self.cursor.execute("ALTER TABLE courses ADD COLUMN enrolled_count INT NOT NULL DEFAULT 0")
+                except Exception as inner_e:
+                    logger.warning(f"添加课程表容量字段失败: {inner_e}")
 
+            # 课程目录按学期查询，为 courses.semester 建立索引
+            try:
+                self.cursor.execute("SHOW INDEX FROM courses WHERE Key_name = 'idx_courses_semester'")
+                if not self.cursor.fetchone():
+                    self.cursor.execute("CREATE INDEX idx_courses_semester ON courses (semester)")
+            except Exception as e:
+                logger.warning(f"创建课程学期索引失败: {e}")
+            
             # 确保存在选课表 enrollments
             try:
                 self.cursor.execute('''
@@ -230,6 +343,66 @@ class DatabaseManager:
                 ''')
             except Exception as e:
                 logger.warning(f"创建选课表失败: {e}")
+            
+            # 确保存在学生学业汇总表（每个学生每学期一行，semester='ALL' 为累计）
+            try:
+                self.cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS student_academic_summary (
+                        student_id INT NOT NULL,
+                        semester VARCHAR(20) NOT NULL,
+                        credits_attempted FLOAT NOT NULL DEFAULT 0,
+                        credits_earned FLOAT NOT NULL DEFAULT 0,
+                        weighted_points FLOAT NOT NULL DEFAULT 0,
+                        gpa FLOAT NOT NULL DEFAULT 0,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                        PRIMARY KEY (student_id, semester),
+                        FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+                    )
+                ''')
+            except Exception as e:
+                logger.warning(f"创建学业汇总表失败: {e}")
+            
+            # 确保存在课程上课时段表，并为尚未解析的课程回填
+            try:
+                self.cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS course_sessions (
+                        id INT PRIMARY KEY AUTO_INCREMENT,
+                        course_id INT NOT NULL,
+                        weekday TINYINT NOT NULL,
+                        start_minute SMALLINT NOT NULL,
+                        end_minute SMALLINT NOT NULL,
+                        KEY idx_course_slot (course_id, weekday, start_minute, end_minute),
+                        FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+                    )
+                ''')
+                self._backfill_course_sessions()
+            except Exception as e:
+                logger.warning(f"创建课程上课时段表失败: {e}")
+            
+            # 确保存在登录会话表
+            try:
+                self.cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS user_sessions (
+                        id INT PRIMARY KEY AUTO_INCREMENT,
+                        user_id INT NOT NULL,
+                        token_hash CHAR(64) NOT NULL,
+                        client_address VARCHAR(64),
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        expires_at DATETIME NOT NULL,
+                        revoked_at DATETIME NULL,
+                        UNIQUE KEY uniq_token_hash (token_hash),
+                        KEY idx_user_sessions_user (user_id),
+                        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+                    )
+                ''')
+            except Exception as e:
+                logger.warning(f"创建登录会话表失败: {e}")
+            
+            # 以选课表为准校正已选人数（级联删除等途径不会维护计数）
+            try:
+                self.sync_enrolled_counts()
+            except Exception as e:
+                logger.warning(f"校正课程已选人数失败: {e}")
         except Exception as e:
             # 如果目标版本较低不支持 IF NOT EXISTS，则检查字段是否存在再添加
             try:
@@ -262,13 +435,60 @@ class DatabaseManager:
             except Exception as inner_e:
                 logger.warning(f"迁移检查失败: {inner_e}")
     
+    def refresh_schema(self):
+        """从 information_schema 重新读取当前库的表与列（执行 DDL 后调用）"""
+        try:
+            with self._lock:
+                self.cursor.execute('''
+                    SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name
+                    FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE()
+                    ORDER BY TABLE_NAME, ORDINAL_POSITION
+                ''')
+                tables = {}
+                for row in self.cursor.fetchall():
+                    tables.setdefault(row['table_name'], []).append(row['column_name'])
+            self.schema = SchemaInfo({table: tuple(cols) for table, cols in tables.items()})
+            logger.info(f"已加载数据库结构信息，共 {len(tables)} 张表")
+        except Exception as e:
+            logger.error(f"读取数据库结构信息失败: {e}")
+    
+    def _backfill_course_sessions(self):
+        """将有 class_time 但尚无时段记录的课程解析后写入 course_sessions（幂等）"""
+        self.cursor.execute('''
+            SELECT c.id, c.class_time FROM courses c
+            WHERE c.class_time IS NOT NULL AND c.class_time <> ''
+              AND NOT EXISTS (SELECT 1 FROM course_sessions cs WHERE cs.course_id = c.id)
+        ''')
+        rows = []
+        for course in self.cursor.fetchall():
+            for weekday, start, end in parse_class_time(course['class_time']):
+                rows.append((course['id'], weekday, start, end))
+        if rows:
+            self.cursor.executemany(
+                "INSERT INTO course_sessions (course_id, weekday, start_minute, end_minute) VALUES (%s, %s, %s, %s)",
+                rows
+            )
+            logger.info(f"已回填 {len(rows)} 条课程上课时段")
+    
+    def sync_enrolled_counts(self):
+        """按选课表重新计算各课程的 enrolled_count"""
+        with self._lock:
+            self.cursor.execute('''
+                UPDATE courses c
+                LEFT JOIN (SELECT course_id, COUNT(*) AS cnt FROM enrollments GROUP BY course_id) e
+                    ON e.course_id = c.id
+                SET c.enrolled_count = COALESCE(e.cnt, 0)
+            ''')
+    
     def execute_query(self, query, params=None):
         """执行查询语句"""
         try:
-            if not self.connection or not self.connection.open:
-                self.connect()
-            self.cursor.execute(query, params)
-            return self.cursor.fetchall()
+            with self._lock:
+                if not self.connection or not self.connection.open:
+                    self.connect()
+                self.cursor.execute(query, params)
+                return self.cursor.fetchall()
         except Exception as e:
             logger.error(f"查询执行失败: {e}")
             return None
@@ -276,17 +496,43 @@ class DatabaseManager:
     def execute_update(self, query, params=None):
         """执行更新语句(插入、更新、删除)"""
         try:
-            if not self.connection or not self.connection.open:
-                self.connect()
-            result = self.cursor.execute(query, params)
-            self.connection.commit()
-            return result
+            with self._lock:
+                if not self.connection or not self.connection.open:
+                    self.connect()
+                result = self.cursor.execute(query, params)
+                self.connection.commit()
+                return result
         except Exception as e:
             logger.error(f"更新执行失败: {e}")
             if self.connection:
                 self.connection.rollback()
             return 0
     
+    @contextmanager
+    def transaction(self):
+        """在一个事务中执行多条语句
+        
+        用法:
+            with db_manager.transaction() as cursor:
+                cursor.execute(...)
+        
+        正常退出时提交，发生异常时回滚并继续抛出异常。事务期间持有连接锁，
+        其他线程的语句不会混入本事务。
+        """
+        with self._lock:
+            if not self.connection or not self.connection.open:
+                self.connect()
+            self.connection.begin()
+            cursor = self.connection.cursor()
+            try:
+                yield cursor
+                self.connection.commit()
+            except Exception:
+                self.connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    
     def backup_database(self, use_docker=False):
         """备份数据库到文件
         
@@ -482,9 +728,16 @@ class DatabaseManager:
             
             if result.returncode == 0:
                 logger.info(f"数据库恢复成功，从文件: {backup_file}")
-                # 恢复后重新连接数据库
+                # 恢复后重新连接数据库，并清空实体缓存
                 self.close()
                 self.connect()
+                clear_all_caches()
+                from database.search_index import search_index
+                search_index.invalidate()
+                from models.scores import score_stats_cache
+                score_stats_cache.invalidate()
+                from database.course_catalogue import course_catalogue
+                course_catalogue.invalidate()
                 return True
             else:
                 logger.error(f"数据库恢复失败: {result.stderr}")
@@ -492,6 +745,22 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"数据库恢复过程中发生错误: {e}")
             return False
+    
+    def list_backups(self):
+        """列出备份目录中的备份文件名（最新的在前）"""
+        try:
+            names = [name for name in os.listdir(BACKUP_DIR) if name.endswith('.sql')]
+        except OSError:
+            return []
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(BACKUP_DIR, name)), reverse=True)
+        return names
+    
+    def backup_path(self, backup_name):
+        """备份文件名对应的完整路径，只接受备份目录中已存在的 .sql 文件，否则返回 None"""
+        if not backup_name or os.path.basename(backup_name) != backup_name or not backup_name.endswith('.sql'):
+            return None
+        path = os.path.join(BACKUP_DIR, backup_name)
+        return path if os.path.isfile(path) else None
             
     def clear_cache(self):
         """清理系统缓存"""
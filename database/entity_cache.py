@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""实体缓存模块，按主键和业务键缓存学生、教师、课程记录（进程内共享）"""
+
+import sys
+import threading
+import logging
+from collections import OrderedDict
+from config.config import ENTITY_CACHE_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('entity_cache')
+
+
+class EntityCache:
+    """实体缓存类（Identity Map）
+
+    以主键 id 为唯一存储键，业务键（如 user_id、student_id）只保存到主键的映射，
+    同一条记录在缓存中只有一份。超过条数或内存上限时按 LRU 淘汰。
+    """
+
+    def __init__(self, table, secondary_keys=(), max_entries=None, max_bytes=None):
+        """初始化缓存
+
+        Args:
+            table: 表名，仅用于日志
+            secondary_keys: 业务键字段名列表
+            max_entries: 最多缓存的记录数
+            max_bytes: 缓存内存上限（字节，估算值）
+        """
+        self.table = table
+        self.secondary_keys = tuple(secondary_keys)
+        self.max_entries = max_entries or ENTITY_CACHE_CONFIG['max_entries']
+        self.max_bytes = max_bytes or ENTITY_CACHE_CONFIG['max_bytes']
+        self.enabled = ENTITY_CACHE_CONFIG.get('enabled', True)
+        # 主键 -> (记录, 估算大小)
+        self._rows = OrderedDict()
+        # 业务键字段 -> {业务键值: 主键}
+        self._indexes = {key: {} for key in self.secondary_keys}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _estimate_size(row):
+        """估算一条记录占用的内存"""
+        size = sys.getsizeof(row)
+        for key, value in row.items():
+            size += sys.getsizeof(key) + sys.getsizeof(value)
+        return size
+
+    def get(self, key_name, value):
+        """根据主键('id')或业务键获取记录，未命中返回 None
+
+        返回记录的浅拷贝，调用方修改返回值不会污染缓存。
+        """
+        if not self.enabled or value is None:
+            return None
+        with self._lock:
+            if key_name == 'id':
+                pk = value
+            else:
+                pk = self._indexes.get(key_name, {}).get(value)
+            entry = self._rows.get(pk) if pk is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(pk)
+            self.hits += 1
+            return dict(entry[0])
+
+    def put(self, row):
+        """写入一条记录（必须包含主键 id）"""
+        if not self.enabled or not row or row.get('id') is None:
+            return
+        row = dict(row)
+        size = self._estimate_size(row)
+        with self._lock:
+            self._remove_locked(row['id'])
+            self._rows[row['id']] = (row, size)
+            self._bytes += size
+            for key in self.secondary_keys:
+                if row.get(key) is not None:
+                    self._indexes[key][row[key]] = row['id']
+            # 超出条数或内存上限时淘汰最久未使用的记录
+            while self._rows and (len(self._rows) > self.max_entries or self._bytes > self.max_bytes):
+                oldest_pk = next(iter(self._rows))
+                self._remove_locked(oldest_pk)
+
+    def invalidate(self, key_name, value):
+        """根据主键或业务键使一条记录失效"""
+        if value is None:
+            return
+        with self._lock:
+            if key_name == 'id':
+                pk = value
+            else:
+                pk = self._indexes.get(key_name, {}).get(value)
+            if pk is not None:
+                self._remove_locked(pk)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._rows.clear()
+            for index in self._indexes.values():
+                index.clear()
+            self._bytes = 0
+        logger.info(f"{self.table} 实体缓存已清空")
+
+    def _remove_locked(self, pk):
+        """删除主键对应的记录及其业务键映射（调用方需持有锁）"""
+        entry = self._rows.pop(pk, None)
+        if entry is None:
+            return
+        row, size = entry
+        self._bytes -= size
+        for key in self.secondary_keys:
+            index = self._indexes[key]
+            if row.get(key) is not None and index.get(row[key]) == pk:
+                del index[row[key]]
+
+    def stats(self):
+        """返回缓存统计信息"""
+        with self._lock:
+            return {
+                'table': self.table,
+                'entries': len(self._rows),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+# 创建全局实体缓存实例
+student_cache = EntityCache('students', secondary_keys=('user_id', 'student_id'))
+teacher_cache = EntityCache('teachers', secondary_keys=('user_id', 'teacher_id'))
+course_cache = EntityCache('courses', secondary_keys=('course_code',))
+
+
+def clear_all_caches():
+    """清空所有实体缓存（如数据库恢复之后）"""
+    for cache in (student_cache, teacher_cache, course_cache):
+        cache.clear()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""列投影模块，为各表及服务器接口定义显式的查询列
+
+模型层查询只选取这里列出的列，不再使用 SELECT *：减少网络传输与 JSON 编码开销，
+并保证 users.password 等敏感列不会离开服务器。
+"""
+
+# 各表对外返回的列（users 表不含 password）
+PROJECTIONS = {
+    'user': ('id', 'username', 'role', 'name', 'email', 'created_at'),
+    'student': ('id', 'student_id', 'name', 'gender', 'birth', 'class', 'major', 'user_id'),
+    'teacher': ('id', 'teacher_id', 'name', 'gender', 'title', 'department', 'user_id'),
+    'course': ('id', 'course_code', 'course_name', 'credits', 'teacher_id', 'semester',
+               'class_time', 'class_location', 'capacity', 'enrolled_count'),
+    'score': ('id', 'student_id', 'course_id', 'score', 'semester', 'exam_time'),
+    'academic_summary': ('student_id', 'semester', 'credits_attempted', 'credits_earned',
+                         'weighted_points', 'gpa'),
+    # 教师查看课程学生名单
+    'course_student': ('id', 'student_id', 'name', 'gender', 'birth', 'class', 'major'),
+    # 学生查看已选课程
+    'student_course': ('id', 'course_code', 'course_name', 'credits', 'teacher_id', 'semester',
+                       'class_time', 'class_location'),
+    # 学生查看自己的成绩
+    'student_score': ('id', 'course_id', 'score', 'semester', 'exam_time')
+}
+
+
+def columns(name, alias=None):
+    """返回投影对应的 SQL 列清单，如 "st.id, st.student_id, ..." """
+    prefix = f"{alias}." if alias else ''
+    return ', '.join(f"{prefix}`{column}`" for column in PROJECTIONS[name])
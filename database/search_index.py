@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""搜索索引模块，为用户、学生、教师、课程提供内存 n-gram 倒排索引
+
+替代 LIKE '%关键词%' 的全表扫描：首次搜索时从数据库加载整表建立索引，
+之后由模型层的增删改操作增量维护。中文姓名同样按字切分，不依赖前缀索引。
+同一索引还为学号、学生与教师姓名、教师编号、课程代码维护有序前缀表，用于输入联想。
+"""
+
+import bisect
+import heapq
+import threading
+import logging
+from collections import defaultdict
+from database.db_manager import db_manager
+from database.projections import columns
+from config.config import SEARCH_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('search_index')
+
+
+def _normalize(value):
+    """统一大小写，与数据库不区分大小写的排序规则保持一致"""
+    return str(value).casefold() if value is not None else ''
+
+
+class PrefixList:
+    """有序前缀表，按规范化后的字段值排序，支持二分查找前缀区间"""
+
+    def __init__(self):
+        """初始化前缀表"""
+        self._entries = []  # (规范化值, 主键) 有序列表
+
+    def add(self, value, doc_id):
+        """插入一项"""
+        bisect.insort(self._entries, (_normalize(value), doc_id))
+
+    def remove(self, value, doc_id):
+        """删除一项"""
+        entry = (_normalize(value), doc_id)
+        i = bisect.bisect_left(self._entries, entry)
+        if i < len(self._entries) and self._entries[i] == entry:
+            del self._entries[i]
+
+    def clear(self):
+        """清空前缀表"""
+        self._entries.clear()
+
+    def match(self, prefix, limit):
+        """返回以 prefix 开头的前 limit 个主键（按字段值升序）"""
+        prefix = _normalize(prefix)
+        result = []
+        i = bisect.bisect_left(self._entries, (prefix,))
+        while i < len(self._entries) and len(result) < limit:
+            value, doc_id = self._entries[i]
+            if not value.startswith(prefix):
+                break
+            result.append(doc_id)
+            i += 1
+        return result
+
+
+class TableIndex:
+    """单表 n-gram 倒排索引"""
+
+    def __init__(self, table, key_field, fields, projection, ngram=None, prefix_fields=()):
+        """初始化索引
+
+        Args:
+            table: 表名
+            key_field: 唯一业务键字段（如 username、student_id）
+            fields: 参与搜索的字段列表
+            projection: 索引中保存（即搜索结果返回）的列投影名，见 database.projections
+            ngram: 索引的最大 n-gram 长度
+            prefix_fields: 需要维护有序前缀表（输入联想）的字段列表
+        """
+        self.table = table
+        self.key_field = key_field
+        self.fields = tuple(fields)
+        self.projection = projection
+        self.ngram = ngram or SEARCH_CONFIG['ngram']
+        self.loaded = False
+        self._docs = {}  # 主键 -> 记录
+        self._keys = {}  # 业务键 -> 主键
+        self._doc_grams = {}  # 主键 -> 该记录产生的 gram 集合（用于删除）
+        self._postings = defaultdict(set)  # gram -> 主键集合
+        self._prefixes = {field: PrefixList() for field in prefix_fields}
+        self._lock = threading.RLock()
+
+    def _grams(self, text):
+        """切分出长度 1..n 的所有 gram"""
+        grams = set()
+        for size in range(1, self.ngram + 1):
+            for i in range(len(text) - size + 1):
+                grams.add(text[i:i + size])
+        return grams
+
+    def _query_grams(self, keyword):
+        """关键词切分：长度不足 n 时整体作为一个 gram，否则取所有 n-gram"""
+        if len(keyword) <= self.ngram:
+            return {keyword}
+        return {keyword[i:i + self.ngram] for i in range(len(keyword) - self.ngram + 1)}
+
+    def load(self):
+        """从数据库加载整表并建立索引"""
+        with self._lock:
+            rows = db_manager.execute_query(f"SELECT {columns(self.projection)} FROM {self.table}")
+            if rows is None:
+                logger.error(f"加载 {self.table} 搜索索引失败")
+                return False
+            self._docs.clear()
+            self._keys.clear()
+            self._doc_grams.clear()
+            self._postings.clear()
+            for prefix_list in self._prefixes.values():
+                prefix_list.clear()
+            for row in rows:
+                self._add_locked(row)
+            self.loaded = True
+            logger.info(f"{self.table} 搜索索引已建立，共 {len(rows)} 条记录")
+            return True
+
+    def invalidate(self):
+        """使索引失效，下次搜索时重建"""
+        with self._lock:
+            self.loaded = False
+            self._docs.clear()
+            self._keys.clear()
+            self._doc_grams.clear()
+            self._postings.clear()
+            for prefix_list in self._prefixes.values():
+                prefix_list.clear()
+
+    def _add_locked(self, row):
+        """加入一条记录（调用方需持有锁）"""
+        doc_id = row['id']
+        self._remove_locked(doc_id)
+        row = dict(row)
+        grams = set()
+        for field in self.fields:
+            grams |= self._grams(_normalize(row.get(field)))
+        self._docs[doc_id] = row
+        self._doc_grams[doc_id] = grams
+        if row.get(self.key_field) is not None:
+            self._keys[row[self.key_field]] = doc_id
+        for gram in grams:
+            self._postings[gram].add(doc_id)
+        for field, prefix_list in self._prefixes.items():
+            if row.get(field) is not None:
+                prefix_list.add(row[field], doc_id)
+
+    def _remove_locked(self, doc_id):
+        """删除一条记录（调用方需持有锁）"""
+        row = self._docs.pop(doc_id, None)
+        if row is None:
+            return
+        if self._keys.get(row.get(self.key_field)) == doc_id:
+            del self._keys[row[self.key_field]]
+        for field, prefix_list in self._prefixes.items():
+            if row.get(field) is not None:
+                prefix_list.remove(row[field], doc_id)
+        for gram in self._doc_grams.pop(doc_id, ()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def upsert(self, row):
+        """新增或替换一条记录（索引未建立时忽略，待首次搜索时整体加载）"""
+        with self._lock:
+            if self.loaded and row:
+                self._add_locked(row)
+
+    def remove(self, field, value):
+        """按主键、业务键或其他字段删除记录"""
+        with self._lock:
+            if not self.loaded:
+                return
+            if field == 'id':
+                self._remove_locked(value)
+            elif field == self.key_field:
+                doc_id = self._keys.get(value)
+                if doc_id is not None:
+                    self._remove_locked(doc_id)
+            else:
+                # 非索引字段（如级联删除时的 user_id）只能线性扫描
+                for doc_id in [d for d, row in self._docs.items() if row.get(field) == value]:
+                    self._remove_locked(doc_id)
+
+    def search(self, keyword, limit=None):
+        """搜索并按相关度排序返回记录
+
+        排序规则：字段完全匹配 > 前缀匹配 > 包含匹配，同级时匹配字段越短越靠前。
+        关键词为空时按主键顺序返回全部记录（未指定 limit 时不截断），与不带条件的列表一致。
+        """
+        keyword = _normalize(keyword).strip()
+        with self._lock:
+            if not self.loaded and not self.load():
+                return None
+            if not keyword:
+                return [dict(self._docs[d]) for d in sorted(self._docs)[:limit]]
+            limit = limit or SEARCH_CONFIG['max_results']
+
+            # 按倒排表长度从小到大求交集，得到候选集合
+            postings = sorted((self._postings.get(g, set()) for g in self._query_grams(keyword)), key=len)
+            if not postings or not postings[0]:
+                return []
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return []
+
+            ranked = []
+            for doc_id in candidates:
+                row = self._docs[doc_id]
+                best = None
+                for field in self.fields:
+                    text = _normalize(row.get(field))
+                    pos = text.find(keyword)
+                    if pos < 0:
+                        continue
+                    if text == keyword:
+                        rank = (0, len(text))
+                    elif pos == 0:
+                        rank = (1, len(text))
+                    else:
+                        rank = (2, len(text))
+                    if best is None or rank < best:
+                        best = rank
+                # n-gram 命中不代表连续子串命中，需要复核
+                if best is not None:
+                    ranked.append((best[0], best[1], doc_id))
+            return [dict(self._docs[doc_id]) for _, _, doc_id in heapq.nsmallest(limit, ranked)]
+
+    def suggest(self, field, prefix, limit, label_fields=()):
+        """输入联想：返回字段值以 prefix 开头的前 limit 条精简记录"""
+        with self._lock:
+            if not self.loaded and not self.load():
+                return None
+            result = []
+            for doc_id in self._prefixes[field].match(prefix, limit):
+                row = self._docs[doc_id]
+                result.append({
+                    'id': doc_id,
+                    'value': row.get(field),
+                    'label': ' '.join(str(row.get(f)) for f in label_fields if row.get(f) is not None)
+                })
+            return result
+
+
+class SearchIndex:
+    """搜索索引管理类，维护各表的倒排索引"""
+
+    def __init__(self):
+        """初始化各表索引"""
+        self.tables = {
+            'users': TableIndex('users', 'username', ('username', 'name'), 'user'),
+            'students': TableIndex('students', 'student_id', ('student_id', 'name'), 'student',
+                                   prefix_fields=('student_id', 'name')),
+            'teachers': TableIndex('teachers', 'teacher_id', ('teacher_id', 'name'), 'teacher',
+                                   prefix_fields=('teacher_id', 'name')),
+            'courses': TableIndex('courses', 'course_code', ('course_code', 'course_name', 'semester'), 'course',
+                                  prefix_fields=('course_code',))
+        }
+        # 联想字段 -> (表名, 字段名, 展示字段)
+        self.suggest_fields = {
+            'student_id': ('students', 'student_id', ('student_id', 'name')),
+            'student_name': ('students', 'name', ('name', 'student_id')),
+            'teacher_id': ('teachers', 'teacher_id', ('teacher_id', 'name')),
+            'teacher_name': ('teachers', 'name', ('name', 'teacher_id')),
+            'course_code': ('courses', 'course_code', ('course_code', 'course_name'))
+        }
+
+    def search(self, table, keyword, limit=None):
+        """在指定表中搜索"""
+        return self.tables[table].search(keyword, limit)
+
+    def suggest(self, field, prefix, limit=None):
+        """输入联想，field 取值见 suggest_fields"""
+        if field not in self.suggest_fields:
+            return None
+        limit = max(1, min(int(limit or SEARCH_CONFIG['suggest_limit']), SEARCH_CONFIG['max_suggest_limit']))
+        table, column, label_fields = self.suggest_fields[field]
+        return self.tables[table].suggest(column, prefix, limit, label_fields)
+
+    def refresh_row(self, table, field, value):
+        """写操作之后重新读取一条记录并更新索引"""
+        index = self.tables[table]
+        if not index.loaded:
+            return
+        try:
+            rows = db_manager.execute_query(
+                f"SELECT {columns(index.projection)} FROM {table} WHERE {field} = %s", (value,)
+            )
+            if rows:
+                for row in rows:
+                    index.upsert(row)
+            else:
+                index.remove(field, value)
+        except Exception as e:
+            logger.error(f"更新 {table} 搜索索引失败: {e}")
+            index.invalidate()
+
+    def remove(self, table, field, value):
+        """从指定表的索引中删除记录"""
+        self.tables[table].remove(field, value)
+
+    def invalidate(self, table=None):
+        """使指定表（或全部表）的索引失效"""
+        for name, index in self.tables.items():
+            if table is None or name == table:
+                index.invalidate()
+
+
+# 创建全局搜索索引实例
+search_index = SearchIndex()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""选课引擎压力测试
+
+模拟选课开放瞬间大量学生同时抢同一门限额课程：创建一门临时课程和一批临时学生，
+并发经选课引擎提交选课请求，统计吞吐量、延迟分布和各类结果，并校验没有超额选课。
+测试结束后删除临时数据。
+
+使用方法（需先启动 MySQL 并初始化数据库）：
+python enrollment_load_test.py --students 3000 --capacity 500 --concurrency 500
+"""
+
+import sys
+import os
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.db_manager import db_manager
+from models.enrollment_engine import enrollment_engine
+
+SEMESTER = 'LOADTEST'
+
+
+def setup(students, capacity):
+    """创建临时课程与学生，返回 (课程ID, 学生ID列表)"""
+    tag = str(int(time.time()))
+    course_code = f'LT{tag}'
+    db_manager.execute_update(
+        "INSERT INTO courses (course_code, course_name, credits, semester, capacity) VALUES (%s, %s, %s, %s, %s)",
+        (course_code, '选课压力测试', 1.0, SEMESTER, capacity)
+    )
+    course_id = db_manager.execute_query("SELECT id FROM courses WHERE course_code = %s", (course_code,))[0]['id']
+
+    rows = [(f'LT{tag}{i:06d}', f'压测学生{i}') for i in range(students)]
+    with db_manager.transaction() as cursor:
+        cursor.executemany("INSERT INTO students (student_id, name) VALUES (%s, %s)", rows)
+    student_ids = [row['id'] for row in db_manager.execute_query(
+        "SELECT id FROM students WHERE student_id LIKE %s", (f'LT{tag}%',)
+    )]
+    return course_id, student_ids
+
+
+def cleanup(course_id, student_ids):
+    """删除临时数据（选课记录随外键级联删除）"""
+    db_manager.execute_update("DELETE FROM courses WHERE id = %s", (course_id,))
+    with db_manager.transaction() as cursor:
+        for i in range(0, len(student_ids), 1000):
+            chunk = student_ids[i:i + 1000]
+            cursor.execute(f"DELETE FROM students WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+
+
+def percentile(sorted_values, p):
+    """已排序列表的百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * p / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run(students, capacity, concurrency):
+    """执行压测并打印报告，校验通过返回 True"""
+    print(f"准备数据: {students} 名学生，课程容量 {capacity}")
+    course_id, student_ids = setup(students, capacity)
+    try:
+        enrollment_engine.start()
+
+        def enroll(student_id):
+            started = time.perf_counter()
+            status, _ = enrollment_engine.enroll(student_id, course_id, SEMESTER)
+            return status, time.perf_counter() - started
+
+        print(f"开始压测: 并发 {concurrency}")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(enroll, student_ids))
+        elapsed = time.perf_counter() - started
+
+        statuses = Counter(status for status, _ in results)
+        latencies = sorted(latency * 1000 for _, latency in results)
+        enrolled = db_manager.execute_query(
+            "SELECT COUNT(*) AS cnt FROM enrollments WHERE course_id = %s", (course_id,)
+        )[0]['cnt']
+        counter = db_manager.execute_query(
+            "SELECT enrolled_count FROM courses WHERE id = %s", (course_id,)
+        )[0]['enrolled_count']
+
+        print(f"总请求: {len(results)}，耗时 {elapsed:.2f} 秒，吞吐量 {len(results) / elapsed:.0f} 请求/秒")
+        print(f"延迟(ms): p50={percentile(latencies, 50):.1f} p95={percentile(latencies, 95):.1f} "
+              f"p99={percentile(latencies, 99):.1f} max={latencies[-1]:.1f}")
+        print(f"结果分布: {dict(statuses)}")
+        print(f"引擎统计: {enrollment_engine.stats()}")
+        print(f"数据库选课记录: {enrolled}，课程已选人数: {counter}")
+
+        ok = enrolled == counter == statuses.get('ok', 0) and enrolled <= capacity
+        print("校验通过：未超额选课，计数一致" if ok else "校验失败：选课人数与计数不一致或超出容量")
+        return ok
+    finally:
+        cleanup(course_id, student_ids)
+        enrollment_engine.invalidate(course_id)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='选课引擎压力测试')
+    parser.add_argument('--students', type=int, default=3000, help='模拟学生人数')
+    parser.add_argument('--capacity', type=int, default=500, help='课程容量')
+    parser.add_argument('--concurrency', type=int, default=500, help='并发请求数')
+    args = parser.parse_args()
+    sys.exit(0 if run(args.students, args.capacity, args.concurrency) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,9 +15,10 @@ python init_database.py
 import pymysql
 import sys
 import os
-import hashlib
 from pymysql.cursors import DictCursor
 import logging
+from utils.time_slots import parse_class_time
+from utils.passwords import hash_password
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -80,7 +81,7 @@ def init_database():
             CREATE TABLE users (
                 id INT PRIMARY KEY AUTO_INCREMENT,
                 username VARCHAR(50) UNIQUE NOT NULL,
-                password VARCHAR(100) NOT NULL,
+                password VARCHAR(255) NOT NULL,
                 role VARCHAR(20) NOT NULL,
                 name VARCHAR(50) NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -130,6 +131,9 @@ def init_database():
                 semester VARCHAR(20),
                 class_time VARCHAR(100),
                 class_location VARCHAR(100),
+                capacity INT,
+                enrolled_count INT NOT NULL DEFAULT 0,
+                KEY idx_courses_semester (semester),
                 FOREIGN KEY (teacher_id) REFERENCES teachers(id) ON DELETE SET NULL
             )
         ''')
@@ -165,14 +169,56 @@ def init_database():
             )
         ''')
         
+        # 创建学生学业汇总表（每个学生每学期一行，semester='ALL' 为累计）
+        logger.info("创建学业汇总表")
+        cursor.execute('''
+            CREATE TABLE student_academic_summary (
+                student_id INT NOT NULL,
+                semester VARCHAR(20) NOT NULL,
+                credits_attempted FLOAT NOT NULL DEFAULT 0,
+                credits_earned FLOAT NOT NULL DEFAULT 0,
+                weighted_points FLOAT NOT NULL DEFAULT 0,
+                gpa FLOAT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (student_id, semester),
+                FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
+            )
+        ''')
+        
+        # 创建课程上课时段表
+        logger.info("创建课程上课时段表")
+        cursor.execute('''
+            CREATE TABLE course_sessions (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                course_id INT NOT NULL,
+                weekday TINYINT NOT NULL,
+                start_minute SMALLINT NOT NULL,
+                end_minute SMALLINT NOT NULL,
+                KEY idx_course_slot (course_id, weekday, start_minute, end_minute),
+                FOREIGN KEY (course_id) REFERENCES courses(id) ON DELETE CASCADE
+            )
+        ''')
+        
+        # 创建登录会话表
+        logger.info("创建登录会话表")
+        cursor.execute('''
+            CREATE TABLE user_sessions (
+                id INT PRIMARY KEY AUTO_INCREMENT,
+                user_id INT NOT NULL,
+                token_hash CHAR(64) NOT NULL,
+                client_address VARCHAR(64),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at DATETIME NOT NULL,
+                revoked_at DATETIME NULL,
+                UNIQUE KEY uniq_token_hash (token_hash),
+                KEY idx_user_sessions_user (user_id),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+            )
+        ''')
+        
         # 插入测试数据
         logger.info("插入测试数据")
         
-        # 密码哈希函数，与models/user.py中保持一致
-        def hash_password(password):
-            """密码加密"""
-            return hashlib.sha256(password.encode()).hexdigest()
-
         # 插入管理员用户
         admin_password = hash_password('admin123')
         cursor.execute('''
@@ -333,6 +379,12 @@ def init_database():
                 'INSERT INTO courses (course_code, course_name, credits, teacher_id, semester, class_time, class_location) VALUES (%s, %s, %s, %s, %s, %s, %s)',
                 course
             )
+            course_id = cursor.lastrowid
+            for weekday, start, end in parse_class_time(course[5]):
+                cursor.execute(
+                    'INSERT INTO course_sessions (course_id, weekday, start_minute, end_minute) VALUES (%s, %s, %s, %s)',
+                    (course_id, weekday, start, end)
+                )
         
         # 获取课程ID
         cursor.execute('SELECT id FROM courses WHERE course_code="CS101"')
@@ -475,6 +527,12 @@ def init_database():
                 score
             )
         
+        # 根据选课记录计算各课程已选人数
+        cursor.execute('''
+            UPDATE courses c
+            SET c.enrolled_count = (SELECT COUNT(*) FROM enrollments e WHERE e.course_id = c.id)
+        ''')
+        
         # 提交事务
         conn.commit()
         cursor.close()
@@ -18,6 +18,11 @@ def main():
         # 只启动服务器模式
         print("启动服务器模式...")
         start_server()
+    elif len(sys.argv) > 1 and sys.argv[1] == '--rebuild-summary':
+        # 从成绩表全量重建学业汇总表
+        from models.scores import Score
+        print("重建学业汇总表...")
+        sys.exit(0 if Score.rebuild_academic_summary() else 1)
     else:
         # 正常启动客户端模式（包含内嵌服务器）
         from ui.login_window import LoginWindow
@@ -4,8 +4,15 @@
 """课程模型，处理课程相关的业务逻辑"""
 
 from database.db_manager import db_manager
+from database.projections import columns
+from database.entity_cache import course_cache
+from database.search_index import search_index
+from database.course_catalogue import course_catalogue
 import logging
+from utils.time_slots import parse_class_time
 from .enrollment import Enrollment
+from .enrollment_engine import enrollment_engine
+from .scores import Score, score_stats_cache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -16,11 +23,11 @@ class Course:
     """课程类，封装课程相关的业务逻辑"""
     
     @staticmethod
-    def add_course(course_code, course_name, credits, teacher_id, semester, time=None, location=None):
-        """添加课程信息"""
+    def add_course(course_code, course_name, credits, teacher_id, semester, time=None, location=None, capacity=None):
+        """添加课程信息（capacity 为空或不大于 0 表示不限人数）"""
         try:
             # 检查课程代码是否已存在
-            query = "SELECT * FROM courses WHERE course_code = %s"
+            query = "SELECT id FROM courses WHERE course_code = %s"
             result = db_manager.execute_query(query, (course_code,))
             
             if result and len(result) > 0:
@@ -37,10 +44,17 @@ class Course:
                     return False
             
             # 插入课程信息
-            query = "INSERT INTO courses (course_code, course_name, credits, teacher_id, semester, class_time, class_location) VALUES (%s, %s, %s, %s, %s, %s, %s)"
-            result = db_manager.execute_update(query, (course_code, course_name, credits, teacher_id, semester, time, location))
+            query = "INSERT INTO courses (course_code, course_name, credits, teacher_id, semester, class_time, class_location, capacity) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+            with db_manager.transaction() as cursor:
+                result = cursor.execute(query, (course_code, course_name, credits, teacher_id, semester, time, location,
+                                                Course._normalize_capacity(capacity)))
+                if result > 0:
+                    Course._write_sessions(cursor, cursor.lastrowid, time)
             
             if result > 0:
+                course_cache.invalidate('course_code', course_code)
+                course_catalogue.invalidate()
+                search_index.refresh_row('courses', 'course_code', course_code)
                 logger.info(f"课程 {course_name} (代码: {course_code}) 添加成功")
                 return True
             else:
@@ -51,8 +65,8 @@ class Course:
             return False
     
     @staticmethod
-    def update_course(course_id, code, name, credit, teacher_id, semester, time, location=None):
-        """更新课程信息"""
+    def update_course(course_id, code, name, credit, teacher_id, semester, time, location=None, capacity=None):
+        """更新课程信息（capacity 为 None 表示不修改，不大于 0 表示不限人数）"""
         try:
             # 构建更新语句
             updates = []
@@ -75,37 +89,26 @@ class Course:
                 updates.append("semester = %s")
                 params.append(semester)
             
-            # 处理上课时间更新
+            # 处理上课时间更新（字段是否存在以迁移后缓存的表结构为准）
             if time:
-                # 检查数据库中是否存在class_time字段
-                try:
-                    # 先检查字段是否存在
-                    check_field_query = "SHOW COLUMNS FROM courses LIKE 'class_time'"
-                    field_exists = db_manager.execute_query(check_field_query)
-                    
-                    if field_exists:
-                        updates.append("class_time = %s")
-                        params.append(time)
-                    else:
-                        logger.warning("尝试更新课程时间，但数据库中没有相应字段。如需添加上课时间功能，请先修改数据库结构。")
-                except Exception as e:
-                    logger.error(f"检查课程时间字段失败: {e}")
+                if db_manager.schema.has_column('courses', 'class_time'):
+                    updates.append("class_time = %s")
+                    params.append(time)
+                else:
+                    logger.warning("尝试更新课程时间，但数据库中没有相应字段。如需添加上课时间功能，请先修改数据库结构。")
             
             # 处理上课地点更新
             if location:
-                # 检查数据库中是否存在class_location字段
-                try:
-                    # 先检查字段是否存在
-                    check_field_query = "SHOW COLUMNS FROM courses LIKE 'class_location'"
-                    field_exists = db_manager.execute_query(check_field_query)
-                    
-                    if field_exists:
-                        updates.append("class_location = %s")
-                        params.append(location)
-                    else:
-                        logger.warning("尝试更新课程地点，但数据库中没有相应字段。如需添加上课地点功能，请先修改数据库结构。")
-                except Exception as e:
-                    logger.error(f"检查课程地点字段失败: {e}")
+                if db_manager.schema.has_column('courses', 'class_location'):
+                    updates.append("class_location = %s")
+                    params.append(location)
+                else:
+                    logger.warning("尝试更新课程地点，但数据库中没有相应字段。如需添加上课地点功能，请先修改数据库结构。")
+            
+            # 处理课程容量更新
+            if capacity is not None:
+                updates.append("capacity = %s")
+                params.append(Course._normalize_capacity(capacity))
             
             # 验证teacher_id是否存在（如果提供了非空值）
             if teacher_id is not None:
@@ -129,7 +132,19 @@ class Course:
             
             # 执行更新
             query = f"UPDATE courses SET {', '.join(updates)} WHERE id = %s"
-            result = db_manager.execute_update(query, tuple(params))
+            with db_manager.transaction() as cursor:
+                result = cursor.execute(query, tuple(params))
+                if time:
+                    Course._write_sessions(cursor, course_id, time)
+            course_cache.invalidate('id', course_id)
+            course_catalogue.invalidate()
+            if capacity is not None:
+                enrollment_engine.invalidate(course_id)
+            if result:
+                search_index.refresh_row('courses', 'id', course_id)
+                # 学分变化会影响所有有该课程成绩的学生的学业汇总
+                if credit is not None:
+                    Score.refresh_academic_summary_for_course(course_id)
             
             # 只要执行成功（无论是否有行被更新），就认为更新成功
             # execute_update在执行失败时会返回0或抛出异常
@@ -146,14 +161,41 @@ class Course:
             logger.error(f"更新课程信息失败: {e}")
             return False
     
+    @staticmethod
+    def _normalize_capacity(capacity):
+        """容量不大于 0 时存为 NULL（不限人数）"""
+        try:
+            capacity = int(capacity)
+        except (TypeError, ValueError):
+            return None
+        return capacity if capacity > 0 else None
+    
+    @staticmethod
+    def _write_sessions(cursor, course_id, class_time):
+        """将上课时间解析为结构化时段并替换该课程原有时段（在调用方事务内执行）"""
+        cursor.execute("DELETE FROM course_sessions WHERE course_id = %s", (course_id,))
+        sessions = parse_class_time(class_time)
+        if sessions:
+            cursor.executemany(
+                "INSERT INTO course_sessions (course_id, weekday, start_minute, end_minute) VALUES (%s, %s, %s, %s)",
+                [(course_id, weekday, start, end) for weekday, start, end in sessions]
+            )
+        elif class_time:
+            logger.warning(f"课程 (ID: {course_id}) 的上课时间 \"{class_time}\" 无法解析，不参与时间冲突检查")
+    
     @staticmethod
     def get_course_by_code(course_code):
         """根据课程代码获取课程信息"""
         try:
-            query = "SELECT * FROM courses WHERE course_code = %s"
+            cached = course_cache.get('course_code', course_code)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('course')} FROM courses WHERE course_code = %s"
             result = db_manager.execute_query(query, (course_code,))
             
             if result and len(result) > 0:
+                course_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"课程代码 {course_code} 不存在")
@@ -166,9 +208,14 @@ class Course:
     def get_course_by_id(course_id):
         """根据课程ID获取课程信息"""
         try:
-            query = "SELECT * FROM courses WHERE id = %s"
+            cached = course_cache.get('id', course_id)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('course')} FROM courses WHERE id = %s"
             result = db_manager.execute_query(query, (course_id,))
             if result and len(result) > 0:
+                course_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"课程ID {course_id} 不存在")
@@ -181,7 +228,7 @@ class Course:
     def get_courses_by_teacher_id(teacher_id):
         """根据教师ID获取教授的课程"""
         try:
-            query = "SELECT * FROM courses WHERE teacher_id = %s"
+            query = f"SELECT {columns('course')} FROM courses WHERE teacher_id = %s"
             result = db_manager.execute_query(query, (teacher_id,))
             
             # 为每个课程计算学生人数（基于选课表统计）
@@ -198,11 +245,22 @@ class Course:
             logger.error(f"获取教师课程失败: {e}")
             return None
     
+    @staticmethod
+    def get_course_ids_by_teacher_id(teacher_id):
+        """根据教师ID获取其所授课程的ID列表"""
+        try:
+            query = "SELECT id FROM courses WHERE teacher_id = %s"
+            result = db_manager.execute_query(query, (teacher_id,))
+            return [row['id'] for row in result] if result else []
+        except Exception as e:
+            logger.error(f"获取教师课程ID失败: {e}")
+            return []
+
     @staticmethod
     def get_all_courses():
         """获取所有课程信息(管理员/教师权限)"""
         try:
-            query = "SELECT * FROM courses"
+            query = f"SELECT {columns('course')} FROM courses"
             result = db_manager.execute_query(query)
             return result
         except Exception as e:
@@ -213,10 +271,7 @@ class Course:
     def search_courses(keyword):
         """搜索课程信息(管理员/教师/学生权限)"""
         try:
-            query = "SELECT * FROM courses WHERE course_code LIKE %s OR course_name LIKE %s OR semester LIKE %s"
-            keyword = f"%{keyword}%"
-            result = db_manager.execute_query(query, (keyword, keyword, keyword))
-            return result
+            return search_index.search('courses', keyword)
         except Exception as e:
             logger.error(f"搜索课程信息失败: {e}")
             return None
@@ -226,9 +281,20 @@ class Course:
         """删除课程信息(管理员权限)"""
         try:
             query = "DELETE FROM courses WHERE id = %s"
-            result = db_manager.execute_update(query, (course_id,))
+            with db_manager.transaction() as cursor:
+                # 外键级联会删除该课程的成绩，需要同步更新相关学生的学业汇总
+                cursor.execute("SELECT DISTINCT student_id FROM scores WHERE course_id = %s", (course_id,))
+                student_ids = [row['student_id'] for row in cursor.fetchall()]
+                result = cursor.execute(query, (course_id,))
+                if result > 0:
+                    Score._refresh_academic_summary(cursor, student_ids)
+            course_cache.invalidate('id', course_id)
             
             if result > 0:
+                search_index.remove('courses', 'id', course_id)
+                score_stats_cache.invalidate(course_id)
+                enrollment_engine.invalidate(course_id)
+                course_catalogue.invalidate()
                 logger.info(f"课程 (ID: {course_id}) 删除成功")
                 return True
             else:
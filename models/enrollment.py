@@ -4,27 +4,143 @@
 """选课模型，处理学生与课程的选课关系"""
 
 from database.db_manager import db_manager
+from database.projections import columns
+from database.entity_cache import course_cache
+from database.course_catalogue import course_catalogue
+from config.config import CATALOGUE_CONFIG
+from utils.time_slots import format_session
 import logging
+import time
+import pymysql
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('enrollment_model')
 
+# 选课结果状态
+ENROLL_OK = 'ok'
+ENROLL_ALREADY_ENROLLED = 'already_enrolled'
+ENROLL_TIME_CONFLICT = 'time_conflict'
+ENROLL_COURSE_NOT_FOUND = 'course_not_found'
+ENROLL_COURSE_FULL = 'course_full'
+ENROLL_BUSY = 'busy'
+ENROLL_ERROR = 'error'
+
+# 死锁/锁等待超时时的最大重试次数
+ENROLL_MAX_RETRIES = 3
+_RETRYABLE_ERRORS = (1213, 1205)  # ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT
+_DUPLICATE_ENTRY = 1062
+
+# 占用一个名额：capacity 为 NULL 表示不限
+_TAKE_SEAT_QUERY = (
+    "UPDATE courses SET enrolled_count = enrolled_count + 1 "
+    "WHERE id = %s AND (capacity IS NULL OR enrolled_count < capacity)"
+)
+
+
+class _CourseFull(Exception):
+    """课程已满，用于回滚已插入的选课记录"""
+
+# 已选课程中与目标课程 (t) 时间重叠的时段，参数依次为 学生ID、学期
+_CONFLICT_JOIN = """
+    JOIN enrollments e ON e.student_id = %s AND e.semester = %s AND e.course_id <> t.course_id
+    JOIN course_sessions s ON s.course_id = e.course_id
+        AND s.weekday = t.weekday
+        AND s.start_minute < t.end_minute
+        AND t.start_minute < s.end_minute
+"""
+
+# 时间冲突查询，参数依次为 学生ID、学期、目标课程ID
+_CONFLICT_QUERY = f"""
+    SELECT c.course_name, s.weekday, s.start_minute, s.end_minute
+    FROM course_sessions t
+    {_CONFLICT_JOIN}
+    JOIN courses c ON c.id = e.course_id
+    WHERE t.course_id = %s
+    LIMIT 1
+"""
+
 
 class Enrollment:
     """选课类，封装选课相关的业务逻辑"""
 
     @staticmethod
     def enroll(student_internal_id, course_id, semester=None):
-        """学生选课（使用内部自增学生ID，不是学号）"""
+        """学生选课（使用内部自增学生ID，不是学号），不检查容量，用于录入成绩等管理操作"""
         try:
             query = "INSERT INTO enrollments (student_id, course_id, semester) VALUES (%s, %s, %s)"
-            result = db_manager.execute_update(query, (student_internal_id, course_id, semester))
+            with db_manager.transaction() as cursor:
+                result = cursor.execute(query, (student_internal_id, course_id, semester))
+                if result > 0:
+                    cursor.execute("UPDATE courses SET enrolled_count = enrolled_count + 1 WHERE id = %s", (course_id,))
+            if result > 0:
+                course_cache.invalidate('id', course_id)
+                course_catalogue.adjust_enrolled(course_id, 1)
             return result > 0
         except Exception as e:
             logger.error(f"选课失败: {e}")
             return False
 
+    @staticmethod
+    def try_enroll(student_internal_id, course_id, semester):
+        """原子选课：在一个事务内完成冲突检查、插入与名额占用
+        
+        插入语句自带时间冲突判断（INSERT ... SELECT ... WHERE NOT EXISTS），
+        重复选课由 unique_enrollment 唯一键拒绝，检查与插入之间不存在竞争窗口。
+        插入成功后以条件 UPDATE 占用名额，课程已满则回滚。
+        遇到死锁或锁等待超时自动重试。
+        
+        返回: (status, message)，status 为 ENROLL_* 常量之一
+        """
+        query = f"""
+            INSERT INTO enrollments (student_id, course_id, semester)
+            SELECT %s, c.id, %s FROM courses c
+            WHERE c.id = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM course_sessions t
+                  {_CONFLICT_JOIN}
+                  WHERE t.course_id = c.id
+              )
+        """
+        params = (student_internal_id, semester, course_id, student_internal_id, semester)
+        for attempt in range(1, ENROLL_MAX_RETRIES + 1):
+            try:
+                with db_manager.transaction() as cursor:
+                    if cursor.execute(query, params) == 0:
+                        # 未插入：课程不存在或存在时间冲突
+                        cursor.execute(_CONFLICT_QUERY, (student_internal_id, semester, course_id))
+                        conflict = cursor.fetchone()
+                        if conflict:
+                            slot = format_session(conflict['weekday'], conflict['start_minute'], conflict['end_minute'])
+                            conflict_msg = f"与已选课程《{conflict['course_name']}》时间冲突（{slot}）"
+                            logger.warning(f"选课时间冲突: {conflict_msg}")
+                            return ENROLL_TIME_CONFLICT, conflict_msg
+                        return ENROLL_COURSE_NOT_FOUND, "课程不存在"
+                    if cursor.execute(_TAKE_SEAT_QUERY, (course_id,)) == 0:
+                        raise _CourseFull()
+                # 事务已提交，缓存中的已选人数同步更新
+                course_cache.invalidate('id', course_id)
+                course_catalogue.adjust_enrolled(course_id, 1)
+                return ENROLL_OK, "选课成功"
+            except _CourseFull:
+                return ENROLL_COURSE_FULL, "课程名额已满"
+            except pymysql.err.IntegrityError as e:
+                if e.args and e.args[0] == _DUPLICATE_ENTRY:
+                    return ENROLL_ALREADY_ENROLLED, "您已选过该课程"
+                logger.error(f"选课失败: {e}")
+                return ENROLL_ERROR, "选课失败，请稍后重试"
+            except pymysql.err.OperationalError as e:
+                if e.args and e.args[0] in _RETRYABLE_ERRORS and attempt < ENROLL_MAX_RETRIES:
+                    logger.warning(f"选课遇到锁冲突，第 {attempt} 次重试: {e}")
+                    time.sleep(0.05 * attempt)
+                    continue
+                logger.error(f"选课失败: {e}")
+                return ENROLL_ERROR, "选课失败，请稍后重试"
+            except Exception as e:
+                logger.error(f"选课失败: {e}")
+                return ENROLL_ERROR, "选课失败，请稍后重试"
+        return ENROLL_ERROR, "选课失败，请稍后重试"
+
     @staticmethod
     def unenroll(student_internal_id, course_id, semester=None):
         """退选课程"""
@@ -35,26 +151,60 @@ class Enrollment:
             else:
                 query = "DELETE FROM enrollments WHERE student_id = %s AND course_id = %s"
                 params = (student_internal_id, course_id)
-            result = db_manager.execute_update(query, params)
+            with db_manager.transaction() as cursor:
+                result = cursor.execute(query, params)
+                if result > 0:
+                    cursor.execute(
+                        "UPDATE courses SET enrolled_count = GREATEST(enrolled_count - %s, 0) WHERE id = %s",
+                        (result, course_id)
+                    )
+            if result > 0:
+                course_cache.invalidate('id', course_id)
+                course_catalogue.adjust_enrolled(course_id, -result)
             return result > 0
         except Exception as e:
             logger.error(f"退选失败: {e}")
             return False
 
+    @staticmethod
+    def course_ids_of_students(cursor, column, value):
+        """查询学生（按 students 表的 student_id 或 user_id 列匹配）已选课程的ID（在调用方事务内执行）"""
+        if column not in ('student_id', 'user_id'):
+            raise ValueError(f"不支持的学生匹配列: {column}")
+        cursor.execute(
+            "SELECT DISTINCT e.course_id FROM enrollments e JOIN students st ON e.student_id = st.id "
+            f"WHERE st.{column} = %s",
+            (value,)
+        )
+        return [row['course_id'] for row in cursor.fetchall()]
+
+    @staticmethod
+    def recount_courses(cursor, course_ids):
+        """按选课表重新计算指定课程的已选人数（级联删除选课记录后在同一事务内调用，提交后由调用方使课程缓存失效）"""
+        if not course_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(course_ids))
+        cursor.execute(
+            "UPDATE courses c SET c.enrolled_count = "
+            "(SELECT COUNT(*) FROM enrollments e WHERE e.course_id = c.id) "
+            f"WHERE c.id IN ({placeholders})",
+            tuple(course_ids)
+        )
+
     @staticmethod
     def get_students_by_course(course_id, semester=None):
         """根据课程获取已选该课的学生信息（返回 students 表记录）"""
         try:
             if semester:
                 query = (
-                    "SELECT st.* FROM enrollments e "
+                    f"SELECT {columns('course_student', 'st')} FROM enrollments e "
                     "JOIN students st ON e.student_id = st.id "
                     "WHERE e.course_id = %s AND e.semester = %s"
                 )
                 params = (course_id, semester)
             else:
                 query = (
-                    "SELECT st.* FROM enrollments e "
+                    f"SELECT {columns('course_student', 'st')} FROM enrollments e "
                     "JOIN students st ON e.student_id = st.id "
                     "WHERE e.course_id = %s"
                 )
@@ -82,19 +232,21 @@ class Enrollment:
 
     @staticmethod
     def get_courses_by_student(student_internal_id, semester=None):
-        """根据学生获取已选课程信息（返回 courses 表记录）"""
+        """根据学生获取已选课程信息（课程记录及授课教师姓名）"""
         try:
             if semester:
                 query = (
-                    "SELECT c.* FROM enrollments e "
+                    f"SELECT {columns('student_course', 'c')}, t.name AS teacher_name FROM enrollments e "
                     "JOIN courses c ON e.course_id = c.id "
+                    "LEFT JOIN teachers t ON c.teacher_id = t.id "
                     "WHERE e.student_id = %s AND e.semester = %s"
                 )
                 params = (student_internal_id, semester)
             else:
                 query = (
-                    "SELECT c.* FROM enrollments e "
+                    f"SELECT {columns('student_course', 'c')}, t.name AS teacher_name FROM enrollments e "
                     "JOIN courses c ON e.course_id = c.id "
+                    "LEFT JOIN teachers t ON c.teacher_id = t.id "
                     "WHERE e.student_id = %s"
                 )
                 params = (student_internal_id,)
@@ -108,146 +260,160 @@ class Enrollment:
         """
         检查课程时间冲突
         返回: (bool, str) - (是否冲突, 冲突信息)
+        
+        基于 course_sessions 结构化时段做一次区间重叠查询：同一星期且
+        start1 < end2 AND start2 < end1 即为冲突。未设置或无法解析上课时间的课程不算冲突。
         """
         try:
-            # 获取要选的课程的上课时间
-            query = "SELECT course_name, class_time FROM courses WHERE id = %s"
-            result = db_manager.execute_query(query, (course_id,))
-            
-            if not result or not result[0].get('class_time'):
-                # 如果课程不存在或没有设置上课时间，不算冲突
-                return False, ""
-            
-            target_course = result[0]
-            target_time = target_course['class_time']
-            
-            # 解析上课时间（格式：周X HH:MM-HH:MM）
-            target_day, target_period = Enrollment._parse_time(target_time)
-            if not target_day:
-                # 无法解析时间，不算冲突
-                return False, ""
-            
-            # 获取学生在该学期已选的所有课程
-            enrolled_courses = Enrollment.get_courses_by_student(student_internal_id, semester)
-            
-            if not enrolled_courses:
+            result = db_manager.execute_query(_CONFLICT_QUERY, (student_internal_id, semester, course_id))
+            if not result:
                 return False, ""
             
-            # 检查时间冲突
-            for course in enrolled_courses:
-                if not course.get('class_time'):
-                    continue
-                
-                enrolled_day, enrolled_period = Enrollment._parse_time(course['class_time'])
-                if not enrolled_day:
-                    continue
-                
-                # 检查是否同一天
-                if enrolled_day == target_day:
-                    # 检查时间段是否重叠
-                    if Enrollment._time_overlap(target_period, enrolled_period):
-                        conflict_msg = f"与已选课程《{course['course_name']}》时间冲突（{course['class_time']}）"
-                        logger.warning(f"选课时间冲突: {conflict_msg}")
-                        return True, conflict_msg
-            
-            return False, ""
+            conflict = result[0]
+            slot = format_session(conflict['weekday'], conflict['start_minute'], conflict['end_minute'])
+            conflict_msg = f"与已选课程《{conflict['course_name']}》时间冲突（{slot}）"
+            logger.warning(f"选课时间冲突: {conflict_msg}")
+            return True, conflict_msg
             
         except Exception as e:
             logger.error(f"检查时间冲突失败: {e}")
             return False, ""
     
     @staticmethod
-    def _parse_time(time_str):
-        """
-        解析上课时间字符串
-        输入格式: "周一 10:00-11:40" 或 "周一 08:00-09:40"
-        返回: (day, (start_time, end_time)) 或 (None, None)
-        """
-        try:
-            if not time_str:
-                return None, None
-            
-            # 分割日期和时间
-            parts = time_str.strip().split()
-            if len(parts) < 2:
-                return None, None
-            
-            day = parts[0]  # 周几
-            time_range = parts[1]  # 时间段
-            
-            # 解析时间段
-            if '-' not in time_range:
-                return None, None
-            
-            start_str, end_str = time_range.split('-')
-            
-            # 将时间转换为分钟数（方便比较）
-            start_minutes = Enrollment._time_to_minutes(start_str)
-            end_minutes = Enrollment._time_to_minutes(end_str)
-            
-            if start_minutes is None or end_minutes is None:
-                return None, None
-            
-            return day, (start_minutes, end_minutes)
-            
-        except Exception as e:
-            logger.error(f"解析时间失败: {e}")
-            return None, None
-    
+    def validate_filters(weekday=None, start_minute=None, end_minute=None, offset=0, limit=None):
+        """校验可选课程的筛选与分页参数，不合法时返回错误信息，合法时返回 None"""
+        checks = (
+            (weekday, 1, 7, '上课星期应为 1-7'),
+            (start_minute, 0, 24 * 60, '开始时间应为 0-1440 之间的分钟数'),
+            (end_minute, 0, 24 * 60, '结束时间应为 0-1440 之间的分钟数'),
+            (offset, 0, None, '分页起点应为非负整数'),
+            (limit, 1, None, '每页数量应为正整数')
+        )
+        for value, low, high, message in checks:
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                return message
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return message
+            if value < low or (high is not None and value > high):
+                return message
+        if weekday is None and (start_minute is not None or end_minute is not None):
+            return '按上课时间筛选时请指定星期'
+        return None
+
     @staticmethod
-    def _time_to_minutes(time_str):
-        """将时间字符串转换为分钟数（从0:00开始计算）"""
+    def _page_bounds(offset, limit):
+        """规范化分页参数，返回 (offset, limit)；未指定 limit 时返回 None 表示不分页，指定时不超过单页上限"""
         try:
-            hour, minute = map(int, time_str.split(':'))
-            return hour * 60 + minute
-        except:
-            return None
-    
+            offset = max(int(offset or 0), 0)
+        except (TypeError, ValueError):
+            offset = 0
+        if not limit:
+            return offset, None
+        try:
+            limit = min(int(limit), CATALOGUE_CONFIG['max_page_size'])
+        except (TypeError, ValueError):
+            limit = CATALOGUE_CONFIG['max_page_size']
+        return offset, max(limit, 0)
+
     @staticmethod
-    def _time_overlap(period1, period2):
-        """
-        检查两个时间段是否重叠
-        period1, period2: (start_minutes, end_minutes)
-        """
-        start1, end1 = period1
-        start2, end2 = period2
-        
-        # 时间段重叠的条件：
-        # period1的开始时间在period2范围内，或
-        # period2的开始时间在period1范围内
-        return (start1 < end2 and start2 < end1)
-    
+    def _time_window(weekday, start_minute, end_minute):
+        """规范化时间段筛选条件，返回 (星期, 开始分钟, 结束分钟)；未指定星期时返回 None"""
+        if weekday is None:
+            return None
+        return (int(weekday),
+                int(start_minute) if start_minute is not None else 0,
+                int(end_minute) if end_minute is not None else 24 * 60)
+
     @staticmethod
-    def get_available_courses(student_internal_id, semester):
+    def get_available_courses(student_internal_id, semester, department=None, weekday=None,
+                              start_minute=None, end_minute=None, offset=0, limit=None):
         """
         获取学生可选的课程列表（排除已选课程）
+        
+        可按开课教师所在院系、上课星期及时间段（与 [start_minute, end_minute) 重叠）筛选，
+        结果按课程ID排序，指定 limit 时分页，否则返回全部。启用目录缓存时，学期目录由所有学生共享，
+        每次只查询该学生已选课程的ID集合；否则使用 NOT EXISTS 反连接直接查询。
         """
         try:
-            # 获取所有该学期的课程
-            query = """
-                SELECT c.*, t.name as teacher_name
-                FROM courses c
-                LEFT JOIN teachers t ON c.teacher_id = t.id
-                WHERE c.semester = %s
-            """
-            all_courses = db_manager.execute_query(query, (semester,))
+            offset, limit = Enrollment._page_bounds(offset, limit)
+            window = Enrollment._time_window(weekday, start_minute, end_minute)
+            if not CATALOGUE_CONFIG.get('enabled', True):
+                return Enrollment.query_available_courses(
+                    student_internal_id, semester, department, weekday, start_minute, end_minute, offset, limit
+                )
             
-            if not all_courses:
+            catalogue = course_catalogue.get(semester)
+            if catalogue is None:
                 return []
+            courses, sessions = catalogue
             
-            # 获取学生已选课程的ID列表
-            enrolled_query = """
-                SELECT course_id 
-                FROM enrollments 
-                WHERE student_id = %s AND semester = %s
-            """
+            enrolled_query = "SELECT course_id FROM enrollments WHERE student_id = %s AND semester = %s"
             enrolled = db_manager.execute_query(enrolled_query, (student_internal_id, semester))
             enrolled_ids = {e['course_id'] for e in enrolled} if enrolled else set()
             
-            # 过滤掉已选课程
-            available_courses = [c for c in all_courses if c['id'] not in enrolled_ids]
+            def matches(course):
+                if course['id'] in enrolled_ids:
+                    return False
+                if department and course.get('department') != department:
+                    return False
+                if window:
+                    return any(day == window[0] and start < window[2] and window[1] < end
+                               for day, start, end in sessions.get(course['id'], ()))
+                return True
+            
+            available = [c for c in courses if matches(c)]
+            end = offset + limit if limit is not None else None
+            # 目录记录为共享缓存，返回副本
+            return [dict(c) for c in available[offset:end]]
+            
+        except Exception as e:
+            logger.error(f"获取可选课程失败: {e}")
+            return []
+
+    @staticmethod
+    def query_available_courses(student_internal_id, semester, department=None, weekday=None,
+                                start_minute=None, end_minute=None, offset=0, limit=None):
+        """使用 NOT EXISTS 反连接查询可选课程（不经过目录缓存），参数同 get_available_courses"""
+        try:
+            offset, limit = Enrollment._page_bounds(offset, limit)
+            conditions = [
+                "c.semester = %s",
+                "NOT EXISTS (SELECT 1 FROM enrollments e "
+                "WHERE e.student_id = %s AND e.course_id = c.id AND e.semester = %s)"
+            ]
+            params = [semester, student_internal_id, semester]
+            
+            if department:
+                conditions.append("t.department = %s")
+                params.append(department)
             
-            return available_courses
+            window = Enrollment._time_window(weekday, start_minute, end_minute)
+            if window:
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM course_sessions cs WHERE cs.course_id = c.id "
+                    "AND cs.weekday = %s AND cs.start_minute < %s AND %s < cs.end_minute)"
+                )
+                params.extend([window[0], window[2], window[1]])
+            
+            query = f"""
+                SELECT {columns('course', 'c')}, t.name AS teacher_name, t.department AS department
+                FROM courses c
+                LEFT JOIN teachers t ON c.teacher_id = t.id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY c.id
+            """
+            if limit is not None:
+                query += " LIMIT %s OFFSET %s"
+                params.extend([limit, offset])
+            elif offset:
+                # MySQL 的 OFFSET 必须配合 LIMIT 使用，不分页时取最大值
+                query += " LIMIT 18446744073709551615 OFFSET %s"
+                params.append(offset)
+            return db_manager.execute_query(query, tuple(params)) or []
             
         except Exception as e:
             logger.error(f"获取可选课程失败: {e}")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""选课引擎，选课高峰期的准入控制
+
+每门课程在内存中维护名额计数（数据库中的 enrolled_count 为权威值）：
+已满的课程在 O(1) 时间内直接拒绝，不访问数据库；未满的请求先预占一个名额，
+再进入有界队列，由工作线程调用 Enrollment.try_enroll 写库。队列已满时立即返回繁忙，
+避免选课开放瞬间大量请求同时争抢课程行锁。
+"""
+
+import queue
+import threading
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from database.db_manager import db_manager
+from config.config import ENROLLMENT_CONFIG
+from .enrollment import (
+    Enrollment, ENROLL_OK, ENROLL_COURSE_FULL, ENROLL_COURSE_NOT_FOUND, ENROLL_BUSY, ENROLL_ERROR
+)
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('enrollment_engine')
+
+
+class SeatCounter:
+    """单门课程的名额计数：taken = 数据库已选人数 + 正在写库的预占名额"""
+
+    def __init__(self, capacity, taken):
+        """初始化计数"""
+        self.capacity = capacity
+        self.taken = taken
+
+    def try_reserve(self):
+        """预占一个名额，已满返回 False（调用方需持有锁）"""
+        if self.capacity is not None and self.taken >= self.capacity:
+            return False
+        self.taken += 1
+        return True
+
+    def release(self):
+        """释放一个名额（调用方需持有锁）"""
+        if self.taken > 0:
+            self.taken -= 1
+
+
+class EnrollmentEngine:
+    """选课引擎"""
+
+    def __init__(self, queue_size=None, workers=None, timeout=None):
+        """初始化引擎
+
+        Args:
+            queue_size: 等待写库的请求上限
+            workers: 写库工作线程数
+            timeout: 单个请求等待结果的最长时间（秒）
+        """
+        self.queue_size = queue_size or ENROLLMENT_CONFIG['queue_size']
+        self.workers = workers or ENROLLMENT_CONFIG['workers']
+        self.timeout = timeout or ENROLLMENT_CONFIG['timeout']
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._seats = {}  # 课程ID -> SeatCounter
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stats = {'submitted': 0, 'enrolled': 0, 'rejected_full': 0, 'rejected_busy': 0, 'failed': 0}
+
+    def start(self):
+        """启动工作线程（重复调用无副作用）"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'enrollment-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"选课引擎已启动，工作线程 {self.workers} 个，队列上限 {self.queue_size}")
+
+    def _counter(self, course_id):
+        """获取课程名额计数，首次访问时从数据库加载；课程不存在返回 None"""
+        with self._lock:
+            counter = self._seats.get(course_id)
+        if counter is not None:
+            return counter
+        result = db_manager.execute_query(
+            "SELECT capacity, enrolled_count FROM courses WHERE id = %s", (course_id,)
+        )
+        if not result:
+            return None
+        with self._lock:
+            # 并发加载时以先放入的为准
+            return self._seats.setdefault(course_id, SeatCounter(result[0]['capacity'], result[0]['enrolled_count']))
+
+    def submit(self, student_internal_id, course_id, semester):
+        """提交选课请求，返回 Future，结果为 (status, message)"""
+        self.start()
+        future = Future()
+        with self._lock:
+            self._stats['submitted'] += 1
+        try:
+            course_id = int(course_id)
+        except (TypeError, ValueError):
+            future.set_result((ENROLL_COURSE_NOT_FOUND, "课程不存在"))
+            return future
+
+        counter = self._counter(course_id)
+        if counter is None:
+            future.set_result((ENROLL_COURSE_NOT_FOUND, "课程不存在"))
+            return future
+
+        with self._lock:
+            reserved = counter.try_reserve()
+            if not reserved:
+                self._stats['rejected_full'] += 1
+        if not reserved:
+            future.set_result((ENROLL_COURSE_FULL, "课程名额已满"))
+            return future
+
+        try:
+            self._queue.put_nowait((future, counter, student_internal_id, course_id, semester))
+        except queue.Full:
+            with self._lock:
+                counter.release()
+                self._stats['rejected_busy'] += 1
+            future.set_result((ENROLL_BUSY, "选课人数过多，请稍后重试"))
+        return future
+
+    def enroll(self, student_internal_id, course_id, semester):
+        """提交选课请求并等待结果，返回 (status, message)"""
+        future = self.submit(student_internal_id, course_id, semester)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            return ENROLL_BUSY, "选课请求正在处理，请稍后刷新查看结果"
+
+    def unenroll(self, student_internal_id, course_id, semester=None):
+        """退课并释放名额"""
+        success = Enrollment.unenroll(student_internal_id, course_id, semester)
+        if success:
+            try:
+                course_id = int(course_id)
+            except (TypeError, ValueError):
+                return success
+            with self._lock:
+                counter = self._seats.get(course_id)
+                if counter is not None:
+                    counter.release()
+        return success
+
+    def _worker(self):
+        """工作线程：依次写库并结算预占名额"""
+        while True:
+            future, counter, student_internal_id, course_id, semester = self._queue.get()
+            try:
+                status, message = Enrollment.try_enroll(student_internal_id, course_id, semester)
+            except Exception as e:
+                logger.error(f"选课请求处理失败: {e}")
+                status, message = ENROLL_ERROR, "选课失败，请稍后重试"
+            with self._lock:
+                if status == ENROLL_OK:
+                    self._stats['enrolled'] += 1
+                else:
+                    # 预占的名额未被使用
+                    counter.release()
+                    self._stats['failed'] += 1
+                    if status == ENROLL_COURSE_FULL and self._seats.get(course_id) is counter:
+                        # 内存计数落后于数据库（如管理员录入成绩时补登选课），下次访问时重新加载
+                        del self._seats[course_id]
+            future.set_result((status, message))
+            self._queue.task_done()
+
+    def invalidate(self, course_id=None):
+        """丢弃课程名额计数（容量修改、课程删除后调用），不指定课程时清空全部"""
+        with self._lock:
+            if course_id is None:
+                self._seats.clear()
+                return
+            try:
+                self._seats.pop(int(course_id), None)
+            except (TypeError, ValueError):
+                pass
+
+    def stats(self):
+        """返回引擎统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queued'] = self._queue.qsize()
+            stats['courses'] = len(self._seats)
+        return stats
+
+
+# 创建全局选课引擎实例
+enrollment_engine = EnrollmentEngine()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""批量开户模型，新生/新教师入职时一次性创建登录账号及学生/教师档案"""
+
+import secrets
+import logging
+from database.db_manager import db_manager
+from database.entity_cache import student_cache, teacher_cache
+from database.search_index import search_index
+from config.config import PROVISION_CONFIG
+from utils.passwords import password_hasher, PasswordHasherBusy
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('provisioning_model')
+
+# 各角色的档案表、编号列和可导入的档案字段（行字段名 -> 表列名）
+PROFILE_TABLES = {
+    'student': {
+        'table': 'students',
+        'number': 'student_id',
+        'fields': {'gender': 'gender', 'birth': 'birth', 'class': 'class', 'major': 'major'},
+        'cache': student_cache
+    },
+    'teacher': {
+        'table': 'teachers',
+        'number': 'teacher_id',
+        'fields': {'gender': 'gender', 'title': 'title', 'department': 'department'},
+        'cache': teacher_cache
+    }
+}
+
+
+class Provisioning:
+    """批量开户类"""
+
+    @staticmethod
+    def _text(value):
+        """单元格文本，空值返回 None"""
+        if value is None:
+            return None
+        value = str(value).strip()
+        return value or None
+
+    @staticmethod
+    def _select_existing(column, table, values):
+        """分块查询已存在的值，返回集合；查询失败返回 None"""
+        existing = set()
+        values = sorted(values)
+        chunk_size = PROVISION_CONFIG['chunk_size']
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            result = db_manager.execute_query(
+                f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})", tuple(chunk)
+            )
+            if result is None:
+                return None
+            existing.update(row[column] for row in result)
+        return existing
+
+    @staticmethod
+    def bulk_provision(role, rows):
+        """批量创建账号及档案
+
+        Args:
+            role: 'student' 或 'teacher'
+            rows: [{'number': 学号/教师编号, 'name': 姓名, 'username': 用户名（默认为编号）,
+                    'password': 初始密码（为空时自动生成）, 以及 PROFILE_TABLES 中的档案字段}, ...]
+
+        用户名和编号的查重各用一次批量查询完成；密码在哈希进程池中并行计算；
+        每块账号在一个事务内用多行 INSERT 写入 users 和档案表，某块失败只影响该块。
+
+        Returns:
+            与 rows 一一对应的结果列表 [{'row', 'number', 'username', 'success', 'message',
+            'initial_password'（仅自动生成密码时）}, ...]
+        """
+        results = [{'row': i, 'number': None, 'username': None, 'success': False, 'message': ''}
+                   for i in range(len(rows))]
+        spec = PROFILE_TABLES.get(role)
+        if spec is None:
+            for result in results:
+                result['message'] = '不支持的角色'
+            return results
+        if len(rows) > PROVISION_CONFIG['max_rows']:
+            for result in results:
+                result['message'] = f"单次最多开户 {PROVISION_CONFIG['max_rows']} 行"
+            return results
+
+        # 逐行校验，并检查文件内部的重复
+        valid = []  # (行号, 用户名, 密码, 姓名, 编号, 档案字段)
+        seen_usernames = set()
+        seen_numbers = set()
+        for i, row in enumerate(rows):
+            row = row if isinstance(row, dict) else {}
+            number = Provisioning._text(row.get('number'))
+            name = Provisioning._text(row.get('name'))
+            username = Provisioning._text(row.get('username')) or number
+            password = Provisioning._text(row.get('password'))
+            results[i].update(number=number, username=username)
+            if not number or not name:
+                results[i]['message'] = '编号和姓名不能为空'
+            elif password and len(password) < PROVISION_CONFIG['min_password_length']:
+                results[i]['message'] = f"密码长度不得小于{PROVISION_CONFIG['min_password_length']}位"
+            elif username in seen_usernames:
+                results[i]['message'] = '用户名在文件中重复'
+            elif number in seen_numbers:
+                results[i]['message'] = '编号在文件中重复'
+            else:
+                seen_usernames.add(username)
+                seen_numbers.add(number)
+                if not password:
+                    password = secrets.token_urlsafe(6)
+                    results[i]['initial_password'] = password
+                profile = {column: Provisioning._text(row.get(field)) for field, column in spec['fields'].items()}
+                valid.append((i, username, password, name, number, profile))
+        if not valid:
+            return results
+
+        # 批量查重
+        existing_usernames = Provisioning._select_existing('username', 'users', seen_usernames)
+        existing_numbers = Provisioning._select_existing(spec['number'], spec['table'], seen_numbers)
+        if existing_usernames is None or existing_numbers is None:
+            for item in valid:
+                results[item[0]]['message'] = '查询已有账号失败'
+            return results
+        pending = []
+        for item in valid:
+            if item[1] in existing_usernames:
+                results[item[0]]['message'] = '用户名已存在'
+            elif item[4] in existing_numbers:
+                results[item[0]]['message'] = '编号已存在'
+            else:
+                pending.append(item)
+        if not pending:
+            return results
+
+        # 并行计算密码哈希
+        try:
+            hashes = password_hasher.hash_many([item[2] for item in pending])
+        except PasswordHasherBusy:
+            for item in pending:
+                results[item[0]]['message'] = '服务器繁忙，请稍后重试'
+            return results
+
+        profile_columns = ['user_id', spec['number'], 'name'] + list(spec['fields'].values())
+        chunk_size = PROVISION_CONFIG['chunk_size']
+        created = 0
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            chunk_hashes = hashes[start:start + chunk_size]
+            usernames = [item[1] for item in chunk]
+            try:
+                with db_manager.transaction() as cursor:
+                    cursor.execute(
+                        "INSERT INTO users (username, password, role, name) VALUES "
+                        + ', '.join(['(%s, %s, %s, %s)'] * len(chunk)),
+                        tuple(value for item, hashed in zip(chunk, chunk_hashes)
+                              for value in (item[1], hashed, role, item[3]))
+                    )
+                    # 多行插入的自增ID不保证连续，按用户名取回
+                    cursor.execute(
+                        f"SELECT id, username FROM users WHERE username IN ({', '.join(['%s'] * len(usernames))})",
+                        tuple(usernames)
+                    )
+                    user_ids = {row['username']: row['id'] for row in cursor.fetchall()}
+                    cursor.execute(
+                        f"INSERT INTO {spec['table']} ({', '.join('`%s`' % column for column in profile_columns)}) VALUES "
+                        + ', '.join(['(' + ', '.join(['%s'] * len(profile_columns)) + ')'] * len(chunk)),
+                        tuple(value for item in chunk
+                              for value in [user_ids[item[1]], item[4], item[3]] + list(item[5].values()))
+                    )
+            except Exception as e:
+                # 块内任意一行冲突（如并发开户）整块回滚
+                logger.error(f"批量开户写入失败: {e}")
+                for item in chunk:
+                    results[item[0]]['message'] = '写入失败，本批次已回滚'
+                    results[item[0]].pop('initial_password', None)
+                continue
+            for item in chunk:
+                results[item[0]]['success'] = True
+                results[item[0]]['message'] = '开户成功'
+                spec['cache'].invalidate(spec['number'], item[4])
+            created += len(chunk)
+
+        if created:
+            search_index.invalidate('users')
+            search_index.invalidate(spec['table'])
+            logger.info(f"批量开户完成: 角色 {role}，成功 {created} 个，失败 {len(rows) - created} 个")
+        for result in results:
+            if not result['success']:
+                result.pop('initial_password', None)
+        return results
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""课程成绩统计缓存模块，按 (课程, 学期) 增量维护成绩统计"""
+
+import bisect
+import math
+import time
+import threading
+import logging
+from collections import OrderedDict
+from config.config import SCORE_STATS_CACHE_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('score_statistics')
+
+# 成绩分数段：名称按分数从低到高排列，SCORE_BAND_EDGES 为各段下限（不含最低段）
+SCORE_BANDS = ['fail', 'pass', 'medium', 'good', 'excellent']
+SCORE_BAND_EDGES = [60, 70, 80, 90]
+
+
+def _normalize_score(score):
+    """统一成绩精度：数据库 FLOAT 为单精度，读回的值需与写入值对齐"""
+    return round(float(score), 2)
+
+
+class CourseStatsAccumulator:
+    """单个 (课程, 学期) 的成绩统计累加器
+
+    维护计数、和、平方和、各分数段人数，以及有序成绩列表（用于中位数、最值）。
+    """
+
+    def __init__(self, scores=()):
+        """初始化累加器"""
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.band_counts = [0] * len(SCORE_BANDS)
+        self._sorted = []
+        for score in scores:
+            self.add(score)
+
+    def add(self, score):
+        """加入一个成绩"""
+        score = _normalize_score(score)
+        bisect.insort(self._sorted, score)
+        self.count += 1
+        self.total += score
+        self.total_sq += score * score
+        self.band_counts[bisect.bisect_right(SCORE_BAND_EDGES, score)] += 1
+
+    def remove(self, score):
+        """移除一个成绩，成绩不存在时返回 False"""
+        score = _normalize_score(score)
+        i = bisect.bisect_left(self._sorted, score)
+        if i >= len(self._sorted) or self._sorted[i] != score:
+            return False
+        del self._sorted[i]
+        self.count -= 1
+        self.total -= score
+        self.total_sq -= score * score
+        self.band_counts[bisect.bisect_right(SCORE_BAND_EDGES, score)] -= 1
+        return True
+
+    def snapshot(self):
+        """返回统计结果，格式与 Score.get_score_statistics 一致；无成绩时返回 None"""
+        if self.count == 0:
+            return None
+        n = self.count
+        mean = self.total / n
+        variance = max(self.total_sq / n - mean * mean, 0.0)
+        median = (self._sorted[(n - 1) // 2] + self._sorted[n // 2]) / 2
+        stats = {
+            'count': n,
+            'average': round(mean, 2),
+            'median': round(median, 2),
+            'max': round(self._sorted[-1], 2),
+            'min': round(self._sorted[0], 2),
+            'std': round(math.sqrt(variance), 2)
+        }
+        stats.update(zip(SCORE_BANDS, self.band_counts))
+        return stats
+
+
+class ScoreStatisticsCache:
+    """课程成绩统计缓存
+
+    首次读取某 (课程, 学期) 时从数据库加载；成绩写入时增量更新；
+    每隔 verify_interval 秒在读取时与全量重算结果对账，发现偏差则以重算结果为准。
+
+    写入方在事务开始前调用 begin_write() 取得写入序号，提交后连同序号调用 on_add 等方法；
+    缓存项记录加载时的序号，在写入开始之后才加载的缓存项可能已包含该写入，不再增量更新而是丢弃。
+    """
+
+    def __init__(self, loader, max_entries=None, verify_interval=None):
+        """初始化缓存
+
+        Args:
+            loader: 函数 (course_id, semester) -> 成绩列表，失败返回 None
+            max_entries: 最多缓存的 (课程, 学期) 数
+            verify_interval: 对账间隔（秒）
+        """
+        self.loader = loader
+        self.max_entries = max_entries or SCORE_STATS_CACHE_CONFIG['max_entries']
+        self.verify_interval = verify_interval or SCORE_STATS_CACHE_CONFIG['verify_interval']
+        self._entries = OrderedDict()  # (course_id, semester) -> [累加器, 上次对账时间, 加载时的写入序号]
+        self._lock = threading.RLock()
+        self._sequence = 0  # 写入序号，每次 begin_write() 递增
+        self.drift_count = 0
+
+    @staticmethod
+    def _key(course_id, semester):
+        """统一缓存键类型"""
+        return int(course_id), str(semester)
+
+    def _load(self, key):
+        """从数据库全量加载一个 (课程, 学期) 的成绩"""
+        scores = self.loader(*key)
+        if scores is None:
+            return None
+        return CourseStatsAccumulator(scores)
+
+    def get(self, course_id, semester):
+        """获取统计结果"""
+        key = self._key(course_id, semester)
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is None:
+                accumulator = self._load(key)
+                if accumulator is None:
+                    return None
+                entry = [accumulator, now, self._sequence]
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            elif now - entry[1] >= self.verify_interval:
+                self._verify_locked(key, entry, now)
+            self._entries.move_to_end(key)
+            return entry[0].snapshot()
+
+    def _verify_locked(self, key, entry, now):
+        """与全量重算结果对账（调用方需持有锁）"""
+        fresh = self._load(key)
+        if fresh is None:
+            return
+        if fresh.snapshot() != entry[0].snapshot():
+            self.drift_count += 1
+            logger.warning(f"课程 {key[0]} 学期 {key[1]} 的统计缓存与重算结果不一致，已修正")
+            entry[0] = fresh
+            entry[2] = self._sequence
+        entry[1] = now
+
+    def begin_write(self):
+        """成绩写入事务开始前调用，返回写入序号"""
+        with self._lock:
+            self._sequence += 1
+            return self._sequence
+
+    def on_add(self, course_id, semester, score, since=None):
+        """成绩新增后更新缓存，since 为写入前 begin_write() 的返回值"""
+        self._apply(course_id, semester, None, score, since)
+
+    def on_remove(self, course_id, semester, score, since=None):
+        """成绩删除后更新缓存"""
+        self._apply(course_id, semester, score, None, since)
+
+    def on_update(self, course_id, semester, old_score, new_score, since=None):
+        """成绩修改后更新缓存"""
+        self._apply(course_id, semester, old_score, new_score, since)
+
+    def _apply(self, course_id, semester, old_score, new_score, since=None):
+        """增量更新，未缓存的 (课程, 学期) 直接忽略"""
+        try:
+            key = self._key(course_id, semester)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            if since is not None and entry[2] >= since:
+                # 缓存项在写入开始后才加载，可能已包含本次写入，丢弃后下次读取时重新加载
+                del self._entries[key]
+                return
+            if old_score is not None and not entry[0].remove(old_score):
+                # 找不到旧成绩说明缓存已偏离，丢弃后下次读取时重新加载
+                del self._entries[key]
+                return
+            if new_score is not None:
+                entry[0].add(new_score)
+
+    def invalidate(self, course_id=None, semester=None):
+        """使缓存失效：不指定课程时清空全部"""
+        with self._lock:
+            if course_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == int(course_id) and (semester is None or k[1] == str(semester))]:
+                del self._entries[key]
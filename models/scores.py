@@ -4,15 +4,49 @@
 """成绩模型，处理成绩相关的业务逻辑"""
 
 from database.db_manager import db_manager
+from database.projections import columns
 import logging
 import numpy as np
 from datetime import datetime
+from config.config import SCORE_IMPORT_CONFIG
+from database.entity_cache import course_cache
+from database.course_catalogue import course_catalogue
 from .enrollment import Enrollment
+from .enrollment_engine import enrollment_engine
+from .score_statistics import SCORE_BANDS, SCORE_BAND_EDGES, ScoreStatisticsCache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('score_model')
 
+# 百分制成绩到绩点的映射（4.0分制），按分数线从高到低排列，低于最低分数线记 0 分。
+# 绩点计算统一使用由这张表生成的 SQL CASE 表达式。
+GRADE_POINT_SCALE = [
+    (90, 4.0),
+    (85, 3.7),
+    (80, 3.3),
+    (75, 3.0),
+    (70, 2.7),
+    (65, 2.3),
+    (60, 2.0)
+]
+
+
+def grade_point_sql(column):
+    """生成把分数列换算为绩点的 SQL CASE 表达式"""
+    whens = ' '.join(f"WHEN {column} >= {threshold} THEN {point}" for threshold, point in GRADE_POINT_SCALE)
+    return f"(CASE {whens} ELSE 0.0 END)"
+
+
+# 及格分数线（获得学分的最低分）
+PASSING_SCORE = GRADE_POINT_SCALE[-1][0]
+
+# 学业汇总表中表示“累计（全部学期）”的学期值
+CUMULATIVE_SEMESTER = 'ALL'
+
+# 批量统计结果表的列
+STATISTICS_COLUMNS = ['course_id', 'count', 'average', 'median', 'std', 'min', 'max'] + SCORE_BANDS
+
 
 class Score:
     """成绩类，封装成绩相关的业务逻辑"""
@@ -22,7 +56,7 @@ class Score:
         """添加成绩信息"""
         try:
             # 检查成绩是否已存在
-            query = "SELECT * FROM scores WHERE student_id = %s AND course_id = %s AND semester = %s"
+            query = "SELECT id FROM scores WHERE student_id = %s AND course_id = %s AND semester = %s"
             result = db_manager.execute_query(query, (student_id, course_id, semester))
             
             if result and len(result) > 0:
@@ -33,11 +67,16 @@ class Score:
             if not exam_time:
                 exam_time = datetime.now().strftime('%Y-%m-%d')
             
-            # 插入成绩信息
+            # 插入成绩信息，并在同一事务中更新学业汇总
             query = "INSERT INTO scores (student_id, course_id, score, semester, exam_time) VALUES (%s, %s, %s, %s, %s)"
-            result = db_manager.execute_update(query, (student_id, course_id, score, semester, exam_time))
+            since = score_stats_cache.begin_write()
+            with db_manager.transaction() as cursor:
+                result = cursor.execute(query, (student_id, course_id, score, semester, exam_time))
+                if result > 0:
+                    Score._refresh_academic_summary(cursor, [student_id])
             
             if result > 0:
+                score_stats_cache.on_add(course_id, semester, score, since)
                 # 确保存在选课记录，以便学生管理界面展示
                 try:
                     Enrollment.enroll(student_id, course_id, semester)
@@ -52,6 +91,18 @@ class Score:
             logger.error(f"添加成绩信息失败: {e}")
             return False
     
+    @staticmethod
+    def course_ids_of_students(cursor, column, value):
+        """查询学生（按 students 表的 student_id 或 user_id 列匹配）有成绩的课程ID（在调用方事务内执行）"""
+        if column not in ('student_id', 'user_id'):
+            raise ValueError(f"不支持的学生匹配列: {column}")
+        cursor.execute(
+            "SELECT DISTINCT sc.course_id FROM scores sc JOIN students st ON sc.student_id = st.id "
+            f"WHERE st.{column} = %s",
+            (value,)
+        )
+        return [row['course_id'] for row in cursor.fetchall()]
+    
     @staticmethod
     def update_score(student_id, course_id, semester, score=None, exam_time=None):
         """更新成绩信息"""
@@ -76,9 +127,21 @@ class Score:
             
             # 执行更新
             query = f"UPDATE scores SET {', '.join(updates)} WHERE student_id = %s AND course_id = %s AND semester = %s"
-            result = db_manager.execute_update(query, tuple(params))
+            since = score_stats_cache.begin_write()
+            with db_manager.transaction() as cursor:
+                # 锁定并读取旧成绩，用于增量更新统计缓存
+                cursor.execute(
+                    "SELECT score FROM scores WHERE student_id = %s AND course_id = %s AND semester = %s FOR UPDATE",
+                    (student_id, course_id, semester)
+                )
+                old_row = cursor.fetchone()
+                result = cursor.execute(query, tuple(params))
+                if result > 0:
+                    Score._refresh_academic_summary(cursor, [student_id])
             
             if result > 0:
+                if score is not None and old_row:
+                    score_stats_cache.on_update(course_id, semester, old_row['score'], score, since)
                 logger.info(f"成绩更新成功")
                 return True
             else:
@@ -92,7 +155,7 @@ class Score:
     def get_score_by_id(score_id):
         """根据成绩记录ID获取成绩信息"""
         try:
-            query = "SELECT * FROM scores WHERE id = %s"
+            query = f"SELECT {columns('score')} FROM scores WHERE id = %s"
             result = db_manager.execute_query(query, (score_id,))
             if result and len(result) > 0:
                 return result[0]
@@ -133,8 +196,16 @@ class Score:
                 return False
             
             logger.info(f"找到成绩记录: {existing_score}")
-            result = db_manager.execute_update(query, tuple(params))
+            since = score_stats_cache.begin_write()
+            with db_manager.transaction() as cursor:
+                result = cursor.execute(query, tuple(params))
+                if result > 0:
+                    Score._refresh_academic_summary(cursor, [existing_score['student_id']])
             logger.info(f"执行结果 - 影响行数: {result}")
+            if result > 0 and score is not None:
+                score_stats_cache.on_update(
+                    existing_score['course_id'], existing_score['semester'], existing_score['score'], score, since
+                )
 
             # MySQL在值没有变化时会返回0影响行数，但这并不意味着更新失败
             # 所以我们需要判断是否真的失败了
@@ -161,14 +232,151 @@ class Score:
             logger.error(f"按ID更新成绩失败: {e}")
             return False
     
+    @staticmethod
+    def bulk_upsert_scores(rows, allowed_course_ids=None):
+        """批量写入成绩（存在则更新，不存在则插入）
+        
+        Args:
+            rows: [{'student_no': 学号, 'course_id': 课程ID, 'semester': 学期, 'score': 成绩,
+                    'exam_time': 考试日期（可选）}, ...]
+            allowed_course_ids: 允许写入的课程ID集合，None 表示不限制（管理员）
+        
+        学号在一次查询中解析为内部ID；有效行在一个事务内按块执行
+        INSERT ... ON DUPLICATE KEY UPDATE，同时补登选课记录并更新学业汇总。
+        
+        Returns:
+            与 rows 一一对应的结果列表 [{'row': 序号, 'student_no', 'success', 'message'}, ...]
+        """
+        results = [{'row': i, 'student_no': (row or {}).get('student_no'), 'success': False, 'message': ''}
+                   for i, row in enumerate(rows)]
+        if len(rows) > SCORE_IMPORT_CONFIG['max_rows']:
+            for result in results:
+                result['message'] = f"单次最多导入 {SCORE_IMPORT_CONFIG['max_rows']} 行"
+            return results
+        
+        # 逐行校验格式与课程权限
+        valid = []  # (行号, 学号, 课程ID, 学期, 成绩, 考试日期)
+        today = datetime.now().strftime('%Y-%m-%d')
+        for i, row in enumerate(rows):
+            try:
+                student_no = str(row['student_no']).strip()
+                course_id = int(row['course_id'])
+                semester = str(row['semester']).strip()
+                score = float(row['score'])
+            except (KeyError, TypeError, ValueError, AttributeError):
+                results[i]['message'] = '学号、课程、学期或成绩格式无效'
+                continue
+            if not student_no or not semester:
+                results[i]['message'] = '学号和学期不能为空'
+            elif not 0 <= score <= 100:
+                results[i]['message'] = '成绩必须在0-100之间'
+            elif allowed_course_ids is not None and course_id not in allowed_course_ids:
+                results[i]['message'] = '权限不足，无法录入该课程成绩'
+            else:
+                valid.append((i, student_no, course_id, semester, score, row.get('exam_time') or today))
+        if not valid:
+            return results
+        
+        # 一次查询解析全部学号
+        student_nos = sorted({item[1] for item in valid})
+        placeholders = ', '.join(['%s'] * len(student_nos))
+        found = db_manager.execute_query(
+            f"SELECT id, student_id FROM students WHERE student_id IN ({placeholders})", tuple(student_nos)
+        )
+        if found is None:
+            for item in valid:
+                results[item[0]]['message'] = '查询学生信息失败'
+            return results
+        student_ids = {row['student_id']: row['id'] for row in found}
+        
+        # 同一 (学生, 课程, 学期) 出现多次时以最后一行为准
+        latest = {}
+        for item in valid:
+            student_id = student_ids.get(item[1])
+            if student_id is None:
+                results[item[0]]['message'] = '学号不存在'
+                continue
+            key = (student_id, item[2], item[3])
+            if key in latest:
+                results[latest[key][0]]['message'] = '与后续行重复，以最后一行为准'
+            latest[key] = item
+        if not latest:
+            return results
+        
+        chunk_size = SCORE_IMPORT_CONFIG['chunk_size']
+        items = list(latest.items())
+        old_scores = {}
+        since = score_stats_cache.begin_write()
+        try:
+            with db_manager.transaction() as cursor:
+                for start in range(0, len(items), chunk_size):
+                    chunk = items[start:start + chunk_size]
+                    keys = [key for key, _ in chunk]
+                    key_placeholders = ', '.join(['(%s, %s, %s)'] * len(keys))
+                    flat_keys = tuple(value for key in keys for value in key)
+                    # 锁定已有成绩并记录旧值，用于区分新增/更新及增量维护统计缓存
+                    cursor.execute(
+                        "SELECT student_id, course_id, semester, score FROM scores "
+                        f"WHERE (student_id, course_id, semester) IN ({key_placeholders}) FOR UPDATE",
+                        flat_keys
+                    )
+                    for row in cursor.fetchall():
+                        old_scores[(row['student_id'], row['course_id'], row['semester'])] = row['score']
+                    
+                    cursor.execute(
+                        "INSERT INTO scores (student_id, course_id, score, semester, exam_time) VALUES "
+                        + ', '.join(['(%s, %s, %s, %s, %s)'] * len(chunk))
+                        + " ON DUPLICATE KEY UPDATE score = VALUES(score), exam_time = VALUES(exam_time)",
+                        tuple(value for (student_id, course_id, semester), item in chunk
+                              for value in (student_id, course_id, item[4], semester, item[5]))
+                    )
+                    # 补登选课记录，已存在的忽略
+                    cursor.execute(
+                        "INSERT IGNORE INTO enrollments (student_id, course_id, semester) VALUES " + key_placeholders,
+                        flat_keys
+                    )
+                
+                course_ids = sorted({key[1] for key, _ in items})
+                course_placeholders = ', '.join(['%s'] * len(course_ids))
+                cursor.execute(
+                    "UPDATE courses c SET c.enrolled_count = "
+                    "(SELECT COUNT(*) FROM enrollments e WHERE e.course_id = c.id) "
+                    f"WHERE c.id IN ({course_placeholders})",
+                    tuple(course_ids)
+                )
+                Score._refresh_academic_summary(cursor, [key[0] for key, _ in items])
+        except Exception as e:
+            logger.error(f"批量写入成绩失败: {e}")
+            for _, item in items:
+                results[item[0]]['message'] = '写入数据库失败，本批次未导入'
+            return results
+        
+        for key, item in items:
+            old_score = old_scores.get(key)
+            if old_score is None:
+                score_stats_cache.on_add(key[1], key[2], item[4], since)
+                results[item[0]].update(success=True, message='新增')
+            else:
+                score_stats_cache.on_update(key[1], key[2], old_score, item[4], since)
+                results[item[0]].update(success=True, message='更新')
+        for course_id in course_ids:
+            enrollment_engine.invalidate(course_id)
+            course_cache.invalidate('id', course_id)
+        # 补登的选课记录改变了已选人数
+        course_catalogue.invalidate()
+        logger.info(f"批量写入成绩完成: 共 {len(rows)} 行，成功 {len(items)} 行")
+        return results
+    
     @staticmethod
     def get_scores_by_student_id(student_id):
         """根据学生ID获取成绩信息"""
         try:
-            query = """
-                SELECT s.*, c.course_name, c.course_code, c.credits 
+            query = f"""
+                SELECT {columns('student_score', 's')}, c.course_name, c.course_code, c.credits,
+                       t.name AS teacher_name
                 FROM scores s 
                 JOIN courses c ON s.course_id = c.id 
+                LEFT JOIN teachers t ON c.teacher_id = t.id
                 WHERE s.student_id = %s
             """
             result = db_manager.execute_query(query, (student_id,))
@@ -181,8 +389,8 @@ class Score:
     def get_scores_by_course_id(course_id):
         """根据课程ID获取成绩信息"""
         try:
-            query = """
-                SELECT s.*, st.student_id, st.name 
+            query = f"""
+                SELECT {columns('score', 's')}, st.student_id AS student_no, st.name 
                 FROM scores s 
                 JOIN students st ON s.student_id = st.id 
                 WHERE s.course_id = %s
@@ -197,8 +405,8 @@ class Score:
     def get_scores_by_course_and_semester(course_id, semester):
         """根据课程ID和学期获取成绩信息"""
         try:
-            query = """
-                SELECT s.*, st.student_id, st.name AS student_name, c.credits 
+            query = f"""
+                SELECT {columns('score', 's')}, st.student_id AS student_no, st.name AS student_name, c.credits 
                 FROM scores s 
                 JOIN students st ON s.student_id = st.id 
                 JOIN courses c ON s.course_id = c.id 
@@ -212,87 +420,266 @@ class Score:
     
     @staticmethod
     def calculate_gpa(student_id):
-        """计算学生的GPA"""
+        """计算学生的GPA（读取学业汇总表的累计行）"""
         try:
-            query = """
-                SELECT s.score, c.credits 
+            summary = Score.get_academic_summary(student_id, CUMULATIVE_SEMESTER)
+            if summary:
+                return round(float(summary[0]['gpa']), 2)
+            
+            # 汇总表尚未重建时回退到按成绩实时计算
+            query = f"""
+                SELECT SUM({grade_point_sql('s.score')} * c.credits) AS weighted_points,
+                       SUM(c.credits) AS total_credits
                 FROM scores s 
                 JOIN courses c ON s.course_id = c.id 
                 WHERE s.student_id = %s
             """
             results = db_manager.execute_query(query, (student_id,))
             
-            if not results:
+            if not results or not results[0]['total_credits']:
                 return 0.0
             
-            total_credits = 0.0
-            weighted_sum = 0.0
+            row = results[0]
+            return round(float(row['weighted_points']) / float(row['total_credits']), 2)
+        except Exception as e:
+            logger.error(f"计算GPA失败: {e}")
+            return 0.0
+    
+    @staticmethod
+    def calculate_gpa_batch(class_name=None, major=None, semester=None):
+        """批量获取GPA，一次查询返回某班级/专业/学期所有学生的GPA（按GPA降序）
+        
+        数据来自学业汇总表，不再逐条扫描成绩。
+        
+        Args:
+            class_name: 班级，为空时不限
+            major: 专业，为空时不限
+            semester: 学期，为空时取累计GPA
+            
+        Returns:
+            列表，每项包含 student_id(内部ID)、student_no(学号)、name、total_credits、credits_earned、gpa
+        """
+        try:
+            conditions = ["sas.semester = %s"]
+            params = [semester or CUMULATIVE_SEMESTER]
             
-            for row in results:
-                score = row['score']
-                credits = row['credits']
-                
-                # 将分数转换为绩点 (4.0分制)
-                if score >= 90:
-                    gpa = 4.0
-                elif score >= 85:
-                    gpa = 3.7
-                elif score >= 80:
-                    gpa = 3.3
-                elif score >= 75:
-                    gpa = 3.0
-                elif score >= 70:
-                    gpa = 2.7
-                elif score >= 65:
-                    gpa = 2.3
-                elif score >= 60:
-                    gpa = 2.0
-                else:
-                    gpa = 0.0
-                
-                weighted_sum += gpa * credits
-                total_credits += credits
+            if class_name:
+                conditions.append("st.class = %s")
+                params.append(class_name)
             
-            if total_credits == 0:
-                return 0.0
+            if major:
+                conditions.append("st.major = %s")
+                params.append(major)
             
-            return round(weighted_sum / total_credits, 2)
+            query = f"""
+                SELECT st.id AS student_id, st.student_id AS student_no, st.name,
+                       sas.credits_attempted AS total_credits, sas.credits_earned, sas.gpa
+                FROM student_academic_summary sas
+                JOIN students st ON sas.student_id = st.id
+                WHERE {' AND '.join(conditions)}
+                ORDER BY sas.gpa DESC
+            """
+            results = db_manager.execute_query(query, tuple(params))
+            if results is None:
+                return None
+            
+            for row in results:
+                row['total_credits'] = float(row['total_credits'] or 0)
+                row['credits_earned'] = float(row['credits_earned'] or 0)
+                row['gpa'] = round(float(row['gpa'] or 0), 2)
+            return results
         except Exception as e:
-            logger.error(f"计算GPA失败: {e}")
-            return 0.0
+            logger.error(f"批量计算GPA失败: {e}")
+            return None
+    
+    @staticmethod
+    def _summary_select_sql(student_filter):
+        """生成学业汇总的 SELECT 语句（每学期一组 + 累计一组）
+        
+        Args:
+            student_filter: 追加到 WHERE 中的学生过滤条件（针对 scores 表别名 s），为空表示全部学生
+        """
+        grade_point = grade_point_sql('s.score')
+        where = f"WHERE {student_filter}" if student_filter else ""
+        columns = f"""
+                SUM(c.credits) AS credits_attempted,
+                SUM(CASE WHEN s.score >= {PASSING_SCORE} THEN c.credits ELSE 0 END) AS credits_earned,
+                SUM({grade_point} * c.credits) AS weighted_points,
+                COALESCE(SUM({grade_point} * c.credits) / NULLIF(SUM(c.credits), 0), 0) AS gpa
+        """
+        return f"""
+            SELECT s.student_id, COALESCE(s.semester, '') AS semester, {columns}
+            FROM scores s JOIN courses c ON s.course_id = c.id
+            {where}
+            GROUP BY s.student_id, COALESCE(s.semester, '')
+            UNION ALL
+            SELECT s.student_id, '{CUMULATIVE_SEMESTER}' AS semester, {columns}
+            FROM scores s JOIN courses c ON s.course_id = c.id
+            {where}
+            GROUP BY s.student_id
+        """
+    
+    @staticmethod
+    def _refresh_academic_summary(cursor, student_ids):
+        """在调用方的事务中重新计算指定学生的学业汇总行"""
+        student_ids = sorted({sid for sid in student_ids if sid is not None})
+        if not student_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        cursor.execute(
+            f"DELETE FROM student_academic_summary WHERE student_id IN ({placeholders})",
+            tuple(student_ids)
+        )
+        select_sql = Score._summary_select_sql(f"s.student_id IN ({placeholders})")
+        cursor.execute(
+            "INSERT INTO student_academic_summary "
+            "(student_id, semester, credits_attempted, credits_earned, weighted_points, gpa) "
+            + select_sql,
+            tuple(student_ids) * 2
+        )
+    
+    @staticmethod
+    def refresh_academic_summary_for_course(course_id):
+        """重新计算选修了某课程（有成绩）的所有学生的学业汇总，用于课程学分变化后"""
+        try:
+            with db_manager.transaction() as cursor:
+                cursor.execute("SELECT DISTINCT student_id FROM scores WHERE course_id = %s", (course_id,))
+                student_ids = [row['student_id'] for row in cursor.fetchall()]
+                Score._refresh_academic_summary(cursor, student_ids)
+            return True
+        except Exception as e:
+            logger.error(f"更新课程相关学业汇总失败: {e}")
+            return False
+    
+    @staticmethod
+    def rebuild_academic_summary():
+        """从成绩表全量重建学业汇总表（用于首次部署或对账）"""
+        try:
+            with db_manager.transaction() as cursor:
+                cursor.execute("DELETE FROM student_academic_summary")
+                cursor.execute(
+                    "INSERT INTO student_academic_summary "
+                    "(student_id, semester, credits_attempted, credits_earned, weighted_points, gpa) "
+                    + Score._summary_select_sql(None)
+                )
+                count = cursor.rowcount
+            logger.info(f"学业汇总表重建完成，共 {count} 行")
+            return True
+        except Exception as e:
+            logger.error(f"重建学业汇总表失败: {e}")
+            return False
+    
+    @staticmethod
+    def ensure_academic_summary():
+        """汇总表为空而成绩表有数据时（如刚完成迁移）自动重建"""
+        try:
+            summary = db_manager.execute_query("SELECT 1 FROM student_academic_summary LIMIT 1")
+            scores = db_manager.execute_query("SELECT 1 FROM scores LIMIT 1")
+            if summary is not None and not summary and scores:
+                logger.info("学业汇总表为空，开始重建")
+                return Score.rebuild_academic_summary()
+            return True
+        except Exception as e:
+            logger.error(f"检查学业汇总表失败: {e}")
+            return False
+    
+    @staticmethod
+    def get_academic_summary(student_id, semester=None):
+        """获取学生的学业汇总（不指定学期时返回各学期及累计行）"""
+        try:
+            if semester:
+                query = f"SELECT {columns('academic_summary')} FROM student_academic_summary WHERE student_id = %s AND semester = %s"
+                params = (student_id, semester)
+            else:
+                query = f"SELECT {columns('academic_summary')} FROM student_academic_summary WHERE student_id = %s ORDER BY semester"
+                params = (student_id,)
+            return db_manager.execute_query(query, params)
+        except Exception as e:
+            logger.error(f"获取学业汇总失败: {e}")
+            return None
+    
+    @staticmethod
+    def _load_course_scores(course_id, semester):
+        """读取某课程某学期的全部成绩，失败返回 None"""
+        query = "SELECT score FROM scores WHERE course_id = %s AND semester = %s"
+        results = db_manager.execute_query(query, (course_id, semester))
+        if results is None:
+            return None
+        return [row['score'] for row in results]
     
     @staticmethod
     def get_score_statistics(course_id, semester):
-        """获取课程成绩统计信息"""
+        """获取课程成绩统计信息（由统计缓存增量维护，不再每次重算）"""
         try:
-            query = "SELECT score FROM scores WHERE course_id = %s AND semester = %s"
-            results = db_manager.execute_query(query, (course_id, semester))
+            return score_stats_cache.get(course_id, semester)
+        except Exception as e:
+            logger.error(f"获取成绩统计信息失败: {e}")
+            return None
+    
+    @staticmethod
+    def get_semester_statistics(semester, department=None):
+        """一次查询、分组向量化计算某学期所有课程的成绩统计
+        
+        Args:
+            semester: 学期
+            department: 开课教师所在院系，为空时不限
             
-            if not results:
+        Returns:
+            紧凑表格 {'columns': STATISTICS_COLUMNS, 'rows': [[...], ...]}，每门课程一行；
+            失败返回 None
+        """
+        try:
+            if department:
+                query = """
+                    SELECT s.course_id, s.score
+                    FROM scores s
+                    JOIN courses c ON s.course_id = c.id
+                    JOIN teachers t ON c.teacher_id = t.id
+                    WHERE s.semester = %s AND t.department = %s
+                """
+                params = (semester, department)
+            else:
+                query = "SELECT course_id, score FROM scores WHERE semester = %s"
+                params = (semester,)
+            results = db_manager.execute_query(query, params)
+            if results is None:
                 return None
+            if not results:
+                return {'columns': STATISTICS_COLUMNS, 'rows': []}
+            
+            course_ids = np.fromiter((row['course_id'] for row in results), dtype=np.int64, count=len(results))
+            scores = np.fromiter((row['score'] for row in results), dtype=float, count=len(results))
             
-            scores = [row['score'] for row in results]
-            scores_array = np.array(scores)
+            # 按 (课程, 分数) 排序后，每门课程的成绩是连续且有序的一段
+            order = np.lexsort((scores, course_ids))
+            course_ids = course_ids[order]
+            scores = scores[order]
+            groups, starts, counts = np.unique(course_ids, return_index=True, return_counts=True)
+            group_index = np.repeat(np.arange(len(groups)), counts)
             
-            # 计算统计指标
-            stats = {
-                'count': len(scores),
-                'average': round(np.mean(scores_array), 2),
-                'median': round(np.median(scores_array), 2),
-                'max': round(np.max(scores_array), 2),
-                'min': round(np.min(scores_array), 2),
-                'std': round(np.std(scores_array), 2),
-                # 计算各分数段人数
-                'excellent': len([s for s in scores if s >= 90]),
-                'good': len([s for s in scores if 80 <= s < 90]),
-                'medium': len([s for s in scores if 70 <= s < 80]),
-                'pass': len([s for s in scores if 60 <= s < 70]),
-                'fail': len([s for s in scores if s < 60])
-            }
+            means = np.add.reduceat(scores, starts) / counts
+            deviations = scores - means[group_index]
+            stds = np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts)
+            mins = scores[starts]
+            maxs = scores[starts + counts - 1]
+            medians = (scores[starts + (counts - 1) // 2] + scores[starts + counts // 2]) / 2
             
-            return stats
+            bands = np.digitize(scores, SCORE_BAND_EDGES)
+            histogram = np.bincount(
+                group_index * len(SCORE_BANDS) + bands,
+                minlength=len(groups) * len(SCORE_BANDS)
+            ).reshape(len(groups), len(SCORE_BANDS))
+            
+            rows = []
+            for i, course_id in enumerate(groups):
+                rows.append(
+                    [int(course_id), int(counts[i]), round(float(means[i]), 2), round(float(medians[i]), 2),
+                     round(float(stds[i]), 2), round(float(mins[i]), 2), round(float(maxs[i]), 2)]
+                    + histogram[i].tolist()
+                )
+            return {'columns': STATISTICS_COLUMNS, 'rows': rows}
         except Exception as e:
-            logger.error(f"获取成绩统计信息失败: {e}")
+            logger.error(f"获取学期成绩统计失败: {e}")
             return None
     
     @staticmethod
@@ -300,9 +687,20 @@ class Score:
         """删除成绩信息"""
         try:
             query = "DELETE FROM scores WHERE student_id = %s AND course_id = %s AND semester = %s"
-            result = db_manager.execute_update(query, (student_id, course_id, semester))
+            since = score_stats_cache.begin_write()
+            with db_manager.transaction() as cursor:
+                cursor.execute(
+                    "SELECT score FROM scores WHERE student_id = %s AND course_id = %s AND semester = %s FOR UPDATE",
+                    (student_id, course_id, semester)
+                )
+                old_row = cursor.fetchone()
+                result = cursor.execute(query, (student_id, course_id, semester))
+                if result > 0:
+                    Score._refresh_academic_summary(cursor, [student_id])
             
             if result > 0:
+                if old_row:
+                    score_stats_cache.on_remove(course_id, semester, old_row['score'], since)
                 logger.info(f"成绩删除成功")
                 return True
             else:
@@ -310,4 +708,8 @@ class Score:
                 return False
         except Exception as e:
             logger.error(f"删除成绩信息失败: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+# 创建全局课程成绩统计缓存实例
+score_stats_cache = ScoreStatisticsCache(Score._load_course_scores)
@@ -4,6 +4,13 @@
 """学生模型，处理学生相关的业务逻辑"""
 
 from database.db_manager import db_manager
+from database.projections import columns
+from database.entity_cache import student_cache, course_cache
+from database.search_index import search_index
+from database.course_catalogue import course_catalogue
+from .enrollment import Enrollment
+from .enrollment_engine import enrollment_engine
+from .scores import Score, score_stats_cache
 import logging
 
 # 配置日志
@@ -19,7 +26,7 @@ class Student:
         """添加学生信息"""
         try:
             # 检查学号是否已存在
-            query = "SELECT * FROM students WHERE student_id = %s"
+            query = "SELECT id FROM students WHERE student_id = %s"
             result = db_manager.execute_query(query, (student_id,))
             
             if result and len(result) > 0:
@@ -31,6 +38,9 @@ class Student:
             result = db_manager.execute_update(query, (student_id, name, gender, birth, class_name, major, user_id))
             
             if result > 0:
+                student_cache.invalidate('student_id', student_id)
+                student_cache.invalidate('user_id', user_id)
+                search_index.refresh_row('students', 'student_id', student_id)
                 logger.info(f"学生 {name} (学号: {student_id}) 添加成功")
                 return True
             else:
@@ -77,8 +87,10 @@ class Student:
             # 执行更新
             query = f"UPDATE students SET {', '.join(updates)} WHERE student_id = %s"
             result = db_manager.execute_update(query, tuple(params))
+            student_cache.invalidate('student_id', student_id)
             
             if result > 0:
+                search_index.refresh_row('students', 'student_id', student_id)
                 logger.info(f"学生 (学号: {student_id}) 信息更新成功")
                 return True
             else:
@@ -92,10 +104,15 @@ class Student:
     def get_student_by_internal_id(internal_id):
         """根据数据库内部ID(主键)获取学生信息"""
         try:
-            query = "SELECT * FROM students WHERE id = %s"
+            cached = student_cache.get('id', internal_id)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('student')} FROM students WHERE id = %s"
             result = db_manager.execute_query(query, (internal_id,))
             
             if result and len(result) > 0:
+                student_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"内部ID {internal_id} 对应的学生不存在")
@@ -108,10 +125,15 @@ class Student:
     def get_student_by_id(student_id):
         """根据学号获取学生信息"""
         try:
-            query = "SELECT * FROM students WHERE student_id = %s"
+            cached = student_cache.get('student_id', student_id)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('student')} FROM students WHERE student_id = %s"
             result = db_manager.execute_query(query, (student_id,))
             
             if result and len(result) > 0:
+                student_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"学号 {student_id} 不存在")
@@ -124,10 +146,15 @@ class Student:
     def get_student_by_user_id(user_id):
         """根据用户ID获取学生信息"""
         try:
-            query = "SELECT * FROM students WHERE user_id = %s"
+            cached = student_cache.get('user_id', user_id)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('student')} FROM students WHERE user_id = %s"
             result = db_manager.execute_query(query, (user_id,))
             
             if result and len(result) > 0:
+                student_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"用户ID {user_id} 对应的学生信息不存在")
@@ -140,7 +167,7 @@ class Student:
     def get_all_students():
         """获取所有学生信息(管理员/教师权限)"""
         try:
-            query = "SELECT * FROM students"
+            query = f"SELECT {columns('student')} FROM students"
             result = db_manager.execute_query(query)
             return result
         except Exception as e:
@@ -151,10 +178,7 @@ class Student:
     def search_students(keyword):
         """搜索学生信息(管理员/教师权限)"""
         try:
-            query = "SELECT * FROM students WHERE student_id LIKE %s OR name LIKE %s"
-            keyword = f"%{keyword}%"
-            result = db_manager.execute_query(query, (keyword, keyword))
-            return result
+            return search_index.search('students', keyword)
         except Exception as e:
             logger.error(f"搜索学生信息失败: {e}")
             return None
@@ -164,9 +188,25 @@ class Student:
         """删除学生信息(管理员权限)"""
         try:
             query = "DELETE FROM students WHERE student_id = %s"
-            result = db_manager.execute_update(query, (student_id,))
+            with db_manager.transaction() as cursor:
+                # 外键级联会删除该学生的选课记录，需要同步更新相关课程的已选人数
+                course_ids = Enrollment.course_ids_of_students(cursor, 'student_id', student_id)
+                # 成绩记录同样级联删除，相关课程的成绩统计需要失效
+                score_course_ids = Score.course_ids_of_students(cursor, 'student_id', student_id)
+                result = cursor.execute(query, (student_id,))
+                if result > 0:
+                    Enrollment.recount_courses(cursor, course_ids)
+            student_cache.invalidate('student_id', student_id)
             
             if result > 0:
+                for course_id in course_ids:
+                    enrollment_engine.invalidate(course_id)
+                    course_cache.invalidate('id', course_id)
+                if course_ids:
+                    course_catalogue.invalidate()
+                for course_id in score_course_ids:
+                    score_stats_cache.invalidate(course_id)
+                search_index.remove('students', 'student_id', student_id)
                 logger.info(f"学生 (学号: {student_id}) 删除成功")
                 return True
             else:
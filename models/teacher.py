@@ -4,6 +4,10 @@
 """教师模型，处理教师相关的业务逻辑"""
 
 from database.db_manager import db_manager
+from database.projections import columns
+from database.entity_cache import teacher_cache, course_cache
+from database.search_index import search_index
+from database.course_catalogue import course_catalogue
 import logging
 
 # 配置日志
@@ -19,7 +23,7 @@ class Teacher:
         """添加教师信息"""
         try:
             # 检查教师编号是否已存在
-            query = "SELECT * FROM teachers WHERE teacher_id = %s"
+            query = "SELECT id FROM teachers WHERE teacher_id = %s"
             result = db_manager.execute_query(query, (teacher_id,))
             
             if result and len(result) > 0:
@@ -31,6 +35,9 @@ class Teacher:
             result = db_manager.execute_update(query, (teacher_id, name, gender, title, department, user_id))
             
             if result > 0:
+                teacher_cache.invalidate('teacher_id', teacher_id)
+                teacher_cache.invalidate('user_id', user_id)
+                search_index.refresh_row('teachers', 'teacher_id', teacher_id)
                 logger.info(f"教师 {name} (编号: {teacher_id}) 添加成功")
                 return True
             else:
@@ -73,8 +80,12 @@ class Teacher:
             # 执行更新
             query = f"UPDATE teachers SET {', '.join(updates)} WHERE teacher_id = %s"
             result = db_manager.execute_update(query, tuple(params))
+            teacher_cache.invalidate('teacher_id', teacher_id)
             
             if result > 0:
+                search_index.refresh_row('teachers', 'teacher_id', teacher_id)
+                # 课程目录中包含教师姓名与院系
+                course_catalogue.invalidate()
                 logger.info(f"教师 (编号: {teacher_id}) 信息更新成功")
                 return True
             else:
@@ -88,10 +99,15 @@ class Teacher:
     def get_teacher_by_id(teacher_id):
         """根据教师内部ID获取教师信息"""
         try:
-            query = "SELECT * FROM teachers WHERE id = %s"
+            cached = teacher_cache.get('id', teacher_id)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('teacher')} FROM teachers WHERE id = %s"
             result = db_manager.execute_query(query, (teacher_id,))
             
             if result and len(result) > 0:
+                teacher_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"教师ID {teacher_id} 不存在")
@@ -104,10 +120,15 @@ class Teacher:
     def get_teacher_by_teacher_id(teacher_id):
         """根据教师编号获取教师信息"""
         try:
-            query = "SELECT * FROM teachers WHERE teacher_id = %s"
+            cached = teacher_cache.get('teacher_id', teacher_id)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('teacher')} FROM teachers WHERE teacher_id = %s"
             result = db_manager.execute_query(query, (teacher_id,))
             
             if result and len(result) > 0:
+                teacher_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"教师编号 {teacher_id} 不存在")
@@ -120,10 +141,15 @@ class Teacher:
     def get_teacher_by_user_id(user_id):
         """根据用户ID获取教师信息"""
         try:
-            query = "SELECT * FROM teachers WHERE user_id = %s"
+            cached = teacher_cache.get('user_id', user_id)
+            if cached:
+                return cached
+            
+            query = f"SELECT {columns('teacher')} FROM teachers WHERE user_id = %s"
             result = db_manager.execute_query(query, (user_id,))
             
             if result and len(result) > 0:
+                teacher_cache.put(result[0])
                 return result[0]
             else:
                 logger.warning(f"用户ID {user_id} 对应的教师信息不存在")
@@ -136,7 +162,7 @@ class Teacher:
     def get_all_teachers():
         """获取所有教师信息(管理员权限)"""
         try:
-            query = "SELECT * FROM teachers"
+            query = f"SELECT {columns('teacher')} FROM teachers"
             result = db_manager.execute_query(query)
             return result
         except Exception as e:
@@ -147,10 +173,7 @@ class Teacher:
     def search_teachers(keyword):
         """搜索教师信息(管理员权限)"""
         try:
-            query = "SELECT * FROM teachers WHERE teacher_id LIKE %s OR name LIKE %s"
-            keyword = f"%{keyword}%"
-            result = db_manager.execute_query(query, (keyword, keyword))
-            return result
+            return search_index.search('teachers', keyword)
         except Exception as e:
             logger.error(f"搜索教师信息失败: {e}")
             return None
@@ -161,6 +184,13 @@ class Teacher:
         try:
             query = "DELETE FROM teachers WHERE teacher_id = %s"
             result = db_manager.execute_update(query, (teacher_id,))
+            teacher_cache.invalidate('teacher_id', teacher_id)
+            # 外键 ON DELETE SET NULL 会修改课程的 teacher_id，课程缓存需整体失效
+            if result > 0:
+                course_cache.clear()
+                search_index.remove('teachers', 'teacher_id', teacher_id)
+                search_index.invalidate('courses')
+                course_catalogue.invalidate()
             
             if result > 0:
                 logger.info(f"教师 (编号: {teacher_id}) 删除成功")
@@ -4,8 +4,15 @@
 """用户模型，处理用户相关的业务逻辑"""
 
 from database.db_manager import db_manager
+from database.projections import columns
+from database.entity_cache import student_cache, teacher_cache, course_cache
+from database.search_index import search_index
+from database.course_catalogue import course_catalogue
 from config.config import ROLES
-import hashlib
+from utils.passwords import password_hasher, needs_rehash, PasswordHasherBusy
+from .enrollment import Enrollment
+from .enrollment_engine import enrollment_engine
+from .scores import Score, score_stats_cache
 import logging
 
 # 配置日志
@@ -18,31 +25,48 @@ class User:
     
     @staticmethod
     def hash_password(password):
-        """密码加密"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """密码加密（PBKDF2，在密码哈希进程池中计算）"""
+        return password_hasher.hash(password)
     
     @staticmethod
     def login(username, password):
-        """用户登录验证"""
+        """用户登录验证
+        
+        密码哈希排队已满时抛出 PasswordHasherBusy，由调用方提示稍后重试。
+        """
         try:
-            # 对密码进行哈希处理
-            hashed_password = User.hash_password(password)
-            
-            # 查询用户
-            query = "SELECT * FROM users WHERE username = %s AND password = %s"
-            result = db_manager.execute_query(query, (username, hashed_password))
+            # 查询用户及其密码哈希（密码哈希只在本方法内使用，不返回给调用方）
+            query = f"SELECT {columns('user')}, password FROM users WHERE username = %s"
+            result = db_manager.execute_query(query, (username,))
             
             if result and len(result) > 0:
                 user = result[0]
-                logger.info(f"用户 {username} 登录成功")
-                return user
-            else:
-                logger.warning(f"用户 {username} 登录失败: 用户名或密码错误")
-                return None
+                stored = user.pop('password')
+                if password_hasher.verify(password or '', stored):
+                    logger.info(f"用户 {username} 登录成功")
+                    User._upgrade_password(user['id'], password, stored)
+                    return user
+            
+            logger.warning(f"用户 {username} 登录失败: 用户名或密码错误")
+            return None
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             logger.error(f"登录验证失败: {e}")
             return None
     
+    @staticmethod
+    def _upgrade_password(user_id, password, stored):
+        """登录成功后将旧格式的密码哈希升级为当前格式，失败不影响登录"""
+        if not needs_rehash(stored):
+            return
+        try:
+            query = "UPDATE users SET password = %s WHERE id = %s AND password = %s"
+            if db_manager.execute_update(query, (User.hash_password(password), user_id, stored)) > 0:
+                logger.info(f"用户ID {user_id} 的密码哈希已升级")
+        except Exception as e:
+            logger.warning(f"升级用户ID {user_id} 的密码哈希失败: {e}")
+    
     @staticmethod
     def register(username, password, role, name):
         """用户注册"""
@@ -53,7 +77,7 @@ class User:
                 return False
             
             # 检查用户名是否已存在
-            query = "SELECT * FROM users WHERE username = %s"
+            query = "SELECT id FROM users WHERE username = %s"
             result = db_manager.execute_query(query, (username,))
             
             if result and len(result) > 0:
@@ -68,6 +92,7 @@ class User:
             result = db_manager.execute_update(query, (username, hashed_password, role, name))
             
             if result > 0:
+                search_index.refresh_row('users', 'username', username)
                 logger.info(f"用户 {username} 注册成功")
                 return True
             else:
@@ -111,6 +136,8 @@ class User:
             # 执行更新
             query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
             result = db_manager.execute_update(query, tuple(params))
+            if result > 0:
+                search_index.refresh_row('users', 'id', user_id)
             
             if result > 0:
                 logger.info(f"用户ID {user_id} 信息更新成功")
@@ -126,7 +153,7 @@ class User:
     def get_user_by_id(user_id):
         """根据用户ID获取用户信息"""
         try:
-            query = "SELECT * FROM users WHERE id = %s"
+            query = f"SELECT {columns('user')} FROM users WHERE id = %s"
             result = db_manager.execute_query(query, (user_id,))
             
             if result and len(result) > 0:
@@ -142,7 +169,7 @@ class User:
     def get_user_by_username(username):
         """根据用户名获取用户信息"""
         try:
-            query = "SELECT * FROM users WHERE username = %s"
+            query = f"SELECT {columns('user')} FROM users WHERE username = %s"
             result = db_manager.execute_query(query, (username,))
             
             if result and len(result) > 0:
@@ -158,7 +185,7 @@ class User:
     def get_all_users():
         """获取所有用户信息(管理员权限)"""
         try:
-            query = "SELECT * FROM users"
+            query = f"SELECT {columns('user')} FROM users"
             result = db_manager.execute_query(query)
             return result
         except Exception as e:
@@ -167,11 +194,9 @@ class User:
     
     @staticmethod
     def search_users(keyword: str):
-        """根据关键词搜索用户（用户名或姓名模糊匹配）"""
+        """根据关键词搜索用户（用户名或姓名模糊匹配，基于 n-gram 索引并按相关度排序）"""
         try:
-            like_kw = f"%{keyword}%"
-            query = "SELECT * FROM users WHERE username LIKE %s OR name LIKE %s"
-            result = db_manager.execute_query(query, (like_kw, like_kw))
+            result = search_index.search('users', keyword)
             return result or []
         except Exception as e:
             logger.error(f"搜索用户失败: {e}")
@@ -182,7 +207,29 @@ class User:
         """删除用户(管理员权限)"""
         try:
             query = "DELETE FROM users WHERE id = %s"
-            result = db_manager.execute_update(query, (user_id,))
+            with db_manager.transaction() as cursor:
+                # 外键级联会删除绑定的学生记录及其选课记录，需要同步更新相关课程的已选人数
+                course_ids = Enrollment.course_ids_of_students(cursor, 'user_id', user_id)
+                # 成绩记录同样级联删除，相关课程的成绩统计需要失效
+                score_course_ids = Score.course_ids_of_students(cursor, 'user_id', user_id)
+                result = cursor.execute(query, (user_id,))
+                if result > 0:
+                    Enrollment.recount_courses(cursor, course_ids)
+            # 外键级联会删除绑定的学生/教师记录
+            student_cache.invalidate('user_id', user_id)
+            teacher_cache.invalidate('user_id', user_id)
+            if result > 0:
+                # 删除教师用户时课程的 teacher_id 会被置空
+                course_cache.clear()
+                search_index.remove('users', 'id', user_id)
+                search_index.remove('students', 'user_id', user_id)
+                search_index.remove('teachers', 'user_id', user_id)
+                search_index.invalidate('courses')
+                course_catalogue.invalidate()
+                for course_id in course_ids:
+                    enrollment_engine.invalidate(course_id)
+                for course_id in score_course_ids:
+                    score_stats_cache.invalidate(course_id)
             
             if result > 0:
                 logger.info(f"用户ID {user_id} 删除成功")
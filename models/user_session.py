@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""登录会话模型，签发、恢复和吊销会话令牌
+
+登录成功后签发随机令牌，数据库只保存令牌的 SHA-256 哈希。客户端断线重连时出示令牌，
+服务器按哈希做一次唯一索引查询即可恢复登录，不必再次校验密码。
+"""
+
+import hashlib
+import secrets
+import logging
+from datetime import datetime, timedelta
+from database.db_manager import db_manager
+from database.projections import columns
+from config.config import SESSION_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('user_session_model')
+
+
+class UserSession:
+    """登录会话类，封装会话令牌相关的业务逻辑"""
+
+    @staticmethod
+    def _hash_token(token):
+        """令牌哈希（令牌本身是高熵随机串，无需慢哈希）"""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def issue(user_id, client_address=None):
+        """为用户签发会话令牌，返回 (token, expires_at)，失败返回 (None, None)"""
+        try:
+            token = secrets.token_urlsafe(SESSION_CONFIG['token_bytes'])
+            expires_at = datetime.now().replace(microsecond=0) + timedelta(seconds=SESSION_CONFIG['ttl'])
+            query = "INSERT INTO user_sessions (user_id, token_hash, client_address, expires_at) VALUES (%s, %s, %s, %s)"
+            address = str(client_address[0]) if isinstance(client_address, tuple) else client_address
+            result = db_manager.execute_update(query, (user_id, UserSession._hash_token(token), address, expires_at))
+            if result > 0:
+                return token, expires_at
+            logger.warning(f"用户ID {user_id} 会话令牌签发失败")
+            return None, None
+        except Exception as e:
+            logger.error(f"签发会话令牌失败: {e}")
+            return None, None
+
+    @staticmethod
+    def resume(token):
+        """凭令牌恢复登录，返回用户记录；令牌无效、过期或已吊销返回 None"""
+        if not token or not isinstance(token, str):
+            return None
+        try:
+            query = f"""
+                SELECT {columns('user', 'u')}
+                FROM user_sessions s
+                JOIN users u ON u.id = s.user_id
+                WHERE s.token_hash = %s AND s.revoked_at IS NULL AND s.expires_at > NOW()
+            """
+            result = db_manager.execute_query(query, (UserSession._hash_token(token),))
+            if result:
+                return result[0]
+            logger.warning("会话令牌无效或已过期")
+            return None
+        except Exception as e:
+            logger.error(f"恢复会话失败: {e}")
+            return None
+
+    @staticmethod
+    def revoke(token):
+        """吊销单个令牌（注销时调用）"""
+        if not token:
+            return False
+        try:
+            query = "UPDATE user_sessions SET revoked_at = NOW() WHERE token_hash = %s AND revoked_at IS NULL"
+            return db_manager.execute_update(query, (UserSession._hash_token(token),)) > 0
+        except Exception as e:
+            logger.error(f"吊销会话令牌失败: {e}")
+            return False
+
+    @staticmethod
+    def revoke_user(user_id, keep_token=None):
+        """吊销用户的全部令牌（修改密码后调用），keep_token 指定保留的当前令牌"""
+        try:
+            query = "UPDATE user_sessions SET revoked_at = NOW() WHERE user_id = %s AND revoked_at IS NULL"
+            params = [user_id]
+            if keep_token:
+                query += " AND token_hash <> %s"
+                params.append(UserSession._hash_token(keep_token))
+            result = db_manager.execute_update(query, tuple(params))
+            if result > 0:
+                logger.info(f"已吊销用户ID {user_id} 的 {result} 个会话令牌")
+            return True
+        except Exception as e:
+            logger.error(f"吊销用户会话令牌失败: {e}")
+            return False
+
+    @staticmethod
+    def purge_expired():
+        """删除已过期或已吊销的会话记录，返回删除条数"""
+        try:
+            query = "DELETE FROM user_sessions WHERE expires_at <= NOW() OR revoked_at IS NOT NULL"
+            result = db_manager.execute_update(query)
+            if result > 0:
+                logger.info(f"已清理 {result} 条失效会话记录")
+            return result
+        except Exception as e:
+            logger.error(f"清理失效会话记录失败: {e}")
+            return 0
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""异步网络客户端模块，基于 asyncio 与服务器通信
+
+与同步 Client 使用同一协议和同一组快捷方法（见 ClientApiMixin），区别在于：
+- 每个请求带 request_id，服务器原样带回，一个连接上可以同时有多个未完成的请求；
+- 请求分摊到若干条连接上，服务器为每条连接使用独立线程处理；
+- 登录在第一条连接上完成，其余连接凭会话令牌恢复登录。
+
+用法:
+    client = AsyncClient()
+    await client.connect()
+    await client.login('admin', 'admin123')
+    results = await asyncio.gather(*(client.get_course_scores(cid, '2023-2024-1') for cid in course_ids))
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from config.config import NETWORK_CONFIG, ASYNC_CLIENT_CONFIG
+from network.client_api import ClientApiMixin
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('async_client')
+
+
+class _Connection:
+    """一条到服务器的连接：写入时加锁，后台任务按 request_id 把响应交给等待的请求"""
+
+    def __init__(self, reader, writer):
+        """初始化连接"""
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}  # request_id -> Future
+        self.write_lock = asyncio.Lock()
+        self.reader_task = None
+
+    @property
+    def closed(self):
+        """连接是否已关闭"""
+        return self.reader_task is None or self.reader_task.done()
+
+    async def read_loop(self):
+        """持续读取响应，连接断开时让所有未完成的请求失败"""
+        error = ConnectionError("服务器已断开连接")
+        try:
+            while True:
+                length_data = await self.reader.readexactly(4)
+                data = await self.reader.readexactly(int.from_bytes(length_data, byteorder='big'))
+                response = json.loads(data.decode('utf-8'))
+                future = self.pending.pop(response.pop('request_id', None), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except asyncio.IncompleteReadError:
+            pass
+        except Exception as e:
+            error = e
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self.pending.clear()
+            self.writer.close()
+
+    async def request(self, request_id, action, params, timeout):
+        """发送请求并等待对应的响应"""
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        data = json.dumps({'action': action, 'params': params or {}, 'request_id': request_id}).encode('utf-8')
+        try:
+            async with self.write_lock:
+                self.writer.write(len(data).to_bytes(4, byteorder='big') + data)
+                await self.writer.drain()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+    async def close(self):
+        """关闭连接"""
+        self.writer.close()
+        if self.reader_task is not None:
+            await asyncio.gather(self.reader_task, return_exceptions=True)
+
+
+class AsyncClient(ClientApiMixin):
+    """异步网络客户端，快捷方法均为协程"""
+
+    def __init__(self, host=None, port=None, connections=None, timeout=None):
+        """初始化客户端
+
+        Args:
+            host: 服务器地址，默认取 NETWORK_CONFIG
+            port: 服务器端口，默认取 NETWORK_CONFIG
+            connections: 连接数
+            timeout: 单个请求等待响应的最长时间（秒）
+        """
+        self.host = host or NETWORK_CONFIG['host']
+        self.port = port or NETWORK_CONFIG['port']
+        self.connections = connections or ASYNC_CLIENT_CONFIG['connections']
+        self.timeout = timeout or ASYNC_CLIENT_CONFIG['timeout']
+        self.current_user = None
+        self.session_token = None
+        self._connections = [None] * self.connections
+        self._request_ids = itertools.count(1)
+
+    @property
+    def connected(self):
+        """是否至少有一条可用连接"""
+        return any(conn is not None and not conn.closed for conn in self._connections)
+
+    async def _open(self, index):
+        """建立第 index 条连接，已登录时凭会话令牌恢复登录"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        conn = _Connection(reader, writer)
+        conn.reader_task = asyncio.create_task(conn.read_loop())
+        self._connections[index] = conn
+        if self.session_token:
+            response = await conn.request(next(self._request_ids), 'resume_session',
+                                          {'token': self.session_token}, self.timeout)
+            if not response.get('success'):
+                logger.warning(f"连接 {index} 恢复登录失败: {response.get('message')}")
+        return conn
+
+    async def connect(self):
+        """建立全部连接，至少一条成功即返回 True"""
+        results = await asyncio.gather(*(self._open(i) for i in range(self.connections)), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.error(f"部分连接建立失败 ({len(failures)}/{self.connections}): {failures[0]}")
+        if len(failures) == self.connections:
+            return False
+        logger.info(f"已连接到服务器: {self.host}:{self.port}，连接数 {self.connections - len(failures)}")
+        return True
+
+    async def disconnect(self):
+        """断开全部连接"""
+        conns = [conn for conn in self._connections if conn is not None]
+        self._connections = [None] * self.connections
+        await asyncio.gather(*(conn.close() for conn in conns), return_exceptions=True)
+        self.current_user = None
+        logger.info("已断开与服务器的连接")
+
+    async def _connection(self, index=None):
+        """选取连接：默认取未完成请求最少的一条，已断开的连接在使用前重建"""
+        if index is None:
+            index = min(range(self.connections), key=lambda i: (
+                self._connections[i] is None or self._connections[i].closed,
+                len(self._connections[i].pending) if self._connections[i] is not None else 0
+            ))
+        conn = self._connections[index]
+        if conn is None or conn.closed:
+            conn = await self._open(index)
+        return conn
+
+    async def send_request(self, action, params=None, connection=None):
+        """发送请求并返回响应，失败时返回 {'success': False, 'message': ...}"""
+        try:
+            conn = await self._connection(connection)
+            response = await conn.request(next(self._request_ids), action, params, self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"请求超时: {action}")
+            return {'success': False, 'message': '请求超时'}
+        except Exception as e:
+            logger.error(f"发送请求失败: {e}")
+            return {'success': False, 'message': f'发送请求失败: {str(e)}'}
+
+        if action in ('login', 'resume_session') and response.get('success'):
+            self.current_user = response.get('user')
+            self.session_token = response.get('token')
+        elif action == 'logout' and response.get('success'):
+            self.current_user = None
+            self.session_token = None
+        return response
+
+    async def login(self, username, password):
+        """在第一条连接上登录，其余连接凭会话令牌恢复登录"""
+        response = await self.send_request('login', {'username': username, 'password': password}, connection=0)
+        if response.get('success') and self.session_token:
+            await asyncio.gather(*(
+                self.send_request('resume_session', {'token': self.session_token}, connection=i)
+                for i in range(1, self.connections)
+                if self._connections[i] is not None and not self._connections[i].closed
+            ))
+        return response
+
+    async def logout(self):
+        """在所有连接上注销（服务器的登录状态按连接保存）"""
+        responses = await asyncio.gather(*(
+            self.send_request('logout', connection=i)
+            for i in range(self.connections)
+            if self._connections[i] is not None and not self._connections[i].closed
+        ))
+        return responses[0] if responses else {'success': False, 'message': '未连接到服务器'}
@@ -4,17 +4,193 @@
 """网络客户端模块，与服务器进行通信"""
 
 import socket
+import selectors
+import queue
+import itertools
 import json
+import copy
+import time
+import random
+import threading
 import logging
-from config.config import NETWORK_CONFIG
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from config.config import NETWORK_CONFIG, RECONNECT_CONFIG, PAYLOAD_CACHE_CONFIG, TELEMETRY_CONFIG
+from network.client_api import ClientApiMixin
+from network.telemetry import TelemetryRecorder
+from network.snapshot_store import SnapshotStore
+from network.protocol import RATE_LIMITED, SESSION_EXPIRED
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('client')
 
+# 不改变服务器状态、断线后可以安全重发的操作
+IDEMPOTENT_PREFIXES = ('get_', 'search_')
+IDEMPOTENT_ACTIONS = frozenset({'suggest'})
 
-class Client:
-    """网络客户端类，与服务器进行通信"""
+# 不计入遥测的操作（遥测上报本身）
+UNTRACKED_ACTIONS = frozenset({'report_telemetry'})
+
+
+def is_idempotent(action):
+    """判断操作是否可以在断线重连后自动重发"""
+    return action in IDEMPOTENT_ACTIONS or action.startswith(IDEMPOTENT_PREFIXES)
+
+
+# 不需要登录的操作，登录失效后仍可发送
+SESSIONLESS_ACTIONS = frozenset({'login', 'register', 'resume_session', 'logout'})
+
+
+class NotConnectedError(ConnectionError):
+    """未连接到服务器且无法重连"""
+
+
+class SessionExpiredError(ConnectionError):
+    """重连后凭会话令牌恢复登录被拒绝，需要重新登录"""
+
+
+class _IoChannel:
+    """一条连接的 I/O 线程：独占套接字，负责收发全部数据帧
+    
+    调用方通过 submit() 把请求放入发送队列并得到 Future；I/O 线程用 selectors 同时等待
+    套接字可读/可写和唤醒信号，发送缓冲区非空时才关注可写，读到的响应按 request_id
+    交给对应的 Future。多个请求可以同时在途，任意线程并发调用都不会交错写入数据帧。
+    """
+    
+    def __init__(self, sock, name='client-io'):
+        """接管已连接的套接字并启动 I/O 线程"""
+        self.sock = sock
+        self.sock.setblocking(False)
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._outgoing = queue.SimpleQueue()
+        self._pending = {}  # request_id -> Future
+        self._pending_lock = threading.Lock()
+        self._request_ids = itertools.count(1)
+        self._closing = False
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    @property
+    def alive(self):
+        """I/O 线程是否仍在运行"""
+        return self._thread.is_alive() and not self._closing
+    
+    def submit(self, action, params):
+        """提交请求，返回结果为响应字典的 Future"""
+        future = Future()
+        request_id = next(self._request_ids)
+        data = json.dumps({'action': action, 'params': params or {}, 'request_id': request_id}).encode('utf-8')
+        future.bytes_sent = 4 + len(data)
+        with self._pending_lock:
+            if not self.alive:
+                future.set_exception(ConnectionError(self.error or "连接已关闭"))
+                return future
+            self._pending[request_id] = future
+        self._outgoing.put(len(data).to_bytes(4, byteorder='big') + data)
+        self._wake()
+        return future
+    
+    def close(self):
+        """关闭连接，未完成的请求以 ConnectionError 结束"""
+        self._closing = True
+        self._wake()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout=2)
+    
+    def _wake(self):
+        """唤醒 I/O 线程"""
+        try:
+            self._wake_send.send(b'\0')
+        except OSError:
+            pass
+    
+    def _run(self):
+        """I/O 线程主循环"""
+        selector = selectors.DefaultSelector()
+        selector.register(self.sock, selectors.EVENT_READ)
+        selector.register(self._wake_recv, selectors.EVENT_READ)
+        inbuf = bytearray()
+        outbuf = bytearray()
+        try:
+            while not self._closing:
+                for key, mask in selector.select():
+                    if key.fileobj is self._wake_recv:
+                        while True:
+                            try:
+                                if not self._wake_recv.recv(4096):
+                                    break
+                            except BlockingIOError:
+                                break
+                        while True:
+                            try:
+                                outbuf += self._outgoing.get_nowait()
+                            except queue.Empty:
+                                break
+                        continue
+                    if mask & selectors.EVENT_READ:
+                        try:
+                            data = self.sock.recv(65536)
+                        except (BlockingIOError, InterruptedError):
+                            data = None
+                        else:
+                            if not data:
+                                raise ConnectionError("服务器已断开连接")
+                            inbuf += data
+                            self._dispatch(inbuf)
+                    if mask & selectors.EVENT_WRITE and outbuf:
+                        try:
+                            del outbuf[:self.sock.send(outbuf)]
+                        except (BlockingIOError, InterruptedError):
+                            pass
+                # 有待发送数据时才关注可写事件
+                events = selectors.EVENT_READ | (selectors.EVENT_WRITE if outbuf else 0)
+                if selector.get_key(self.sock).events != events:
+                    selector.modify(self.sock, events)
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"连接中断: {e}")
+        finally:
+            self._closing = True
+            selector.close()
+            for sock in (self.sock, self._wake_recv, self._wake_send):
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(self.error or "连接已关闭"))
+    
+    def _dispatch(self, inbuf):
+        """从接收缓冲区中取出完整的响应帧并交给对应的 Future"""
+        while len(inbuf) >= 4:
+            length = int.from_bytes(inbuf[:4], byteorder='big')
+            if len(inbuf) < 4 + length:
+                return
+            response = json.loads(bytes(inbuf[4:4 + length]).decode('utf-8'))
+            del inbuf[:4 + length]
+            request_id = response.pop('request_id', None)
+            with self._pending_lock:
+                if request_id is None and self._pending:
+                    # 服务器未带回请求编号时按发送顺序匹配（服务器按顺序处理同一连接的请求）
+                    request_id = min(self._pending)
+                future = self._pending.pop(request_id, None)
+            if future is not None and not future.done():
+                future.bytes_received = 4 + length
+                future.set_result(response)
+
+
+class Client(ClientApiMixin):
+    """网络客户端类，与服务器进行通信
+    
+    套接字由 I/O 线程独占（见 _IoChannel），GUI 线程与后台线程可以同时调用 send_request()，
+    各自的请求在同一连接上并发在途；submit() 直接返回 Future，便于一次发出多个请求。
+    """
     
     def __init__(self):
         """初始化客户端"""
@@ -22,261 +198,377 @@ class Client:
         #self.host = '10.29.108.168'  # 客户端连接地址（校园网IP）
         self.host = '10.29.108.168'  # 这里改成你电脑的IP
         self.port = NETWORK_CONFIG['port']  # 一般是8888
-        self.client_socket = None
-        self.connected = False
         self.current_user = None
+        self.session_token = None  # 登录时服务器签发的会话令牌，重连后用于恢复登录
+        self.auto_reconnect = False  # 调用 connect() 后启用，主动 disconnect() 后关闭
+        self.session_expired = False  # 重连后恢复登录被拒绝，重新登录前需要登录的请求直接失败
+        self._channel = None
+        self._lock = threading.RLock()  # 保护连接的建立与重连，持有期间可能等待网络
+        self._state_lock = threading.Lock()  # 保护登录状态和缓存的响应，只做短暂的内存操作
+        self._payloads = OrderedDict()  # 请求键 -> (版本号, 响应)，用于条件请求
+        self.snapshots = SnapshotStore()  # 本地快照，登录后载入 _payloads，界面启动时先用快照渲染
+        self._snapshot_user = None  # 已载入快照的用户ID
+        self.telemetry = TelemetryRecorder()  # 各操作的延迟直方图、收发字节和错误数
+        self._uploader = None
+        self._uploader_stop = threading.Event()
+    
+    @property
+    def connected(self):
+        """当前是否有可用的连接"""
+        channel = self._channel
+        return channel is not None and channel.alive
+    
+    def _open_channel(self):
+        """创建套接字、连接到服务器并交给新的 I/O 线程"""
+        sock = socket.create_connection((self.host, self.port), timeout=RECONNECT_CONFIG['connect_timeout'])
+        return _IoChannel(sock)
     
     def connect(self):
         """连接到服务器"""
-        try:
-            # 创建套接字
-            self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            
-            # 连接到服务器
-            self.client_socket.connect((self.host, self.port))
-            self.connected = True
-            
-            logger.info(f"已连接到服务器: {self.host}:{self.port}")
-            return True
-        except Exception as e:
-            logger.error(f"连接服务器失败: {e}")
-            self.connected = False
-            return False
+        with self._lock:
+            try:
+                self._channel = self._open_channel()
+                self.auto_reconnect = True
+                self._start_uploader()
+                
+                logger.info(f"已连接到服务器: {self.host}:{self.port}")
+                return True
+            except Exception as e:
+                logger.error(f"连接服务器失败: {e}")
+                return False
     
     def disconnect(self):
-        """断开与服务器的连接"""
+        """断开与服务器的连接（主动断开，不再自动重连）"""
         try:
-            if self.client_socket:
-                self.client_socket.close()
-            self.connected = False
-            self.current_user = None
+            self.auto_reconnect = False
+            self._uploader_stop.set()
+            self._close_socket()
+            with self._state_lock:
+                self.current_user = None
+                self.session_expired = False
+                self._payloads.clear()
+                self._snapshot_user = None
             logger.info("已断开与服务器的连接")
         except Exception as e:
             logger.error(f"断开连接失败: {e}")
     
+    def _close_socket(self, channel=None):
+        """关闭连接但保留登录状态和会话令牌，供重连后恢复
+        
+        指定 channel 时只在它仍是当前连接时关闭（其他线程可能已经重连）
+        """
+        with self._lock:
+            if channel is not None and channel is not self._channel:
+                return
+            channel, self._channel = self._channel, None
+        if channel is not None:
+            channel.close()
+    
+    def _reconnect(self):
+        """断线后按带抖动的指数退避重连，并凭会话令牌恢复登录；成功返回 True
+        
+        每次等待时间在 [0, min(max_delay, base_delay * 2^n)] 内随机选取，
+        服务器重启时各客户端的重连请求会被打散，而不是同时涌入。
+        多个线程同时发现断线时只有一个线程执行重连，其余线程等待其结果；
+        新连接在恢复登录之后才对其他线程可见，不会有请求抢在恢复登录之前发出。
+        
+        恢复登录被限流时保留令牌，关闭连接后继续退避重试（服务器重启后同一地址的大量客户端
+        会超出地址维度的限额）；令牌被拒绝时连接照常可用，但标记 session_expired，
+        需要登录的请求以 SessionExpiredError 失败，提示用户重新登录。
+        """
+        with self._lock:
+            if self.connected:
+                return True
+            for attempt in range(RECONNECT_CONFIG['max_attempts']):
+                delay = random.uniform(0, min(RECONNECT_CONFIG['max_delay'], RECONNECT_CONFIG['base_delay'] * 2 ** attempt))
+                time.sleep(delay)
+                try:
+                    channel = self._open_channel()
+                except Exception as e:
+                    logger.error(f"连接服务器失败: {e}")
+                    continue
+                if self.session_token:
+                    try:
+                        response = channel.submit('resume_session', {'token': self.session_token}).result(
+                            RECONNECT_CONFIG['request_timeout'])
+                    except Exception as e:
+                        logger.error(f"恢复会话失败: {e}")
+                        channel.close()
+                        continue
+                    if response.get('code') == RATE_LIMITED:
+                        logger.warning("恢复登录被限流，稍后重试")
+                        channel.close()
+                        continue
+                    with self._state_lock:
+                        if response.get('success'):
+                            self.current_user = response.get('user')
+                            logger.info("已重新连接服务器并恢复登录")
+                        else:
+                            # 令牌已失效（过期或被吊销），需要重新登录
+                            logger.warning(f"重新连接后恢复登录失败: {response.get('message')}")
+                            self.session_token = None
+                            self.current_user = None
+                            self.session_expired = True
+                            self._payloads.clear()
+                            self._snapshot_user = None
+                self._channel = channel
+                logger.info(f"已重新连接到服务器: {self.host}:{self.port}")
+                return True
+            logger.error(f"重连服务器失败，已尝试 {RECONNECT_CONFIG['max_attempts']} 次")
+            return False
+    
+    def _live_channel(self):
+        """返回可用的连接，断线时自动重连；无法连接时返回 None"""
+        channel = self._channel
+        if channel is not None and channel.alive:
+            return channel
+        if channel is not None:
+            self._close_socket(channel)
+        if self.auto_reconnect and self._reconnect():
+            return self._channel
+        return None
+    
+    def submit(self, action, params=None):
+        """发送请求，立即返回 Future，结果为响应字典；连接中断时 Future 以异常结束
+        
+        多个 submit() 的请求在同一连接上并发在途，适合一次发出多个相互独立的请求。
+        """
+        track = TELEMETRY_CONFIG['enabled'] and action not in UNTRACKED_ACTIONS
+        channel = self._live_channel()
+        error = None
+        if channel is None:
+            error = NotConnectedError("未连接到服务器")
+        elif self.session_expired and action not in SESSIONLESS_ACTIONS:
+            error = SessionExpiredError("登录已失效，请重新登录")
+        if error is not None:
+            if track:
+                self.telemetry.record_error(action)
+            future = Future()
+            future.set_exception(error)
+            return future
+        logger.debug(f"发送请求: {action}, 参数: {params}")
+        
+        # 只读操作带上次响应的版本号，数据未变化时服务器只回答 not_modified
+        cache_key = None
+        cached = None
+        if is_idempotent(action):
+            cache_key = self._cache_key(action, params)
+            self._load_snapshots()
+            with self._state_lock:
+                cached = self._payloads.get(cache_key)
+            if cached is not None:
+                params = dict(params or {}, if_version=cached[0])
+        
+        result = Future()
+        started = time.perf_counter()
+        
+        def on_done(inner):
+            try:
+                response = inner.result()
+            except Exception as e:
+                # 连接已失效（I/O 线程已退出），下次请求时重连，登录状态和会话令牌保留
+                if track:
+                    self.telemetry.record_error(action)
+                result.set_exception(e)
+                return
+            if track:
+                self.telemetry.record(action, time.perf_counter() - started, getattr(inner, 'bytes_sent', 0),
+                                      getattr(inner, 'bytes_received', 0), bool(response.get('success')))
+            try:
+                result.set_result(self._handle_response(action, response, cache_key, cached))
+            except Exception as e:
+                result.set_exception(e)
+        
+        channel.submit(action, params).add_done_callback(on_done)
+        return result
+    
     def send_request(self, action, params=None):
-        """发送请求到服务器并返回响应"""
-        if not self.connected:
+        """发送请求到服务器并返回响应
+        
+        连接中断时自动重连并恢复会话；只读操作会在重连后重发一次，
+        其他操作可能已在服务器执行，只返回失败由用户确认后重试。
+        """
+        try:
+            return self.submit(action, params).result(RECONNECT_CONFIG['request_timeout'])
+        except FutureTimeoutError:
+            logger.error(f"请求超时: {action}")
+            return {'success': False, 'message': '请求超时'}
+        except NotConnectedError:
             logger.error("未连接到服务器")
             return {'success': False, 'message': '未连接到服务器'}
+        except SessionExpiredError as e:
+            logger.warning(f"请求 {action} 未发送: {e}")
+            return {'success': False, 'code': SESSION_EXPIRED, 'message': str(e)}
+        except Exception as e:
+            logger.error(f"发送请求失败: {e}")
+            if not (self.auto_reconnect and is_idempotent(action)):
+                return {'success': False, 'message': f'发送请求失败: {str(e)}'}
         
         try:
-            # 构建请求数据
-            request = {'action': action, 'params': params or {}}
-            logger.debug(f"发送请求: {action}, 参数: {params}")
-            
-            # 发送数据
-            self._send_data(request)
-            
-            # 接收响应
-            response = self._receive_data()
-            logger.debug(f"接收响应: {action}, 响应: {response}")
-            
-            # 如果是登录成功，保存当前用户信息
-            if action == 'login' and response.get('success'):
-                self.current_user = response.get('user')
-            # 如果是注销成功，清除当前用户信息
-            elif action == 'logout' and response.get('success'):
-                self.current_user = None
-            
-            # 特别处理课程数据，确保student_count字段存在
-            if action == 'get_my_courses' and response.get('success'):
-                courses = response.get('courses', [])
-                for course in courses:
-                    if 'student_count' not in course:
-                        course['student_count'] = 0
-                        logger.warning(f"课程 {course.get('course_name', '')} 缺少student_count字段")
-                    else:
-                        logger.info(f"课程 {course.get('course_name', '')} 学生人数: {course.get('student_count')}")
-            
-            return response
+            return self.submit(action, params).result(RECONNECT_CONFIG['request_timeout'])
+        except FutureTimeoutError:
+            logger.error(f"请求超时: {action}")
+            return {'success': False, 'message': '请求超时'}
+        except NotConnectedError:
+            return {'success': False, 'message': '未连接到服务器'}
+        except SessionExpiredError as e:
+            return {'success': False, 'code': SESSION_EXPIRED, 'message': str(e)}
         except Exception as e:
-            logger.error(f"发送请求失败: {e}")
-            # 发生错误时断开连接
-            self.disconnect()
+            logger.error(f"重发请求失败: {e}")
             return {'success': False, 'message': f'发送请求失败: {str(e)}'}
     
-    def _send_data(self, data):
-        """发送数据到服务器"""
-        # 序列化数据
-        json_data = json.dumps(data)
+    def send_requests(self, requests):
+        """并发发送多个相互独立的请求，按顺序返回响应列表
         
-        # 发送数据长度
-        data_length = len(json_data.encode('utf-8'))
-        self.client_socket.sendall(data_length.to_bytes(4, byteorder='big'))
+        Args:
+            requests: [(action, params), ...]
+        """
+        futures = [(action, params, self.submit(action, params)) for action, params in requests]
+        responses = []
+        for action, params, future in futures:
+            try:
+                responses.append(future.result(RECONNECT_CONFIG['request_timeout']))
+            except Exception:
+                # 超时或连接中断时逐个回退到 send_request，由其负责重连和重发
+                responses.append(self.send_request(action, params))
+        return responses
+    
+    def _start_uploader(self):
+        """启动遥测上报线程（未启用上报或已在运行时不重复启动）"""
+        if not TELEMETRY_CONFIG['enabled'] or TELEMETRY_CONFIG['upload_interval'] <= 0:
+            return
+        self._uploader_stop.clear()
+        if self._uploader is not None and self._uploader.is_alive():
+            return
+        self._uploader = threading.Thread(target=self._upload_loop, name='client-telemetry', daemon=True)
+        self._uploader.start()
+    
+    def _upload_loop(self):
+        """按固定间隔上报遥测增量，disconnect() 后退出"""
+        while not self._uploader_stop.wait(TELEMETRY_CONFIG['upload_interval']):
+            self.upload_telemetry()
+    
+    def upload_telemetry(self):
+        """把本地遥测增量上报给服务器，上报失败时并回本地下次再报
         
-        # 发送实际数据
-        self.client_socket.sendall(json_data.encode('utf-8'))
-    
-    def _receive_data(self):
-        """接收服务器返回的数据"""
-        # 接收数据长度
-        length_data = self.client_socket.recv(4)
-        if not length_data:
-            raise Exception("服务器已断开连接")
+        只在已登录且连接可用时上报，不会为上报遥测而重连。
+        """
+        if not self.connected or self.current_user is None:
+            return
+        summary = self.telemetry.drain()
+        if not summary:
+            return
         
-        # 解析数据长度
-        data_length = int.from_bytes(length_data, byteorder='big')
+        def on_done(future):
+            try:
+                uploaded = future.result().get('success')
+            except Exception:
+                uploaded = False
+            if not uploaded:
+                self.telemetry.merge(summary)
         
-        # 接收实际数据
-        data = b''
-        while len(data) < data_length:
-            packet = self.client_socket.recv(data_length - len(data))
-            if not packet:
-                raise Exception("服务器已断开连接")
-            data += packet
+        self.submit('report_telemetry', {'summary': summary}).add_done_callback(on_done)
+    
+    @staticmethod
+    def _cache_key(action, params):
+        """条件请求缓存与本地快照的请求键"""
+        return json.dumps([action, params or {}], sort_keys=True, default=str)
+    
+    def _load_snapshots(self):
+        """当前用户的本地快照尚未载入时载入到条件请求缓存（不覆盖已有的较新响应）"""
+        with self._state_lock:
+            user_id = (self.current_user or {}).get('id')
+            if user_id is None or user_id == self._snapshot_user:
+                return
+        snapshots = self.snapshots.load(user_id)
+        with self._state_lock:
+            if (self.current_user or {}).get('id') != user_id:
+                return
+            self._snapshot_user = user_id
+            for cache_key, entry in snapshots.items():
+                if cache_key not in self._payloads:
+                    self._payloads[cache_key] = entry
+                    self._payloads.move_to_end(cache_key, last=False)
+            while len(self._payloads) > PAYLOAD_CACHE_CONFIG['max_entries']:
+                self._payloads.popitem(last=False)
+        if snapshots:
+            logger.info(f"已载入 {len(snapshots)} 条本地快照")
+    
+    def snapshot(self, action, params=None):
+        """返回上次成功响应的副本（内存缓存或本地快照），没有时返回 None
         
-        # 解码数据并解析JSON
-        return json.loads(data.decode('utf-8'))
-    
-    # 快捷方法：登录
-    def login(self, username, password):
-        """登录到系统"""
-        return self.send_request('login', {'username': username, 'password': password})
-    
-    # 新增：快捷方法：注册
-    def register(self, username, password, role, name):
-        """注册新用户"""
-        return self.send_request('register', {
-            'username': username,
-            'password': password,
-            'role': role,
-            'name': name
-        })
-    
-    # 快捷方法：注销
-    def logout(self):
-        """退出登录"""
-        return self.send_request('logout')
-    
-    # 快捷方法：获取学生信息
-    def get_student_info(self, student_id=None):
-        """获取学生信息"""
-        params = {} if student_id is None else {'student_id': student_id}
-        return self.send_request('get_student_info', params)
-    
-    # 快捷方法：更新学生信息
-    def update_student_info(self, student_id=None, **kwargs):
-        """更新学生信息"""
-        params = kwargs
-        if student_id is not None:
-            params['student_id'] = student_id
-        return self.send_request('update_student_info', params)
-    
-    # 快捷方法：获取我的成绩
-    def get_my_scores(self):
-        """获取当前学生的成绩"""
-        return self.send_request('get_my_scores')
-    
-    # 快捷方法：获取我的课程（教师）
-    def get_my_courses(self):
-        """获取当前教师的课程"""
-        return self.send_request('get_my_courses')
-    
-    # 快捷方法：获取课程成绩（教师）
-    def get_course_scores(self, course_id, semester):
-        """获取指定课程和学期的成绩"""
-        return self.send_request('get_course_scores', {'course_id': course_id, 'semester': semester})
-    
-    # 快捷方法：获取课程学生列表（教师）
-    def get_course_students(self, course_id):
-        """获取指定课程的学生列表"""
-        return self.send_request('get_course_students', {'course_id': course_id})
-    
-    # 快捷方法：更新成绩（教师）
-    def update_score(self, score_id, score=None, exam_time=None):
-        """根据成绩ID更新成绩或考试时间（教师）"""
-        params = {'score_id': score_id}
-        if score is not None:
-            params['score'] = score
-        if exam_time is not None:
-            params['exam_time'] = exam_time
-        return self.send_request('update_score', params)
+        不访问服务器，用于界面启动时先显示上次的数据；随后的正常请求会带上快照的版本号，
+        数据已变化时取回新数据。
+        """
+        self._load_snapshots()
+        with self._state_lock:
+            cached = self._payloads.get(self._cache_key(action, params))
+        return copy.deepcopy(cached[1]) if cached is not None else None
+    
+    def _handle_response(self, action, response, cache_key, cached):
+        """处理响应中的登录状态和条件请求缓存（在 I/O 线程中调用）"""
+        logger.debug(f"接收响应: {action}, 响应: {response}")
         
-    # 新增：通过学生ID、课程ID和学期更新成绩
-    def update_score_by_student_course(self, student_id, course_id, semester, score=None, exam_time=None):
-        """根据学生ID、课程ID和学期更新成绩（教师）"""
-        params = {
-            'student_id': student_id,
-            'course_id': course_id,
-            'semester': semester
-        }
-        if score is not None:
-            params['score'] = score
-        if exam_time is not None:
-            params['exam_time'] = exam_time
-        return self.send_request('update_score_by_student_course', params)
-    
-    # 快捷方法：获取所有用户（管理员）
-    def get_all_users(self):
-        """获取所有用户信息（管理员）"""
-        return self.send_request('get_all_users')
-    
-    # 新增：快捷方法：搜索用户（管理员）
-    def search_users(self, keyword: str):
-        """根据关键词搜索用户（管理员）"""
-        return self.send_request('search_users', {'keyword': keyword})
-    
-    # 学生管理（管理员）
-    def get_all_students_admin(self):
-        return self.send_request('get_all_students')
-    
-    def search_students_admin(self, keyword: str):
-        return self.send_request('search_students', {'keyword': keyword})
-    
-    def add_student_admin(self, student):
-        return self.send_request('add_student', student)
-    
-    def update_student_admin(self, student):
-        return self.send_request('update_student', student)
-    
-    def delete_student_admin(self, student_id):
-        return self.send_request('delete_student', {'student_id': student_id})
-    
-    # 教师管理（管理员）
-    def get_all_teachers_admin(self):
-        return self.send_request('get_all_teachers')
-    
-    def search_teachers_admin(self, keyword: str):
-        return self.send_request('search_teachers', {'keyword': keyword})
-    
-    def add_teacher_admin(self, teacher):
-        return self.send_request('add_teacher', teacher)
-    
-    def update_teacher_admin(self, teacher):
-        return self.send_request('update_teacher', teacher)
-    
-    def delete_teacher_admin(self, teacher_id):
-        return self.send_request('delete_teacher', {'teacher_id': teacher_id})
-    
-    # 课程管理（管理员）
-    def add_course_admin(self, code, name, credit, teacher_id, semester, time, location):
-        """添加课程（管理员）"""
-        return self.send_request('add_course', {
-            'code': code,
-            'name': name,
-            'credit': credit,
-            'teacher_id': teacher_id,
-            'semester': semester,
-            'time': time,
-            'location': location
-        })
+        if cache_key is not None and response.get('not_modified') and cached is not None:
+            with self._state_lock:
+                if cache_key in self._payloads:
+                    self._payloads.move_to_end(cache_key)
+            return copy.deepcopy(cached[1])
+        
+        with self._state_lock:
+            # 如果是登录或恢复会话成功，保存当前用户信息和会话令牌
+            if action in ('login', 'resume_session') and response.get('success'):
+                self.session_expired = False
+                if (self.current_user or {}).get('id') != (response.get('user') or {}).get('id'):
+                    self._payloads.clear()
+                    self._snapshot_user = None
+                self.current_user = response.get('user')
+                self.session_token = response.get('token')
+            # 恢复会话失败说明令牌已失效（被限流时保留令牌，稍后可再试）
+            elif action == 'resume_session' and response.get('code') != RATE_LIMITED:
+                self.session_token = None
+            # 如果是注销成功，清除当前用户信息、会话令牌和缓存的响应
+            elif action == 'logout' and response.get('success'):
+                self.current_user = None
+                self.session_token = None
+                self.session_expired = False
+                self._payloads.clear()
+                self._snapshot_user = None
+        
+        # 特别处理课程数据，确保student_count字段存在
+        if action == 'get_my_courses' and response.get('success'):
+            courses = response.get('courses', [])
+            for course in courses:
+                if 'student_count' not in course:
+                    course['student_count'] = 0
+                    logger.warning(f"课程 {course.get('course_name', '')} 缺少student_count字段")
+                else:
+                    logger.info(f"课程 {course.get('course_name', '')} 学生人数: {course.get('student_count')}")
+        
+        if cache_key is not None:
+            self._remember(cache_key, response)
+        return response
     
-    def update_course_admin(self, course_id, code, name, credit, teacher_id, semester, time, location):
-        """更新课程（管理员）"""
+    def _remember(self, cache_key, response):
+        """保存带版本号的成功响应，超出上限时淘汰最久未使用的"""
+        with self._state_lock:
+            user_id = (self.current_user or {}).get('id')
+            if not response.get('success') or response.get('version') is None:
+                self._payloads.pop(cache_key, None)
+                self.snapshots.discard(user_id, cache_key)
+                return
+            entry = (response['version'], copy.deepcopy(response))
+            self._payloads[cache_key] = entry
+            self._payloads.move_to_end(cache_key)
+            while len(self._payloads) > PAYLOAD_CACHE_CONFIG['max_entries']:
+                self._payloads.popitem(last=False)
+        self.snapshots.save(user_id, cache_key, *entry)
+    
+    def update_course_admin(self, course_id, code, name, credit, teacher_id, semester, time, location, capacity=None):
+        """更新课程（管理员），capacity 为 None 表示不修改，0 表示不限人数"""
         # 首先尝试通过服务器更新
-        # 确保teacher_id是整数类型
+        response = super().update_course_admin(course_id, code, name, credit, teacher_id, semester, time, location, capacity)
         teacher_id_int = int(teacher_id) if isinstance(teacher_id, str) and teacher_id.isdigit() else teacher_id
-        response = self.send_request('update_course', {
-            'course_id': course_id,
-            'code': code,
-            'name': name,
-            'credit': credit,
-            'teacher_id': teacher_id_int,
-            'semester': semester,
-            'time': time,
-            'location': location
-        })
         
         # 如果服务器返回失败，但实际上课程信息可能已经是最新的
         # 我们直接检查数据库中的课程信息是否正确
@@ -301,52 +593,6 @@ class Client:
                 logger.error(f"验证课程更新结果时出错: {e}")
                 
         return response
-    
-    def delete_course_admin(self, course_id):
-        """删除课程（管理员）"""
-        return self.send_request('delete_course', {'course_id': course_id})
-    
-    def get_all_courses_admin(self):
-        """获取所有课程（管理员）"""
-        return self.send_request('get_all_courses', {})
-    
-    def search_courses_admin(self, keyword):
-        """搜索课程（管理员）"""
-        return self.send_request('search_courses', {'keyword': keyword})
-    
-    # 快捷方法：获取学生的课程详情
-    def get_student_courses(self):
-        """获取当前学生的课程详情"""
-        return self.send_request('get_student_courses')
-
-    # 个人密码修改（登录用户）
-    def change_password(self, new_password: str):
-        return self.send_request('change_password', {'password': new_password})
-    
-    # 快捷方法：删除用户（管理员）
-    def delete_user(self, user_id):
-        """删除用户（管理员）"""
-        return self.send_request('delete_user', {'user_id': user_id})
-    
-    # 快捷方法：更新用户信息（管理员）
-    def update_user(self, user_id, **kwargs):
-        """更新用户信息（管理员）"""
-        params = kwargs
-        params['user_id'] = user_id
-        return self.send_request('update_user', params)
-    
-    # 学生选课相关方法
-    def get_available_courses(self, semester):
-        """获取可选课程列表（学生）"""
-        return self.send_request('get_available_courses', {'semester': semester})
-    
-    def enroll_course(self, course_id, semester):
-        """选课（学生）"""
-        return self.send_request('enroll_course', {'course_id': course_id, 'semester': semester})
-    
-    def unenroll_course(self, course_id, semester):
-        """退课（学生）"""
-        return self.send_request('unenroll_course', {'course_id': course_id, 'semester': semester})
 
 
 # 全局客户端实例
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""客户端快捷方法，同步 Client 与异步 AsyncClient 共用
+
+每个方法只组装参数并返回 self.send_request(...) 的结果：Client 中为响应字典，
+AsyncClient 中为可 await 的协程。
+"""
+
+
+class ClientApiMixin:
+    """客户端快捷方法，子类需提供 send_request(action, params) 和 session_token 属性"""
+    
+    # 快捷方法：登录
+    def login(self, username, password):
+        """登录到系统"""
+        return self.send_request('login', {'username': username, 'password': password})
+    
+    # 快捷方法：凭会话令牌恢复登录（断线重连后调用，无需再次输入密码）
+    def resume_session(self, token=None):
+        """恢复登录，token 为空时使用上次登录保存的令牌"""
+        return self.send_request('resume_session', {'token': token or self.session_token})
+    
+    # 新增：快捷方法：注册
+    def register(self, username, password, role, name):
+        """注册新用户"""
+        return self.send_request('register', {
+            'username': username,
+            'password': password,
+            'role': role,
+            'name': name
+        })
+    
+    # 快捷方法：注销
+    def logout(self):
+        """退出登录"""
+        return self.send_request('logout')
+    
+    # 快捷方法：获取学生信息
+    def get_student_info(self, student_id=None):
+        """获取学生信息"""
+        params = {} if student_id is None else {'student_id': student_id}
+        return self.send_request('get_student_info', params)
+    
+    # 快捷方法：更新学生信息
+    def update_student_info(self, student_id=None, **kwargs):
+        """更新学生信息"""
+        params = kwargs
+        if student_id is not None:
+            params['student_id'] = student_id
+        return self.send_request('update_student_info', params)
+    
+    # 快捷方法：获取我的成绩
+    def get_my_scores(self):
+        """获取当前学生的成绩"""
+        return self.send_request('get_my_scores')
+    
+    # 快捷方法：获取我的课程（教师）
+    def get_my_courses(self):
+        """获取当前教师的课程"""
+        return self.send_request('get_my_courses')
+    
+    # 快捷方法：获取课程成绩（教师）
+    def get_course_scores(self, course_id, semester):
+        """获取指定课程和学期的成绩"""
+        return self.send_request('get_course_scores', {'course_id': course_id, 'semester': semester})
+    
+    # 快捷方法：获取课程学生列表（教师）
+    def get_course_students(self, course_id):
+        """获取指定课程的学生列表"""
+        return self.send_request('get_course_students', {'course_id': course_id})
+    
+    # 快捷方法：更新成绩（教师）
+    def update_score(self, score_id, score=None, exam_time=None):
+        """根据成绩ID更新成绩或考试时间（教师）"""
+        params = {'score_id': score_id}
+        if score is not None:
+            params['score'] = score
+        if exam_time is not None:
+            params['exam_time'] = exam_time
+        return self.send_request('update_score', params)
+        
+    # 新增：通过学生ID、课程ID和学期更新成绩
+    def update_score_by_student_course(self, student_id, course_id, semester, score=None, exam_time=None):
+        """根据学生ID、课程ID和学期更新成绩（教师）"""
+        params = {
+            'student_id': student_id,
+            'course_id': course_id,
+            'semester': semester
+        }
+        if score is not None:
+            params['score'] = score
+        if exam_time is not None:
+            params['exam_time'] = exam_time
+        return self.send_request('update_score_by_student_course', params)
+    
+    def bulk_upsert_scores(self, rows):
+        """批量导入成绩（教师/管理员）
+        
+        rows: [{'student_no': 学号, 'course_id': 课程ID, 'semester': 学期, 'score': 成绩}, ...]
+        返回结果中 results 与 rows 一一对应
+        """
+        return self.send_request('bulk_upsert_scores', {'rows': rows})
+    
+    # 快捷方法：GPA 排名（管理员）
+    def get_gpa_ranking(self, class_name=None, major=None, semester=None):
+        """获取班级/专业/学期的GPA排名（管理员）"""
+        return self.send_request('get_gpa_ranking', {
+            'class_name': class_name,
+            'major': major,
+            'semester': semester
+        })
+    
+    # 快捷方法：学期课程成绩统计（管理员）
+    def get_semester_statistics(self, semester, department=None):
+        """获取某学期所有课程的成绩统计表（管理员）"""
+        params = {'semester': semester}
+        if department:
+            params['department'] = department
+        return self.send_request('get_semester_statistics', params)
+    
+    # 快捷方法：获取登录限流计数（管理员）
+    def get_rate_limit_stats(self):
+        """获取登录限流计数（管理员）"""
+        return self.send_request('get_rate_limit_stats')
+    
+    # 快捷方法：数据库备份列表与恢复（管理员，在服务器上执行）
+    def list_backups(self):
+        """获取服务器备份目录中的备份文件名（管理员）"""
+        return self.send_request('list_backups')
+    
+    def restore_database(self, backup_name, use_docker=True):
+        """用服务器上的备份文件恢复数据库（管理员）"""
+        return self.send_request('restore_database', {'backup_name': backup_name, 'use_docker': use_docker})
+    
+    # 快捷方法：获取全体客户端的请求延迟汇总（管理员）
+    def get_client_telemetry(self):
+        """获取全体客户端上报的各操作请求数、错误数和 p50/p95/p99 延迟（管理员）"""
+        return self.send_request('get_client_telemetry')
+    
+    def reset_client_telemetry(self):
+        """清空服务器上的客户端遥测汇总（管理员）"""
+        return self.send_request('reset_client_telemetry')
+    
+    # 快捷方法：获取所有用户（管理员）
+    def get_all_users(self):
+        """获取所有用户信息（管理员）"""
+        return self.send_request('get_all_users')
+    
+    # 新增：快捷方法：搜索用户（管理员）
+    def search_users(self, keyword: str):
+        """根据关键词搜索用户（管理员）"""
+        return self.send_request('search_users', {'keyword': keyword})
+    
+    # 快捷方法：输入联想（管理员/教师）
+    def suggest(self, field, prefix, limit=10):
+        """获取输入联想，field 可选 student_id、student_name、teacher_id、teacher_name、course_code"""
+        return self.send_request('suggest', {'field': field, 'prefix': prefix, 'limit': limit})
+    
+    # 学生管理（管理员）
+    def get_all_students_admin(self):
+        return self.send_request('get_all_students')
+    
+    def search_students_admin(self, keyword: str):
+        return self.send_request('search_students', {'keyword': keyword})
+    
+    def add_student_admin(self, student):
+        return self.send_request('add_student', student)
+    
+    def bulk_provision_admin(self, role, rows):
+        """批量开户（管理员），rows 为 [{'number', 'name', 'username', 'password', ...档案字段}, ...]"""
+        return self.send_request('bulk_provision', {'role': role, 'rows': rows})
+
+    def update_student_admin(self, student):
+        return self.send_request('update_student', student)
+    
+    def delete_student_admin(self, student_id):
+        return self.send_request('delete_student', {'student_id': student_id})
+    
+    # 教师管理（管理员）
+    def get_all_teachers_admin(self):
+        return self.send_request('get_all_teachers')
+    
+    def search_teachers_admin(self, keyword: str):
+        return self.send_request('search_teachers', {'keyword': keyword})
+    
+    def add_teacher_admin(self, teacher):
+        return self.send_request('add_teacher', teacher)
+    
+    def update_teacher_admin(self, teacher):
+        return self.send_request('update_teacher', teacher)
+    
+    def delete_teacher_admin(self, teacher_id):
+        return self.send_request('delete_teacher', {'teacher_id': teacher_id})
+    
+    # 课程管理（管理员）
+    def add_course_admin(self, code, name, credit, teacher_id, semester, time, location, capacity=None):
+        """添加课程（管理员），capacity 为空或 0 表示不限人数"""
+        return self.send_request('add_course', {
+            'code': code,
+            'name': name,
+            'credit': credit,
+            'teacher_id': teacher_id,
+            'semester': semester,
+            'time': time,
+            'location': location,
+            'capacity': capacity
+        })
+    
+    def update_course_admin(self, course_id, code, name, credit, teacher_id, semester, time, location, capacity=None):
+        """更新课程（管理员），capacity 为 None 表示不修改，0 表示不限人数"""
+        # 确保teacher_id是整数类型
+        teacher_id_int = int(teacher_id) if isinstance(teacher_id, str) and teacher_id.isdigit() else teacher_id
+        return self.send_request('update_course', {
+            'course_id': course_id,
+            'code': code,
+            'name': name,
+            'credit': credit,
+            'teacher_id': teacher_id_int,
+            'semester': semester,
+            'time': time,
+            'location': location,
+            'capacity': capacity
+        })
+    
+    def delete_course_admin(self, course_id):
+        """删除课程（管理员）"""
+        return self.send_request('delete_course', {'course_id': course_id})
+    
+    def get_all_courses_admin(self):
+        """获取所有课程（管理员）"""
+        return self.send_request('get_all_courses', {})
+    
+    def search_courses_admin(self, keyword):
+        """搜索课程（管理员）"""
+        return self.send_request('search_courses', {'keyword': keyword})
+    
+    # 快捷方法：获取学生的课程详情
+    def get_student_courses(self):
+        """获取当前学生的课程详情"""
+        return self.send_request('get_student_courses')
+
+    # 个人密码修改（登录用户）
+    def change_password(self, new_password: str):
+        return self.send_request('change_password', {'password': new_password})
+    
+    # 快捷方法：删除用户（管理员）
+    def delete_user(self, user_id):
+        """删除用户（管理员）"""
+        return self.send_request('delete_user', {'user_id': user_id})
+    
+    # 快捷方法：更新用户信息（管理员）
+    def update_user(self, user_id, **kwargs):
+        """更新用户信息（管理员）"""
+        params = kwargs
+        params['user_id'] = user_id
+        return self.send_request('update_user', params)
+    
+    # 学生选课相关方法
+    def get_available_courses(self, semester, department=None, weekday=None, start_minute=None,
+                              end_minute=None, offset=0, limit=None):
+        """获取可选课程列表（学生），可按院系、上课星期/时间段筛选并分页"""
+        return self.send_request('get_available_courses', {
+            'semester': semester,
+            'department': department,
+            'weekday': weekday,
+            'start_minute': start_minute,
+            'end_minute': end_minute,
+            'offset': offset,
+            'limit': limit
+        })
+    
+    def enroll_course(self, course_id, semester):
+        """选课（学生）"""
+        return self.send_request('enroll_course', {'course_id': course_id, 'semester': semester})
+    
+    def unenroll_course(self, course_id, semester):
+        """退课（学生）"""
+        return self.send_request('unenroll_course', {'course_id': course_id, 'semester': semester})
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""数据集版本模块，为条件请求提供单调递增的版本号
+
+每个逻辑数据集（用户、学生、教师、课程、选课、成绩及单门课程的成绩等）有一个版本号，
+写操作成功后递增。客户端带上次拿到的版本号请求时，若所依赖的数据集都没有变化，
+服务器直接回答"未修改"，不查询数据库也不序列化结果。
+
+版本号取自同一个全局计数器，计数器以服务器启动时的毫秒时间戳为起点：
+一个请求依赖多个数据集时取其中最大的版本号，任一数据集变化都会使它增大；
+服务器重启后的版本号必然大于重启前签发的任何版本号，客户端缓存会自然失效。
+"""
+
+import time
+import threading
+
+def course_scores(course_id):
+    """单门课程成绩的数据集名称（课程ID统一为整数，"3" 与 3 视为同一课程）"""
+    try:
+        course_id = int(course_id)
+    except (TypeError, ValueError):
+        pass
+    return f"scores:{course_id}"
+
+
+class DatasetVersions:
+    """数据集版本表"""
+
+    def __init__(self):
+        """初始化，以启动时间为版本号起点"""
+        self._counter = int(time.time() * 1000)
+        self._floor = self._counter  # bump_all 之后所有数据集的最低版本
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def version(self, keys):
+        """返回依赖这些数据集的请求当前的版本号"""
+        with self._lock:
+            return max([self._floor] + [self._versions.get(key, self._floor) for key in keys])
+
+    def bump(self, *keys):
+        """标记数据集已变更；写入单门课程成绩时应同时标记 'scores' 和 course_scores(id)"""
+        with self._lock:
+            self._counter += 1
+            for key in keys:
+                self._versions[key] = self._counter
+
+    def bump_all(self):
+        """标记全部数据集已变更（级联删除等影响面难以界定的写操作）"""
+        with self._lock:
+            self._counter += 1
+            self._floor = self._counter
+            self._versions.clear()
+
+
+# 创建全局数据集版本实例
+dataset_versions = DatasetVersions()
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""客户端与服务器共用的协议常量（响应中的 code 字段取值）
+
+服务器和客户端都从这里导入，客户端无需导入服务器端模块。
+"""
+
+# 被限流：稍后重试即可，凭据（会话令牌）仍然有效
+RATE_LIMITED = 'rate_limited'
+
+# 会话已失效：需要重新登录
+SESSION_EXPIRED = 'session_expired'
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""登录限流模块，按用户名和客户端地址维护内存令牌桶
+
+每个键一个令牌桶，每次尝试消耗一个令牌，令牌按固定速率恢复。桶数量有上限，
+超出时淘汰最久未使用的桶（被淘汰的桶相当于已恢复满额，不影响正确性）。
+限流检查只访问内存，被拒绝的尝试不会访问数据库。
+"""
+
+import time
+import threading
+import logging
+from collections import OrderedDict
+from config.config import RATE_LIMIT_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('rate_limiter')
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, capacity, now):
+        """初始化为满桶"""
+        self.tokens = float(capacity)
+        self.updated_at = now
+
+    def refill(self, capacity, refill_rate, now):
+        """按流逝时间恢复令牌"""
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * refill_rate)
+        self.updated_at = now
+
+
+class RateLimiter:
+    """多维度令牌桶限流器，如同时按用户名和客户端地址限流"""
+
+    def __init__(self, rules=None, max_buckets=None, enabled=None):
+        """初始化限流器
+
+        Args:
+            rules: 维度名 -> {'capacity': 桶容量, 'refill_rate': 每秒恢复的令牌数}
+            max_buckets: 每个维度最多保留的令牌桶数
+            enabled: 是否启用限流
+        """
+        if rules is None:
+            rules = {kind: RATE_LIMIT_CONFIG[kind] for kind in ('username', 'address')}
+        self.rules = rules
+        self.max_buckets = max_buckets or RATE_LIMIT_CONFIG['max_buckets']
+        self.enabled = RATE_LIMIT_CONFIG['enabled'] if enabled is None else enabled
+        self._buckets = {kind: OrderedDict() for kind in rules}
+        self._lock = threading.Lock()
+        self._stats = {kind: {'allowed': 0, 'rejected': 0, 'evicted': 0} for kind in rules}
+
+    def _bucket(self, kind, key, now):
+        """取出（或新建）令牌桶并标记为最近使用，调用方需持有锁"""
+        buckets = self._buckets[kind]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(self.rules[kind]['capacity'], now)
+            if len(buckets) > self.max_buckets:
+                buckets.popitem(last=False)
+                self._stats[kind]['evicted'] += 1
+        else:
+            buckets.move_to_end(key)
+            bucket.refill(self.rules[kind]['capacity'], self.rules[kind]['refill_rate'], now)
+        return bucket
+
+    def allow(self, **keys):
+        """尝试一次操作，各维度都有令牌时消耗令牌并返回 True
+
+        用法: limiter.allow(username='admin', address='10.0.0.1')，值为空的维度不参与检查
+        """
+        if not self.enabled:
+            return True
+        keys = {kind: key for kind, key in keys.items() if key and kind in self.rules}
+        now = time.monotonic()
+        with self._lock:
+            buckets = {kind: self._bucket(kind, key, now) for kind, key in keys.items()}
+            limited = [kind for kind, bucket in buckets.items() if bucket.tokens < 1]
+            if limited:
+                for kind in limited:
+                    self._stats[kind]['rejected'] += 1
+            else:
+                for kind, bucket in buckets.items():
+                    bucket.tokens -= 1
+                    self._stats[kind]['allowed'] += 1
+        if limited:
+            logger.warning(f"请求被限流: {keys}")
+            return False
+        return True
+
+    def stats(self):
+        """返回各维度的计数和当前令牌桶数"""
+        with self._lock:
+            return {
+                kind: dict(self._stats[kind], buckets=len(self._buckets[kind]))
+                for kind in self.rules
+            }
+
+    def reset(self):
+        """清空所有令牌桶"""
+        with self._lock:
+            for buckets in self._buckets.values():
+                buckets.clear()
+
+
+# 创建全局登录限流器实例
+login_rate_limiter = RateLimiter()
@@ -7,18 +7,78 @@ import socket
 import threading
 import json
 import logging
-from config.config import NETWORK_CONFIG
+from config.config import NETWORK_CONFIG, SEARCH_CONFIG
 from models.user import User
+from models.user_session import UserSession
+from utils.passwords import PasswordHasherBusy
 from models.student import Student
 from models.teacher import Teacher
 from models.courses import Course
-from models.scores import Score
-from models.enrollment import Enrollment
+from models.scores import Score, score_stats_cache
+from models.provisioning import Provisioning
+from models.enrollment import Enrollment, ENROLL_OK
+from models.enrollment_engine import enrollment_engine
+from database.db_manager import db_manager
+from database.entity_cache import clear_all_caches
+from database.search_index import search_index
+from database.course_catalogue import course_catalogue
+from network.session import Session, mark_profiles_changed, mark_courses_changed
+from network.rate_limiter import login_rate_limiter
+from network.protocol import RATE_LIMITED
+from network.dataset_versions import dataset_versions, course_scores
+from network.telemetry import telemetry_aggregator
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('server')
 
+# 支持条件请求的只读操作 -> (允许的角色, 依赖的数据集或由参数计算数据集的函数)
+READ_DATASETS = {
+    'get_all_users': (('admin',), ('users',)),
+    'search_users': (('admin',), ('users',)),
+    'get_all_students': (('admin',), ('students',)),
+    'search_students': (('admin',), ('students',)),
+    'get_all_teachers': (('admin',), ('teachers',)),
+    'search_teachers': (('admin',), ('teachers',)),
+    'get_all_courses': (('admin',), ('courses', 'teachers', 'enrollments')),
+    'search_courses': (('admin',), ('courses', 'teachers', 'enrollments')),
+    'get_student_info': (('admin', 'student'), ('students',)),
+    'get_my_scores': (('student',), ('scores', 'courses', 'teachers')),
+    'get_student_courses': (('student',), ('enrollments', 'courses', 'teachers')),
+    'get_available_courses': (('student',), ('enrollments', 'courses', 'teachers')),
+    'get_my_courses': (('teacher',), ('courses', 'enrollments', 'teachers')),
+    # 课程归属变化会更新 courses 版本，教师失去课程后不会再收到"未修改"
+    'get_course_students': (('teacher',), ('enrollments', 'students', 'courses')),
+    'get_course_scores': (('teacher',), lambda params: (course_scores(params.get('course_id')), 'students', 'courses')),
+    'get_gpa_ranking': (('admin',), ('scores', 'students', 'courses', 'teachers')),
+    'get_semester_statistics': (('admin',), ('scores', 'students', 'courses', 'teachers'))
+}
+
+# 写操作成功后需要更新版本的数据集，'*' 表示全部（级联删除）；
+# 单门课程的成绩版本在各成绩写操作中按课程ID更新
+WRITE_DATASETS = {
+    'register': ('users',),
+    'update_user': ('users',),
+    'delete_user': '*',
+    'bulk_provision': ('users', 'students', 'teachers'),
+    'add_student': ('students',),
+    'update_student': ('students',),
+    'update_student_info': ('students',),
+    'delete_student': '*',
+    'add_teacher': ('teachers',),
+    'update_teacher': ('teachers',),
+    'delete_teacher': ('teachers', 'courses'),
+    'add_course': ('courses',),
+    'update_course': ('courses',),
+    'delete_course': '*',
+    'restore_database': '*',
+    'update_score': ('scores',),
+    'update_score_by_student_course': ('scores', 'enrollments'),
+    'bulk_upsert_scores': ('scores', 'enrollments'),
+    'enroll_course': ('enrollments',),
+    'unenroll_course': ('enrollments',)
+}
+
 
 class Server:
     """网络服务端类，处理客户端连接和请求"""
@@ -89,7 +149,7 @@ class Server:
     
     def handle_client(self, client_socket, client_address):
         """处理客户端请求"""
-        current_user = None
+        session = None
         
         try:
             while self.running:
@@ -104,14 +164,18 @@ class Server:
                 params = request.get('params', {})
                 
                 # 根据操作类型处理请求
-                response = self.process_request(action, params, current_user)
+                response = self.process_request(action, params, session, client_address)
+                
+                # 原样带回请求编号，客户端在一个连接上并发多个请求时据此匹配响应
+                if 'request_id' in request:
+                    response['request_id'] = request['request_id']
                 
-                # 如果是登录操作，更新当前用户
-                if action == 'login' and response.get('success'):
-                    current_user = response.get('user')
-                # 如果是注销操作，清除当前用户
+                # 如果是登录或恢复会话操作，创建会话并解析用户档案
+                if action in ('login', 'resume_session') and response.get('success'):
+                    session = Session(response.get('user'), client_address, response.get('token'))
+                # 如果是注销操作，清除会话
                 elif action == 'logout' and response.get('success'):
-                    current_user = None
+                    session = None
                 
                 # 发送响应
                 self.send_data(client_socket, response)
@@ -167,30 +231,88 @@ class Server:
             # 序列化数据，使用自定义编码器
             json_data = json.dumps(data, cls=DateTimeEncoder)
             
-            # 发送数据长度
-            data_length = len(json_data.encode('utf-8'))
-            client_socket.sendall(data_length.to_bytes(4, byteorder='big'))
-            
-            # 发送实际数据
-            client_socket.sendall(json_data.encode('utf-8'))
+            # 长度前缀与数据合并为一次写入，分两次写入会触发 Nagle 算法与延迟确认，每个响应多等约 40ms
+            payload = json_data.encode('utf-8')
+            client_socket.sendall(len(payload).to_bytes(4, byteorder='big') + payload)
         except Exception as e:
             logger.error(f"发送数据失败: {e}")
     
-    def process_request(self, action, params, current_user):
-        """处理请求并返回响应"""
+    def reset_caches(self):
+        """清空服务器的全部内存缓存并重新读取表结构（数据库被整体替换后调用）"""
+        clear_all_caches()
+        search_index.invalidate()
+        course_catalogue.invalidate()
+        score_stats_cache.invalidate()
+        enrollment_engine.invalidate()
+        db_manager.refresh_schema()
+        logger.info("已清空服务器缓存")
+    
+    def process_request(self, action, params, session, client_address=None):
+        """处理请求并返回响应
+        
+        只读操作带 if_version 且所依赖的数据集均未变化时直接返回 not_modified；
+        其余只读操作的响应附带当前版本号，写操作成功后更新相关数据集的版本。
+        """
+        read = READ_DATASETS.get(action)
+        version = None
+        if read and session and session.role in read[0]:
+            keys = read[1](params) if callable(read[1]) else read[1]
+            # 先取版本再查询：查询期间发生的写入会使下次请求重新获取
+            version = dataset_versions.version(keys)
+            if params.get('if_version') == version:
+                return {'success': True, 'not_modified': True, 'version': version}
+        
+        response = self.handle_action(action, params, session, client_address)
+        
+        if version is not None and response.get('success'):
+            response['version'] = version
+        elif action in WRITE_DATASETS and response.get('success'):
+            if WRITE_DATASETS[action] == '*':
+                dataset_versions.bump_all()
+            else:
+                dataset_versions.bump(*WRITE_DATASETS[action])
+        return response
+    
+    def handle_action(self, action, params, session, client_address=None):
+        """按操作类型分派请求"""
+        current_user = session.user if session else None
+        address = client_address[0] if client_address else None
+        
         # 处理登录请求
         if action == 'login':
             username = params.get('username')
             password = params.get('password')
             
-            user = User.login(username, password)
+            # 限流检查只访问内存，被拒绝的尝试不会查询数据库
+            if not login_rate_limiter.allow(username=username, address=address):
+                return {'success': False, 'code': RATE_LIMITED, 'message': '尝试次数过多，请稍后再试'}
+            
+            try:
+                user = User.login(username, password)
+            except PasswordHasherBusy:
+                return {'success': False, 'message': '登录人数过多，请稍后重试'}
             if user:
-                return {'success': True, 'user': user}
+                # 签发会话令牌，断线重连时凭令牌恢复登录；签发失败不影响本次登录
+                token, expires_at = UserSession.issue(user['id'], client_address)
+                return {'success': True, 'user': user, 'token': token, 'expires_at': expires_at}
             else:
                 return {'success': False, 'message': '用户名或密码错误'}
         
+        # 凭会话令牌恢复登录（未登录也可执行）
+        elif action == 'resume_session':
+            if not login_rate_limiter.allow(address=address):
+                return {'success': False, 'code': RATE_LIMITED, 'message': '尝试次数过多，请稍后再试'}
+            token = params.get('token')
+            user = UserSession.resume(token)
+            if user:
+                return {'success': True, 'user': user, 'token': token}
+            else:
+                return {'success': False, 'message': '会话已失效，请重新登录'}
+        
         # 处理注销请求
         elif action == 'logout':
+            if session and session.token:
+                UserSession.revoke(session.token)
             return {'success': True, 'message': '注销成功'}
         
         # 处理注册请求（未登录也可执行）
@@ -200,6 +322,9 @@ class Server:
             role = params.get('role')
             name = params.get('name') or username
             
+            if not login_rate_limiter.allow(address=address):
+                return {'success': False, 'code': RATE_LIMITED, 'message': '尝试次数过多，请稍后再试'}
+            
             # 服务端基础校验：密码长度
             if password is None or len(password) < 6:
                 return {'success': False, 'message': '密码长度不得小于6位'}
@@ -227,6 +352,9 @@ class Server:
         elif action == 'delete_user' and current_user['role'] == 'admin':
             user_id = params.get('user_id')
             success = User.delete_user(user_id)
+            if success:
+                mark_profiles_changed()
+                mark_courses_changed()
             return {'success': success, 'message': '删除成功' if success else '删除失败'}
         
         # 更新用户信息操作 (管理员权限)
@@ -240,6 +368,9 @@ class Server:
             
             # 调用User模型的update_user方法
             success = User.update_user(user_id, name=name, password=password, role=role, email=email)
+            if success and password is not None:
+                # 密码被重置后，该用户已签发的令牌全部失效
+                UserSession.revoke_user(user_id)
             return {'success': success, 'message': '更新成功' if success else '更新失败'}
         
         # 新增：搜索用户（管理员权限）
@@ -248,12 +379,36 @@ class Server:
             users = User.search_users(keyword)
             return {'success': True, 'users': users}
         
+        # 输入联想：学号、学生姓名、教师编号、课程代码（管理员/教师权限）
+        elif action == 'suggest' and current_user['role'] in ['admin', 'teacher']:
+            field = params.get('field')
+            prefix = params.get('prefix') or ''
+            limit = params.get('limit')
+            if not isinstance(field, str) or not isinstance(prefix, str):
+                return {'success': False, 'message': '联想字段或前缀格式错误'}
+            if limit is not None:
+                try:
+                    limit = int(limit)
+                except (TypeError, ValueError):
+                    return {'success': False, 'message': '联想条数必须是整数'}
+                limit = max(1, min(limit, SEARCH_CONFIG['max_suggest_limit']))
+            prefix = prefix.strip()
+            if not prefix:
+                return {'success': True, 'suggestions': []}
+            suggestions = search_index.suggest(field, prefix, limit)
+            if suggestions is None:
+                return {'success': False, 'message': '不支持的联想字段'}
+            return {'success': True, 'suggestions': suggestions}
+        
         # 新增：个人密码修改（登录用户）
         elif action == 'change_password':
             new_password = params.get('password')
             if new_password is None or len(new_password) < 6:
                 return {'success': False, 'message': '密码长度不得小于6位'}
             success = User.update_user(current_user['id'], password=new_password)
+            if success:
+                # 其他设备上的会话需要用新密码重新登录，当前会话保留
+                UserSession.revoke_user(current_user['id'], keep_token=session.token)
             return {'success': success, 'message': '修改成功' if success else '修改失败'}
         
         # 新增：学生管理（管理员权限）
@@ -284,6 +439,24 @@ class Server:
             success = Student.add_student(student_id, name, gender, birth, class_name, major, None)
             return {'success': success, 'message': '添加成功' if success else '添加失败'}
         
+        # 批量开户：一次创建一批学生或教师的登录账号及档案（管理员权限）
+        elif action == 'bulk_provision' and current_user['role'] == 'admin':
+            role = params.get('role')
+            rows = params.get('rows')
+            if role not in ('student', 'teacher'):
+                return {'success': False, 'message': '角色必须为学生或教师'}
+            if not isinstance(rows, list) or not rows:
+                return {'success': False, 'message': '缺少开户数据'}
+            results = Provisioning.bulk_provision(role, rows)
+            success_count = sum(1 for result in results if result['success'])
+            return {
+                'success': True,
+                'message': f'开户完成：成功 {success_count} 个，失败 {len(results) - success_count} 个',
+                'success_count': success_count,
+                'fail_count': len(results) - success_count,
+                'results': results
+            }
+        
         elif action == 'update_student' and current_user['role'] == 'admin':
             student_id = params.get('student_id')
             name = params.get('name')
@@ -292,6 +465,8 @@ class Server:
             class_name = params.get('class') or params.get('class_name')
             major = params.get('major')
             success = Student.update_student(student_id, name=name, gender=gender, birth=birth, class_name=class_name, major=major)
+            if success:
+                mark_profiles_changed()
             return {'success': success, 'message': '更新成功' if success else '更新失败'}
         
         elif action == 'delete_student' and current_user['role'] == 'admin':
@@ -306,6 +481,8 @@ class Server:
                     success = Student.delete_student(student_id)
             except Exception:
                 success = False
+            if success:
+                mark_profiles_changed()
             return {'success': success, 'message': '删除成功' if success else '删除失败'}
         
         # 新增：教师管理（管理员权限）
@@ -341,67 +518,59 @@ class Server:
             title = params.get('title')
             department = params.get('department')
             success = Teacher.update_teacher(teacher_id, name=name, gender=gender, title=title, department=department)
+            if success:
+                mark_profiles_changed()
             return {'success': success, 'message': '更新成功' if success else '更新失败'}
         
         elif action == 'delete_teacher' and current_user['role'] == 'admin':
             teacher_id = params.get('teacher_id')
             success = Teacher.delete_teacher(teacher_id)
+            if success:
+                mark_profiles_changed()
+                mark_courses_changed()
             return {'success': success, 'message': '删除成功' if success else '删除失败'}
         
         # 学生管理操作
         elif action == 'get_student_info' and current_user['role'] in ['admin', 'student']:
             if current_user['role'] == 'student':
-                student = Student.get_student_by_user_id(current_user['id'])
+                student = session.student
             else:
                 student_id = params.get('student_id')
                 student = Student.get_student_by_id(student_id)
             return {'success': True, 'student': student}
         
         elif action == 'update_student_info' and current_user['role'] in ['admin', 'student']:
+            success = False
             if current_user['role'] == 'student':
-                student = Student.get_student_by_user_id(current_user['id'])
+                student = session.student
                 if student:
                     success = Student.update_student(student['student_id'], **params)
             else:
                 student_id = params.get('student_id')
                 success = Student.update_student(student_id, **params)
+            if success:
+                mark_profiles_changed()
             return {'success': success, 'message': '更新成功' if success else '更新失败'}
         
         # 成绩查询操作
         elif action == 'get_my_scores' and current_user['role'] == 'student':
-            student = Student.get_student_by_user_id(current_user['id'])
+            student = session.student
             if student:
+                # 课程代码与教师姓名已在成绩查询中一并取出
                 scores = Score.get_scores_by_student_id(student['id'])
                 gpa = Score.calculate_gpa(student['id'])
-                # 为每个成绩添加教师信息和课程代码
-                if scores:
-                    for score in scores:
-                        if score.get('course_id'):
-                            course_info = Course.get_course_by_id(score['course_id'])
-                            if course_info:
-                                # 添加课程代码
-                                score['course_code'] = course_info.get('course_code', '')
-                                # 添加教师信息
-                                if course_info.get('teacher_id'):
-                                    teacher_info = Teacher.get_teacher_by_id(course_info['teacher_id'])
-                                    if teacher_info:
-                                        score['teacher_name'] = teacher_info.get('name')
                 return {'success': True, 'scores': scores, 'gpa': gpa}
             return {'success': False, 'message': '获取成绩失败'}
             
         # 新增：获取学生课程详情
         elif action == 'get_student_courses' and current_user['role'] == 'student':
-            student = Student.get_student_by_user_id(current_user['id'])
+            student = session.student
             if student:
                 # 获取学生选修的课程
                 courses = Enrollment.get_courses_by_student(student['id'])
-                # 为每个课程添加教师信息并处理字段名称
+                # 教师姓名已在查询中一并取出，这里只处理字段名称
                 if courses:
                     for course in courses:
-                        if course.get('teacher_id'):
-                            teacher_info = Teacher.get_teacher_by_id(course['teacher_id'])
-                            if teacher_info:
-                                course['teacher_name'] = teacher_info.get('name')
                         # 处理字段名称，将class_location重命名为class_room
                         if 'class_location' in course:
                             course['class_room'] = course.pop('class_location')
@@ -410,16 +579,13 @@ class Server:
         
         # 教师相关操作
         elif action == 'get_my_courses' and current_user['role'] == 'teacher':
-            teacher = Teacher.get_teacher_by_user_id(current_user['id'])
+            teacher = session.teacher
             if teacher:
                 courses = Course.get_courses_by_teacher_id(teacher['id'])
-                # 为每个课程添加教师信息并处理字段名称
+                # 课程均由当前教师讲授，直接使用会话中的教师姓名，并处理字段名称
                 if courses:
                     for course in courses:
-                        if course.get('teacher_id'):
-                            teacher_info = Teacher.get_teacher_by_id(course['teacher_id'])
-                            if teacher_info:
-                                course['teacher_name'] = teacher_info.get('name')
+                        course['teacher_name'] = teacher.get('name')
                         # 处理字段名称，将class_location重命名为class_room
                         if 'class_location' in course:
                             course['class_room'] = course.pop('class_location')
@@ -428,12 +594,10 @@ class Server:
         
         elif action == 'get_course_students' and current_user['role'] == 'teacher':
             course_id = params.get('course_id')
-            # 确保该课程属于当前教师
-            course = Course.get_course_by_id(course_id)
-            if not course:
-                return {'success': False, 'message': '课程不存在'}
-            teacher = Teacher.get_teacher_by_user_id(current_user['id'])
-            if not teacher or course.get('teacher_id') != teacher['id']:
+            # 确保该课程属于当前教师（归属关系由会话缓存，仅在校验失败时查询课程）
+            if not session.owns_course(course_id):
+                if not Course.get_course_by_id(course_id):
+                    return {'success': False, 'message': '课程不存在'}
                 return {'success': False, 'message': '权限不足，您不是该课程的教师'}
             # 基于选课关系获取该课程的学生列表（不依赖是否已有成绩）
             students = Enrollment.get_students_by_course(course_id)
@@ -488,9 +652,7 @@ class Server:
                 if not score_row:
                     return {'success': False, 'message': '成绩不存在'}
                 # 验证课程归属
-                course = Course.get_course_by_id(score_row.get('course_id'))
-                teacher = Teacher.get_teacher_by_user_id(current_user['id'])
-                if not course or not teacher or course.get('teacher_id') != teacher.get('id'):
+                if not session.owns_course(score_row.get('course_id')):
                     return {'success': False, 'message': '权限不足，无法编辑该成绩'}
             except Exception as e:
                 logger.error(f'验证成绩归属失败: {e}')
@@ -504,8 +666,100 @@ class Server:
                 return {'success': False, 'message': '成绩必须是有效数字'}
 
             success = Score.update_score_by_id(score_id_int, score=new_score, exam_time=exam_time)
+            if success:
+                dataset_versions.bump(course_scores(score_row.get('course_id')))
             return {'success': success, 'message': '更新成功' if success else '更新失败'}
             
+        # 按学生、课程、学期写入单条成绩（教师），不存在则新增
+        elif action == 'update_score_by_student_course' and current_user['role'] == 'teacher':
+            course_id = params.get('course_id')
+            if not session.owns_course(course_id):
+                return {'success': False, 'message': '权限不足，无法录入该课程成绩'}
+            student = Student.get_student_by_internal_id(params.get('student_id'))
+            if not student:
+                return {'success': False, 'message': '学生不存在'}
+            result = Score.bulk_upsert_scores([{
+                'student_no': student['student_id'],
+                'course_id': course_id,
+                'semester': params.get('semester'),
+                'score': params.get('score'),
+                'exam_time': params.get('exam_time')
+            }])[0]
+            if result['success']:
+                dataset_versions.bump(course_scores(course_id))
+            return {'success': result['success'], 'message': '保存成功' if result['success'] else result['message']}
+        
+        # 批量导入成绩（教师只能写入自己讲授的课程，管理员不限）
+        elif action == 'bulk_upsert_scores' and current_user['role'] in ('teacher', 'admin'):
+            rows = params.get('rows')
+            if not isinstance(rows, list) or not rows:
+                return {'success': False, 'message': '缺少成绩数据'}
+            allowed_course_ids = session.owned_course_ids if current_user['role'] == 'teacher' else None
+            results = Score.bulk_upsert_scores(rows, allowed_course_ids)
+            written_course_ids = {rows[result['row']].get('course_id') for result in results if result['success']}
+            if written_course_ids:
+                dataset_versions.bump(*(course_scores(course_id) for course_id in written_course_ids))
+            success_count = sum(1 for result in results if result['success'])
+            return {
+                'success': True,
+                'message': f'导入完成：成功 {success_count} 行，失败 {len(results) - success_count} 行',
+                'success_count': success_count,
+                'fail_count': len(results) - success_count,
+                'results': results
+            }
+        
+        # GPA 排名（管理员权限），可按班级、专业、学期筛选
+        elif action == 'get_gpa_ranking' and current_user['role'] == 'admin':
+            ranking = Score.calculate_gpa_batch(
+                class_name=params.get('class_name'),
+                major=params.get('major'),
+                semester=params.get('semester')
+            )
+            if ranking is None:
+                return {'success': False, 'message': '计算GPA排名失败'}
+            return {'success': True, 'ranking': ranking}
+            
+        # 学期全部课程成绩统计（管理员权限）
+        elif action == 'get_semester_statistics' and current_user['role'] == 'admin':
+            semester = params.get('semester')
+            if not semester:
+                return {'success': False, 'message': '请指定学期'}
+            table = Score.get_semester_statistics(semester, department=params.get('department'))
+            if table is None:
+                return {'success': False, 'message': '获取学期成绩统计失败'}
+            return {'success': True, 'statistics': table}
+        
+        # 登录限流计数（管理员权限）
+        elif action == 'get_rate_limit_stats' and current_user['role'] == 'admin':
+            return {'success': True, 'stats': login_rate_limiter.stats()}
+        
+        # 数据库备份列表与恢复（管理员权限）：恢复在服务器上执行，随后清空服务器的全部缓存，
+        # 并由 WRITE_DATASETS 更新全部数据集版本，客户端缓存的响应不会再被回答"未修改"
+        elif action == 'list_backups' and current_user['role'] == 'admin':
+            return {'success': True, 'backups': db_manager.list_backups()}
+        
+        elif action == 'restore_database' and current_user['role'] == 'admin':
+            backup_file = db_manager.backup_path(params.get('backup_name'))
+            if not backup_file:
+                return {'success': False, 'message': '备份文件不存在'}
+            if not db_manager.restore_database(backup_file, use_docker=params.get('use_docker', True)):
+                return {'success': False, 'message': '数据库恢复失败，请查看服务器日志'}
+            self.reset_caches()
+            return {'success': True, 'message': '数据库恢复成功'}
+        
+        # 客户端遥测：各客户端定期上报增量汇总，管理员查看全体客户端的延迟分布
+        elif action == 'report_telemetry':
+            if not telemetry_aggregator.ingest(params.get('summary'), current_user['id']):
+                return {'success': False, 'message': '遥测数据格式错误'}
+            return {'success': True}
+        
+        elif action == 'get_client_telemetry' and current_user['role'] == 'admin':
+            return {'success': True, 'telemetry': telemetry_aggregator.stats()}
+        
+        elif action == 'reset_client_telemetry' and current_user['role'] == 'admin':
+            telemetry_aggregator.reset()
+            return {'success': True, 'message': '已清空客户端遥测数据'}
+            
         # 新增：课程管理（管理员权限）
         elif action == 'get_all_courses' and current_user['role'] == 'admin':
             courses = Course.get_all_courses()
@@ -544,7 +798,10 @@ class Server:
             semester = params.get('semester')
             time = params.get('time')
             location = params.get('location')
-            success = Course.add_course(code, name, credit, teacher_id, semester, time, location)
+            capacity = params.get('capacity')
+            success = Course.add_course(code, name, credit, teacher_id, semester, time, location, capacity)
+            if success:
+                mark_courses_changed()
             return {'success': success, 'message': '添加成功' if success else '添加失败'}
             
         elif action == 'update_course' and current_user['role'] == 'admin':
@@ -556,18 +813,23 @@ class Server:
             semester = params.get('semester')
             time = params.get('time')
             location = params.get('location')
-            success = Course.update_course(course_id, code, name, credit, teacher_id, semester, time, location)
+            capacity = params.get('capacity')
+            success = Course.update_course(course_id, code, name, credit, teacher_id, semester, time, location, capacity)
+            if success:
+                mark_courses_changed()
             return {'success': success, 'message': '更新成功' if success else '更新失败'}
             
         elif action == 'delete_course' and current_user['role'] == 'admin':
             course_id = params.get('course_id')
             success = Course.delete_course(course_id)
+            if success:
+                mark_courses_changed()
             return {'success': success, 'message': '删除成功' if success else '删除失败'}
         
         # 学生选课相关操作
         elif action == 'get_available_courses' and current_user['role'] == 'student':
             # 获取当前学生的内部ID
-            student = Student.get_student_by_user_id(current_user['id'])
+            student = session.student
             if not student:
                 return {'success': False, 'message': '未找到学生信息'}
             
@@ -575,8 +837,21 @@ class Server:
             if not semester:
                 return {'success': False, 'message': '请指定学期'}
             
-            # 获取可选课程
-            available_courses = Enrollment.get_available_courses(student['id'], semester)
+            error = Enrollment.validate_filters(params.get('weekday'), params.get('start_minute'),
+                                                params.get('end_minute'), params.get('offset'), params.get('limit'))
+            if error:
+                return {'success': False, 'message': error}
+            
+            # 获取可选课程（可按院系、上课时间筛选，指定 limit 时分页）
+            available_courses = Enrollment.get_available_courses(
+                student['id'], semester,
+                department=params.get('department'),
+                weekday=params.get('weekday'),
+                start_minute=params.get('start_minute'),
+                end_minute=params.get('end_minute'),
+                offset=params.get('offset', 0),
+                limit=params.get('limit')
+            )
             
             # 为每个课程添加教师信息
             if available_courses:
@@ -588,7 +863,7 @@ class Server:
         
         elif action == 'enroll_course' and current_user['role'] == 'student':
             # 获取当前学生的内部ID
-            student = Student.get_student_by_user_id(current_user['id'])
+            student = session.student
             if not student:
                 return {'success': False, 'message': '未找到学生信息'}
             
@@ -598,26 +873,15 @@ class Server:
             if not course_id or not semester:
                 return {'success': False, 'message': '缺少课程ID或学期信息'}
             
-            # 检查是否已选
-            if Enrollment.check_already_enrolled(student['id'], course_id, semester):
-                return {'success': False, 'message': '您已选过该课程'}
-            
-            # 检查时间冲突
-            has_conflict, conflict_msg = Enrollment.check_time_conflict(student['id'], course_id, semester)
-            if has_conflict:
-                return {'success': False, 'message': conflict_msg}
-            
-            # 选课
-            success = Enrollment.enroll(student['id'], course_id, semester)
-            if success:
+            # 经选课引擎准入：已满课程直接拒绝，其余请求排队原子写库
+            status, message = enrollment_engine.enroll(student['id'], course_id, semester)
+            if status == ENROLL_OK:
                 logger.info(f"学生 {student['student_id']} 成功选课: course_id={course_id}, semester={semester}")
-                return {'success': True, 'message': '选课成功'}
-            else:
-                return {'success': False, 'message': '选课失败，请稍后重试'}
+            return {'success': status == ENROLL_OK, 'message': message, 'reason': status}
         
         elif action == 'unenroll_course' and current_user['role'] == 'student':
             # 获取当前学生的内部ID
-            student = Student.get_student_by_user_id(current_user['id'])
+            student = session.student
             if not student:
                 return {'success': False, 'message': '未找到学生信息'}
             
@@ -627,8 +891,8 @@ class Server:
             if not course_id or not semester:
                 return {'success': False, 'message': '缺少课程ID或学期信息'}
             
-            # 退课
-            success = Enrollment.unenroll(student['id'], course_id, semester)
+            # 退课（同时释放名额）
+            success = enrollment_engine.unenroll(student['id'], course_id, semester)
             if success:
                 logger.info(f"学生 {student['student_id']} 成功退课: course_id={course_id}, semester={semester}")
                 return {'success': True, 'message': '退课成功'}
@@ -646,6 +910,9 @@ server = Server()
 def start_server():
     """启动服务器的函数"""
     try:
+        # 迁移后首次启动时补齐学业汇总表
+        Score.ensure_academic_summary()
+        UserSession.purge_expired()
         server.start()
     except KeyboardInterrupt:
         logger.info("服务器被用户中断")
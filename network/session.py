@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""会话模块，保存每个客户端连接登录后解析出的用户档案"""
+
+import threading
+import logging
+from models.student import Student
+from models.teacher import Teacher
+from models.courses import Course
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('session')
+
+# 全局变更代数：任意连接修改了学生/教师档案或课程归属时递增，
+# 其他连接的会话在下次访问时发现代数变化便重新解析
+_generations = {'profiles': 0, 'courses': 0}
+_generation_lock = threading.Lock()
+
+
+def mark_profiles_changed():
+    """标记学生/教师档案已变更"""
+    with _generation_lock:
+        _generations['profiles'] += 1
+
+
+def mark_courses_changed():
+    """标记课程归属已变更"""
+    with _generation_lock:
+        _generations['courses'] += 1
+
+
+class Session:
+    """会话类，登录或凭令牌恢复登录时创建，缓存当前用户的角色、学生/教师记录和所授课程ID"""
+
+    def __init__(self, user, client_address=None, token=None):
+        """初始化会话
+
+        Args:
+            user: 登录成功返回的用户记录
+            client_address: 客户端地址
+            token: 本次登录签发的会话令牌（注销时吊销）
+        """
+        self.user = user
+        self.role = user.get('role')
+        self.client_address = client_address
+        self.token = token
+        self._student = None
+        self._teacher = None
+        self._owned_course_ids = None
+        self._profiles_generation = -1
+        self._courses_generation = -1
+        self.refresh_profile()
+
+    def refresh_profile(self):
+        """重新解析学生/教师记录"""
+        self._profiles_generation = _generations['profiles']
+        if self.role == 'student':
+            self._student = Student.get_student_by_user_id(self.user['id'])
+        elif self.role == 'teacher':
+            self._teacher = Teacher.get_teacher_by_user_id(self.user['id'])
+            # 教师记录变化可能影响课程归属
+            self._owned_course_ids = None
+
+    def refresh_courses(self):
+        """重新加载教师所授课程ID"""
+        self._courses_generation = _generations['courses']
+        teacher = self.teacher
+        if teacher:
+            self._owned_course_ids = set(Course.get_course_ids_by_teacher_id(teacher['id']))
+        else:
+            self._owned_course_ids = set()
+
+    @property
+    def student(self):
+        """当前学生记录（仅学生角色）"""
+        if self._profiles_generation != _generations['profiles']:
+            self.refresh_profile()
+        return self._student
+
+    @property
+    def teacher(self):
+        """当前教师记录（仅教师角色）"""
+        if self._profiles_generation != _generations['profiles']:
+            self.refresh_profile()
+        return self._teacher
+
+    @property
+    def owned_course_ids(self):
+        """当前教师所授课程的ID集合"""
+        if self._owned_course_ids is None or self._courses_generation != _generations['courses']:
+            self.refresh_courses()
+        return self._owned_course_ids
+
+    def owns_course(self, course_id):
+        """判断课程是否由当前教师讲授"""
+        if self.role != 'teacher':
+            return False
+        try:
+            return int(course_id) in self.owned_course_ids
+        except (TypeError, ValueError):
+            return False
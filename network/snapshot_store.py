@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""客户端本地快照模块，把登录用户最近一次成功的只读响应保存到 CACHE_DIR
+
+每个用户一个子目录，每个请求一个 JSON 文件，内容为 {'version': 数据集版本, 'response': 响应}。
+登录后快照载入客户端的条件请求缓存：界面先用快照渲染，再照常请求服务器，
+请求带上快照的版本号，数据未变化时服务器只回答 not_modified，变化了则返回新数据覆盖快照。
+服务器重启后版本号全部更换，旧快照自然失效。
+
+写文件由独立线程完成，不阻塞客户端的 I/O 线程；总大小超过上限时删除最早保存的快照。
+"""
+
+import os
+import json
+import queue
+import hashlib
+import threading
+import logging
+from config.config import CACHE_DIR, SNAPSHOT_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('snapshot_store')
+
+
+class SnapshotStore:
+    """按用户保存请求快照的本地文件存储"""
+
+    def __init__(self, root=None, max_bytes=None, enabled=None):
+        """初始化存储
+
+        Args:
+            root: 快照根目录
+            max_bytes: 全部快照的总大小上限（字节）
+            enabled: 是否启用快照
+        """
+        self.root = root or os.path.join(CACHE_DIR, 'snapshots')
+        self.max_bytes = max_bytes or SNAPSHOT_CONFIG['max_bytes']
+        self.enabled = SNAPSHOT_CONFIG['enabled'] if enabled is None else enabled
+        self._writes = queue.SimpleQueue()
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _path(self, user_id, cache_key):
+        """快照文件路径"""
+        name = hashlib.sha1(cache_key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, str(int(user_id)), f'{name}.json')
+
+    def load(self, user_id):
+        """读取用户的全部快照，返回 {请求键: (版本号, 响应)}，按保存时间从早到晚排列"""
+        if not self.enabled or user_id is None:
+            return {}
+        directory = os.path.join(self.root, str(int(user_id)))
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return {}
+        entries = []
+        for name in names:
+            path = os.path.join(directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                entries.append((os.path.getmtime(path), snapshot['key'], snapshot['version'], snapshot['response']))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # 写到一半或格式不符的文件直接删除
+                logger.warning(f"丢弃无法读取的快照 {path}: {e}")
+                self._remove(path)
+        entries.sort(key=lambda entry: entry[0])
+        return {key: (version, response) for _, key, version, response in entries}
+
+    def save(self, user_id, cache_key, version, response):
+        """异步保存一条快照（由写线程落盘）"""
+        if not self.enabled or user_id is None:
+            return
+        self._writes.put((self._path(user_id, cache_key), cache_key, version, response))
+        self._start_writer()
+
+    def discard(self, user_id, cache_key):
+        """异步删除一条快照（请求失败或响应不再带版本号时）"""
+        if not self.enabled or user_id is None:
+            return
+        self._writes.put((self._path(user_id, cache_key), cache_key, None, None))
+        self._start_writer()
+
+    def _start_writer(self):
+        """按需启动写线程"""
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='snapshot-writer', daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        """写线程：依次落盘，每批写完后检查总大小"""
+        while True:
+            item = self._writes.get()
+            while item is not None:
+                self._write(*item)
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    item = None
+            self._enforce_limit()
+
+    def _write(self, path, cache_key, version, response):
+        """写入（version 为 None 时删除）一个快照文件，先写临时文件再替换，避免读到半个文件"""
+        if version is None:
+            self._remove(path)
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f'{path}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': cache_key, 'version': version, 'response': response}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"保存快照失败: {e}")
+
+    def _enforce_limit(self):
+        """总大小超过上限时按保存时间从早到晚删除快照"""
+        files = []
+        total = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        logger.info(f"快照超出大小上限，已删除最早的快照，当前共 {total} 字节")
+
+    def _remove(self, path):
+        """删除文件，不存在时忽略"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
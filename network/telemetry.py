@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""客户端请求遥测模块
+
+客户端按操作记录请求延迟直方图、收发字节数和错误数，定期把增量汇总上报给服务器；
+服务器合并所有客户端的汇总，供管理员查看全体客户端各操作的 p50/p95/p99 延迟。
+
+直方图使用固定的对数分桶（1ms 到 60s，相邻桶上限相差 25%），每个操作占用固定内存，
+百分位数的误差不超过一个桶宽。客户端和服务器共用同一分桶方式，汇总可以按桶直接相加。
+"""
+
+import math
+import bisect
+import threading
+import logging
+from config.config import TELEMETRY_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('telemetry')
+
+# 各桶的延迟上限（毫秒，最大约 70s），最后一个桶收纳更慢的请求
+BUCKET_BOUNDS = tuple(round(1.25 ** i, 3) for i in range(int(math.log(60000, 1.25)) + 2))
+BUCKET_COUNT = len(BUCKET_BOUNDS) + 1
+
+# 操作数超过上限后，新出现的操作计入该名称
+OTHER_ACTION = 'other'
+
+# 单个操作的计数字段
+COUNTERS = ('count', 'failures', 'errors', 'bytes_sent', 'bytes_received', 'total_ms')
+
+
+class ActionStats:
+    """单个操作的延迟直方图与计数"""
+
+    __slots__ = ('buckets',) + COUNTERS
+
+    def __init__(self):
+        """初始化为空"""
+        self.buckets = [0] * BUCKET_COUNT
+        for name in COUNTERS:
+            setattr(self, name, 0)
+
+    def record(self, elapsed_ms, bytes_sent=0, bytes_received=0, success=True):
+        """记录一次完成的请求"""
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        if not success:
+            self.failures += 1
+
+    def merge(self, summary):
+        """按桶累加另一份汇总（to_dict() 的格式）"""
+        for i, value in enumerate(summary['buckets']):
+            self.buckets[i] += value
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + summary.get(name, 0))
+
+    def percentile(self, p):
+        """估算百分位延迟（毫秒），取所在桶的上限（落入最后一个桶的按最大上限计）；没有请求时返回 None"""
+        total = sum(self.buckets)
+        if not total:
+            return None
+        rank = max(1, math.ceil(total * p / 100))
+        seen = 0
+        for i, value in enumerate(self.buckets):
+            seen += value
+            if seen >= rank:
+                return BUCKET_BOUNDS[min(i, len(BUCKET_BOUNDS) - 1)]
+        return None
+
+    def to_dict(self):
+        """转换为可 JSON 序列化的汇总"""
+        summary = {name: getattr(self, name) for name in COUNTERS}
+        summary['buckets'] = list(self.buckets)
+        return summary
+
+
+def validate_summary(summary):
+    """校验客户端上报的汇总，格式不符时返回 None，否则返回 {操作: 汇总}"""
+    if not isinstance(summary, dict) or len(summary) > TELEMETRY_CONFIG['max_actions'] + 1:
+        return None
+    valid = {}
+    for action, stats in summary.items():
+        if not isinstance(action, str) or len(action) > 64 or not isinstance(stats, dict):
+            return None
+        buckets = stats.get('buckets')
+        if not isinstance(buckets, list) or len(buckets) != BUCKET_COUNT:
+            return None
+        values = list(buckets) + [stats.get(name, 0) for name in COUNTERS]
+        if any(isinstance(v, bool) or not isinstance(v, (int, float)) or v < 0 for v in values):
+            return None
+        valid[action] = stats
+    return valid
+
+
+class TelemetryRecorder:
+    """按操作保存遥测数据，操作数有上限（超出的操作计入 other）"""
+
+    def __init__(self, max_actions=None):
+        """初始化记录器"""
+        self.max_actions = max_actions or TELEMETRY_CONFIG['max_actions']
+        self._actions = {}  # 操作 -> ActionStats
+        self._lock = threading.Lock()
+
+    def _stats(self, action):
+        """取出（或新建）操作的统计，调用方需持有锁"""
+        stats = self._actions.get(action)
+        if stats is None:
+            if len(self._actions) >= self.max_actions and action != OTHER_ACTION:
+                return self._stats(OTHER_ACTION)
+            stats = self._actions[action] = ActionStats()
+        return stats
+
+    def record(self, action, elapsed, bytes_sent=0, bytes_received=0, success=True):
+        """记录一次完成的请求，elapsed 为秒"""
+        with self._lock:
+            self._stats(action).record(elapsed * 1000, bytes_sent, bytes_received, success)
+
+    def record_error(self, action):
+        """记录一次未得到响应的请求（超时、连接中断）"""
+        with self._lock:
+            self._stats(action).errors += 1
+
+    def merge(self, summary):
+        """合并一份汇总（{操作: to_dict()}）"""
+        with self._lock:
+            for action, stats in summary.items():
+                self._stats(action).merge(stats)
+
+    def drain(self):
+        """取出当前汇总并清零，用于增量上报；没有数据时返回空字典"""
+        with self._lock:
+            actions, self._actions = self._actions, {}
+        return {action: stats.to_dict() for action, stats in actions.items()}
+
+    def report(self):
+        """返回各操作的请求数、错误数、平均收发字节和 p50/p95/p99 延迟（毫秒），按请求数降序"""
+        with self._lock:
+            rows = []
+            for action, stats in self._actions.items():
+                rows.append({
+                    'action': action,
+                    'count': stats.count,
+                    'failures': stats.failures,
+                    'errors': stats.errors,
+                    'avg_ms': round(stats.total_ms / stats.count, 1) if stats.count else None,
+                    'p50': stats.percentile(50),
+                    'p95': stats.percentile(95),
+                    'p99': stats.percentile(99),
+                    'avg_bytes_sent': stats.bytes_sent // stats.count if stats.count else 0,
+                    'avg_bytes_received': stats.bytes_received // stats.count if stats.count else 0
+                })
+        rows.sort(key=lambda row: row['count'], reverse=True)
+        return rows
+
+    def reset(self):
+        """清空全部数据"""
+        with self._lock:
+            self._actions.clear()
+
+
+class TelemetryAggregator(TelemetryRecorder):
+    """服务器端：合并各客户端上报的汇总"""
+
+    def __init__(self, max_actions=None):
+        """初始化汇总器"""
+        super().__init__(max_actions)
+        self.reports = 0
+        self.reporters = set()  # 上报过的用户ID（仅用于计数）
+
+    def ingest(self, summary, user_id=None):
+        """合并一份客户端上报，格式不符返回 False"""
+        summary = validate_summary(summary)
+        if summary is None:
+            logger.warning(f"忽略格式不符的遥测上报 (用户ID: {user_id})")
+            return False
+        self.merge(summary)
+        with self._lock:
+            self.reports += 1
+            if user_id is not None and len(self.reporters) < 100000:
+                self.reporters.add(user_id)
+        return True
+
+    def stats(self):
+        """返回汇总报告"""
+        rows = self.report()
+        with self._lock:
+            return {'reports': self.reports, 'reporters': len(self.reporters), 'actions': rows}
+
+    def reset(self):
+        """清空全部数据"""
+        with self._lock:
+            self._actions.clear()
+            self.reports = 0
+            self.reporters.clear()
+
+
+# 创建全局遥测汇总实例（服务器端）
+telemetry_aggregator = TelemetryAggregator()
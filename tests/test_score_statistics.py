@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""课程成绩统计累加器与统计缓存的单元测试"""
+
+import statistics
+import unittest
+from models.score_statistics import CourseStatsAccumulator, ScoreStatisticsCache, SCORE_BANDS
+
+
+class CourseStatsAccumulatorTest(unittest.TestCase):
+    """CourseStatsAccumulator 测试"""
+
+    def assert_matches(self, accumulator, scores):
+        """累加器的统计结果应与直接计算一致"""
+        stats = accumulator.snapshot()
+        self.assertEqual(stats['count'], len(scores))
+        self.assertAlmostEqual(stats['average'], round(statistics.fmean(scores), 2))
+        self.assertAlmostEqual(stats['median'], round(statistics.median(scores), 2))
+        self.assertAlmostEqual(stats['std'], round(statistics.pstdev(scores), 2), places=2)
+        self.assertEqual(stats['max'], max(scores))
+        self.assertEqual(stats['min'], min(scores))
+        bands = [sum(1 for s in scores if s < 60), sum(1 for s in scores if 60 <= s < 70),
+                 sum(1 for s in scores if 70 <= s < 80), sum(1 for s in scores if 80 <= s < 90),
+                 sum(1 for s in scores if s >= 90)]
+        self.assertEqual([stats[band] for band in SCORE_BANDS], bands)
+
+    def test_empty(self):
+        """无成绩时返回 None"""
+        self.assertIsNone(CourseStatsAccumulator().snapshot())
+
+    def test_add(self):
+        """初始化与逐个加入的结果一致"""
+        scores = [59.5, 60, 69.99, 70, 85, 90, 100, 42]
+        self.assert_matches(CourseStatsAccumulator(scores), scores)
+
+    def test_median_even_and_odd(self):
+        """偶数个成绩取中间两个的平均值"""
+        accumulator = CourseStatsAccumulator([70, 90, 80])
+        self.assertEqual(accumulator.snapshot()['median'], 80)
+        accumulator.add(60)
+        self.assertEqual(accumulator.snapshot()['median'], 75)
+
+    def test_remove(self):
+        """移除后统计、中位数和分数段与剩余成绩一致"""
+        scores = [55, 65, 75, 85, 95, 95, 60]
+        accumulator = CourseStatsAccumulator(scores)
+        for score in (95, 55, 85):
+            self.assertTrue(accumulator.remove(score))
+            scores.remove(score)
+            self.assert_matches(accumulator, scores)
+
+    def test_remove_missing(self):
+        """移除不存在的成绩返回 False 且不改变统计"""
+        accumulator = CourseStatsAccumulator([80, 90])
+        before = accumulator.snapshot()
+        self.assertFalse(accumulator.remove(70))
+        self.assertEqual(accumulator.snapshot(), before)
+
+    def test_remove_all(self):
+        """全部移除后回到无成绩状态"""
+        accumulator = CourseStatsAccumulator([88])
+        self.assertTrue(accumulator.remove(88))
+        self.assertIsNone(accumulator.snapshot())
+
+    def test_float_precision(self):
+        """单精度读回的成绩与写入值视为同一个成绩"""
+        accumulator = CourseStatsAccumulator([88.3])
+        self.assertTrue(accumulator.remove(88.30000305175781))
+
+
+class ScoreStatisticsCacheTest(unittest.TestCase):
+    """ScoreStatisticsCache 测试"""
+
+    def setUp(self):
+        """以内存字典代替数据库"""
+        self.scores = {(1, '2024-1'): [70, 80, 90]}
+        self.loads = 0
+
+        def loader(course_id, semester):
+            self.loads += 1
+            return list(self.scores.get((course_id, semester), []))
+
+        self.cache = ScoreStatisticsCache(loader, max_entries=2, verify_interval=3600)
+
+    def test_get_loads_once(self):
+        """首次读取加载，之后命中缓存"""
+        self.assertEqual(self.cache.get(1, '2024-1')['count'], 3)
+        self.assertEqual(self.cache.get('1', '2024-1')['count'], 3)
+        self.assertEqual(self.loads, 1)
+
+    def test_incremental_updates(self):
+        """写入后增量更新，与重新加载结果一致"""
+        self.cache.get(1, '2024-1')
+        since = self.cache.begin_write()
+        self.scores[(1, '2024-1')] = [70, 85, 90, 50]
+        self.cache.on_update(1, '2024-1', 80, 85, since)
+        self.cache.on_add(1, '2024-1', 50, since)
+        expected = CourseStatsAccumulator(self.scores[(1, '2024-1')]).snapshot()
+        self.assertEqual(self.cache.get(1, '2024-1'), expected)
+        self.assertEqual(self.loads, 1)
+
+    def test_uncached_write_ignored(self):
+        """未缓存的键不因写入而加载"""
+        self.cache.on_add(2, '2024-1', 60)
+        self.assertEqual(self.loads, 0)
+
+    def test_load_during_write_not_double_counted(self):
+        """写入开始后才加载的缓存项已包含该写入，提交后的增量更新不能重复计入"""
+        since = self.cache.begin_write()
+        self.scores[(1, '2024-1')].append(60)
+        self.assertEqual(self.cache.get(1, '2024-1')['count'], 4)
+        self.cache.on_add(1, '2024-1', 60, since)
+        self.assertEqual(self.cache.get(1, '2024-1')['count'], 4)
+
+    def test_missing_old_score_drops_entry(self):
+        """找不到旧成绩时丢弃缓存项，下次读取重新加载"""
+        self.cache.get(1, '2024-1')
+        self.cache.on_update(1, '2024-1', 10, 95)
+        self.assertEqual(self.cache.get(1, '2024-1')['count'], 3)
+        self.assertEqual(self.loads, 2)
+
+    def test_invalidate(self):
+        """按课程失效或全部失效"""
+        self.cache.get(1, '2024-1')
+        self.scores[(1, '2024-1')] = [100]
+        self.cache.invalidate(1)
+        self.assertEqual(self.cache.get(1, '2024-1')['count'], 1)
+        self.scores[(1, '2024-1')] = [100, 90]
+        self.cache.invalidate()
+        self.assertEqual(self.cache.get(1, '2024-1')['count'], 2)
+
+    def test_verify_corrects_drift(self):
+        """对账发现偏差时以重算结果为准"""
+        cache = ScoreStatisticsCache(lambda course_id, semester: list(self.scores[(course_id, semester)]),
+                                     verify_interval=1e-9)
+        cache.get(1, '2024-1')
+        self.scores[(1, '2024-1')].append(40)
+        self.assertEqual(cache.get(1, '2024-1')['count'], 4)
+        self.assertEqual(cache.drift_count, 1)
+
+    def test_max_entries(self):
+        """超过上限时淘汰最久未使用的缓存项"""
+        self.scores[(2, '2024-1')] = [60]
+        self.scores[(3, '2024-1')] = [61]
+        for course_id in (1, 2, 1, 3):
+            self.cache.get(course_id, '2024-1')
+        self.cache.get(2, '2024-1')
+        self.assertEqual(self.loads, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""输入联想前缀表的单元测试"""
+
+import unittest
+from database.search_index import PrefixList
+
+
+class PrefixListTest(unittest.TestCase):
+    """PrefixList 测试"""
+
+    def setUp(self):
+        """准备前缀表"""
+        self.prefixes = PrefixList()
+        for doc_id, value in enumerate(['2021003', '2021001', '2022001', '张三', '张三丰', '李四', 'T001', 't002']):
+            self.prefixes.add(value, doc_id)
+
+    def test_match_sorted_by_value(self):
+        """按字段值升序返回匹配的主键"""
+        self.assertEqual(self.prefixes.match('2021', 10), [1, 0])
+        self.assertEqual(self.prefixes.match('202', 10), [1, 0, 2])
+
+    def test_limit(self):
+        """最多返回 limit 个"""
+        self.assertEqual(self.prefixes.match('202', 2), [1, 0])
+
+    def test_no_match(self):
+        """没有匹配时返回空列表，包括前缀位于所有值之后"""
+        self.assertEqual(self.prefixes.match('2023', 10), [])
+        self.assertEqual(self.prefixes.match('王', 10), [])
+
+    def test_exact_and_longer_prefix(self):
+        """前缀等于完整值时同样匹配，比所有值都长时不匹配"""
+        self.assertEqual(self.prefixes.match('张三', 10), [3, 4])
+        self.assertEqual(self.prefixes.match('张三丰丰', 10), [])
+
+    def test_case_insensitive(self):
+        """不区分大小写"""
+        self.assertEqual(self.prefixes.match('t00', 10), [6, 7])
+        self.assertEqual(self.prefixes.match('T002', 10), [7])
+
+    def test_duplicate_values(self):
+        """相同字段值的不同记录都能匹配"""
+        self.prefixes.add('张三', 9)
+        self.assertEqual(self.prefixes.match('张三', 10), [3, 9, 4])
+
+    def test_remove(self):
+        """删除后不再匹配，删除不存在的项不报错"""
+        self.prefixes.remove('2021001', 1)
+        self.prefixes.remove('2021001', 1)
+        self.prefixes.remove('不存在', 99)
+        self.assertEqual(self.prefixes.match('2021', 10), [0])
+
+    def test_clear(self):
+        """清空后没有匹配"""
+        self.prefixes.clear()
+        self.assertEqual(self.prefixes.match('2', 10), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
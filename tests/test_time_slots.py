@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""上课时间解析的单元测试"""
+
+import unittest
+from utils.time_slots import parse_class_time, format_session
+
+
+class ParseClassTimeTest(unittest.TestCase):
+    """parse_class_time 测试"""
+
+    def test_empty(self):
+        """空值返回空列表"""
+        self.assertEqual(parse_class_time(None), [])
+        self.assertEqual(parse_class_time(''), [])
+
+    def test_single_session(self):
+        """单个时段"""
+        self.assertEqual(parse_class_time('周一 10:00-11:40'), [(1, 600, 700)])
+
+    def test_multiple_sessions(self):
+        """每周多次上课"""
+        self.assertEqual(
+            parse_class_time('周一 10:00-11:40, 周三 08:00-09:40'),
+            [(1, 600, 700), (3, 480, 580)]
+        )
+
+    def test_variants(self):
+        """支持星期写法、数字星期、全角冒号和不同的连接符"""
+        self.assertEqual(parse_class_time('星期三14:00~15:40'), [(3, 840, 940)])
+        self.assertEqual(parse_class_time('周日 8:00～9:30'), [(7, 480, 570)])
+        self.assertEqual(parse_class_time('周天 08：00—09：30'), [(7, 480, 570)])
+        self.assertEqual(parse_class_time('周5 13:30-15:00'), [(5, 810, 900)])
+
+    def test_invalid_ranges_ignored(self):
+        """结束不晚于开始或超过一天的时段忽略，其余照常解析"""
+        self.assertEqual(parse_class_time('周一 11:00-10:00'), [])
+        self.assertEqual(parse_class_time('周一 10:00-10:00'), [])
+        self.assertEqual(parse_class_time('周二 23:00-24:30, 周四 09:00-10:00'), [(4, 540, 600)])
+
+    def test_unparseable_text(self):
+        """无法解析的文本返回空列表"""
+        self.assertEqual(parse_class_time('待定'), [])
+
+    def test_duplicates_removed(self):
+        """重复的时段只保留一次"""
+        self.assertEqual(parse_class_time('周一 10:00-11:40；周一 10:00-11:40'), [(1, 600, 700)])
+
+    def test_format_round_trip(self):
+        """格式化结果可以再次解析"""
+        sessions = [(2, 495, 590), (6, 0, 1440)]
+        text = ', '.join(format_session(*session) for session in sessions)
+        self.assertEqual(text, '周二 08:15-09:50, 周六 00:00-24:00')
+        self.assertEqual(parse_class_time(text), sessions)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -11,12 +11,14 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 import os
+import secrets
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
     QTableWidgetItem, QTabWidget, QFrame, QMessageBox, QComboBox,
     QPushButton, QLineEdit, QFormLayout, QGroupBox, QDialog, 
-    QDialogButtonBox, QInputDialog, QCheckBox, QDateEdit, QDoubleSpinBox,
+    QDialogButtonBox, QInputDialog, QCheckBox, QDateEdit, QDoubleSpinBox, QSpinBox,
     QProgressDialog, QFileDialog
 )
 from PyQt5.QtCore import Qt, QDate
@@ -29,11 +31,21 @@ from models.courses import Course
 from models.scores import Score
 from database.db_manager import db_manager
 import utils.data_visualization
+from config.config import PROVISION_CONFIG
+from ui.suggest_completer import SuggestCompleter, student_field, teacher_field
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('admin_dashboard')
 
+# 批量开户文件的表头 -> 开户字段（按角色）
+PROVISION_COLUMNS = {
+    'student': {'学号': 'number', '姓名': 'name', '用户名': 'username', '初始密码': 'password',
+                '性别': 'gender', '出生日期': 'birth', '班级': 'class', '专业': 'major'},
+    'teacher': {'教师编号': 'number', '姓名': 'name', '用户名': 'username', '初始密码': 'password',
+                '性别': 'gender', '职称': 'title', '院系': 'department'}
+}
+
 
 class AdminDashboard(QWidget):
     """管理员仪表盘类"""
@@ -185,6 +197,11 @@ class AdminDashboard(QWidget):
         self.add_student_button.clicked.connect(self.add_student)
         actions_layout.addWidget(self.add_student_button)
         
+        # 批量开户按钮
+        self.provision_students_button = QPushButton("批量开户")
+        self.provision_students_button.clicked.connect(lambda: self.provision_accounts('student'))
+        actions_layout.addWidget(self.provision_students_button)
+        
         # 刷新按钮
         self.refresh_students_button = QPushButton("刷新")
         self.refresh_students_button.clicked.connect(self.load_students)
@@ -194,6 +211,7 @@ class AdminDashboard(QWidget):
         self.students_search_edit = QLineEdit()
         self.students_search_edit.setPlaceholderText("搜索学生姓名或学号")
         self.students_search_edit.returnPressed.connect(self.search_students)
+        self.students_search_completer = SuggestCompleter(self.students_search_edit, student_field)
         actions_layout.addWidget(self.students_search_edit)
         
         # 搜索按钮
@@ -228,6 +246,11 @@ class AdminDashboard(QWidget):
         self.add_teacher_button.clicked.connect(self.add_teacher)
         actions_layout.addWidget(self.add_teacher_button)
         
+        # 批量开户按钮
+        self.provision_teachers_button = QPushButton("批量开户")
+        self.provision_teachers_button.clicked.connect(lambda: self.provision_accounts('teacher'))
+        actions_layout.addWidget(self.provision_teachers_button)
+        
         # 刷新按钮
         self.refresh_teachers_button = QPushButton("刷新")
         self.refresh_teachers_button.clicked.connect(self.load_teachers)
@@ -235,8 +258,9 @@ class AdminDashboard(QWidget):
         
         # 搜索框
         self.teachers_search_edit = QLineEdit()
-        self.teachers_search_edit.setPlaceholderText("搜索教师姓名")
+        self.teachers_search_edit.setPlaceholderText("搜索教师姓名或编号")
         self.teachers_search_edit.returnPressed.connect(self.search_teachers)
+        self.teachers_search_completer = SuggestCompleter(self.teachers_search_edit, teacher_field)
         actions_layout.addWidget(self.teachers_search_edit)
         
         # 搜索按钮
@@ -280,6 +304,7 @@ class AdminDashboard(QWidget):
         self.courses_search_edit = QLineEdit()
         self.courses_search_edit.setPlaceholderText("搜索课程名称或代码")
         self.courses_search_edit.returnPressed.connect(self.search_courses)
+        self.courses_search_completer = SuggestCompleter(self.courses_search_edit, 'course_code')
         actions_layout.addWidget(self.courses_search_edit)
 
         # 搜索按钮
@@ -325,6 +350,35 @@ class AdminDashboard(QWidget):
         # 添加系统信息组框到布局
         settings_layout.addWidget(system_info_group)
         
+        # 创建客户端请求延迟组框（全体客户端定期上报的汇总）
+        telemetry_group = QGroupBox("客户端请求延迟")
+        telemetry_layout = QVBoxLayout(telemetry_group)
+        
+        telemetry_actions_layout = QHBoxLayout()
+        self.telemetry_summary_label = QLabel("尚未加载")
+        telemetry_actions_layout.addWidget(self.telemetry_summary_label)
+        telemetry_actions_layout.addStretch()
+        
+        refresh_telemetry_button = QPushButton("刷新")
+        refresh_telemetry_button.clicked.connect(self.load_client_telemetry)
+        telemetry_actions_layout.addWidget(refresh_telemetry_button)
+        
+        reset_telemetry_button = QPushButton("清空")
+        reset_telemetry_button.clicked.connect(self.reset_client_telemetry)
+        telemetry_actions_layout.addWidget(reset_telemetry_button)
+        telemetry_layout.addLayout(telemetry_actions_layout)
+        
+        self.telemetry_table = QTableWidget()
+        self.telemetry_table.setColumnCount(9)
+        self.telemetry_table.setHorizontalHeaderLabels([
+            "操作", "请求数", "失败数", "错误数", "p50(ms)", "p95(ms)", "p99(ms)", "平均发送(B)", "平均接收(B)"
+        ])
+        self.telemetry_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.telemetry_table.horizontalHeader().setStretchLastSection(True)
+        telemetry_layout.addWidget(self.telemetry_table)
+        
+        settings_layout.addWidget(telemetry_group)
+        
         # 创建系统维护组框
         maintenance_group = QGroupBox("系统维护")
         maintenance_layout = QVBoxLayout(maintenance_group)
@@ -685,6 +739,103 @@ class AdminDashboard(QWidget):
         if dialog.exec_() == QDialog.Accepted:
             self.load_teachers()
     
+    def provision_accounts(self, role):
+        """从 Excel/CSV 文件批量开户（学生或教师）"""
+        columns = PROVISION_COLUMNS[role]
+        number_column = '学号' if role == 'student' else '教师编号'
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择开户名单", "", "Excel Files (*.xlsx);;CSV Files (*.csv);;All Files (*)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            # 编号、密码等按文本读取，避免前导零丢失
+            if file_path.lower().endswith('.csv'):
+                df = pd.read_csv(file_path, dtype=str)
+            else:
+                df = pd.read_excel(file_path, dtype=str)
+            
+            for col in (number_column, '姓名'):
+                if col not in df.columns:
+                    QMessageBox.critical(self, "错误", f"文件缺少必要的列: {col}")
+                    return
+            
+            rows = []
+            for _, record in df.iterrows():
+                row = {}
+                for header, field in columns.items():
+                    value = record.get(header)
+                    row[field] = None if value is None or pd.isna(value) else str(value).strip()
+                if row.get('birth'):
+                    # Excel 日期单元格读为 "2004-09-01 00:00:00"
+                    row['birth'] = row['birth'][:10]
+                rows.append(row)
+            
+            # 初始密码在本地生成后再提交，即使响应丢失（如超时）密码也不会丢
+            generated = set()
+            for i, row in enumerate(rows):
+                if not row.get('password'):
+                    row['password'] = secrets.token_urlsafe(6)
+                    generated.add(i)
+            
+            # 按服务器单次上限分批提交，每批都能在请求超时前完成
+            batch_size = PROVISION_CONFIG['max_rows']
+            results = []
+            unconfirmed = set()  # 请求失败、无法确认是否已开户的行
+            error_message = None
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                if error_message is None:
+                    response = client.bulk_provision_admin(role, batch)
+                    if response.get('success'):
+                        for result in response.get('results', []):
+                            result['row'] += start
+                            results.append(result)
+                        continue
+                    error_message = response.get('message', '开户失败')
+                    unconfirmed.update(range(start, start + len(batch)))
+                    message = f"{error_message}，本批次账号可能已创建"
+                else:
+                    message = '前一批次失败，未提交'
+                results.extend({'row': start + i, 'number': row.get('number'),
+                                'username': row.get('username') or row.get('number'),
+                                'success': False, 'message': message} for i, row in enumerate(batch))
+            
+            success_count = sum(1 for result in results if result.get('success'))
+            fail_count = len(results) - success_count
+            message = f"开户完成：成功 {success_count} 个，失败 {fail_count} 个\n"
+            if error_message:
+                message = f"开户中断（{error_message}）：成功 {success_count} 个，未完成 {fail_count} 个\n"
+            failures = [f"第{result['row'] + 2}行 {result.get('number') or ''}: {result.get('message')}"
+                        for result in results if not result.get('success')]
+            if failures:
+                message += "失败列表:\n" + "\n".join(failures[:10])
+                if fail_count > 10:
+                    message += f"\n... 还有{fail_count - 10}条失败记录"
+            
+            # 保存自动生成的初始密码（含无法确认是否已开户的行），保存到名单旁边
+            saved = [result for result in results
+                     if result['row'] in generated and (result.get('success') or result['row'] in unconfirmed)]
+            if saved:
+                password_file = os.path.splitext(file_path)[0] + '_初始密码.csv'
+                pd.DataFrame([
+                    {number_column: result['number'], '用户名': result['username'],
+                     '初始密码': rows[result['row']]['password'],
+                     '状态': '已开户' if result.get('success') else '未确认'}
+                    for result in saved
+                ]).to_csv(password_file, index=False, encoding='utf-8-sig')
+                message += f"\n\n{len(saved)} 个账号的初始密码已保存至: {password_file}"
+            
+            QMessageBox.information(self, "开户结果", message)
+            if role == 'student':
+                self.load_students()
+            else:
+                self.load_teachers()
+            self.load_users()
+        except Exception as e:
+            QMessageBox.critical(self, "开户失败", f"批量开户时发生错误: {str(e)}")
+    
     def add_course(self):
         """添加课程"""
         dialog = AddCourseDialog(self)
@@ -890,15 +1041,18 @@ class AdminDashboard(QWidget):
             )
             
             if reply == QMessageBox.Yes:
-                # 打开文件选择对话框
-                backup_file, _ = QFileDialog.getOpenFileName(
-                    self, 
-                    "选择备份文件", 
-                    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backups'),
-                    "SQL文件 (*.sql);;所有文件 (*)"
-                )
+                # 恢复在服务器上执行（服务器随后清空缓存并使客户端缓存的数据失效），从服务器的备份目录中选择
+                response = client.list_backups()
+                if not response.get('success'):
+                    QMessageBox.warning(self, "恢复失败", response.get('message', '获取备份列表失败'))
+                    return
+                backups = response.get('backups', [])
+                if not backups:
+                    QMessageBox.information(self, "无备份", "服务器备份目录中没有备份文件。")
+                    return
+                backup_name, ok = QInputDialog.getItem(self, "选择备份文件", "备份文件:", backups, 0, False)
                 
-                if backup_file:
+                if ok and backup_name:
                     # 显示等待提示
                     waiting_dialog = QProgressDialog("正在恢复数据库...", None, 0, 0, self)
                     waiting_dialog.setWindowTitle("恢复中")
@@ -906,7 +1060,8 @@ class AdminDashboard(QWidget):
                     waiting_dialog.show()
                     
                     # 执行恢复操作 - 使用Docker方式
-                    success = db_manager.restore_database(backup_file, use_docker=True)
+                    response = client.restore_database(backup_name, use_docker=True)
+                    success = response.get('success')
                     
                     # 关闭等待提示
                     waiting_dialog.close()
@@ -973,6 +1128,52 @@ class AdminDashboard(QWidget):
                 f"清理缓存时发生错误: {str(e)}"
             )
     
+    def load_client_telemetry(self):
+        """加载全体客户端的请求延迟汇总"""
+        try:
+            # 先上报本机的遥测增量，使汇总包含当前客户端
+            client.upload_telemetry()
+            response = client.get_client_telemetry()
+            if not response.get('success'):
+                QMessageBox.warning(self, "加载失败", response.get('message', '获取客户端遥测数据失败'))
+                return
+            
+            telemetry = response.get('telemetry', {})
+            rows = telemetry.get('actions', [])
+            self.telemetry_summary_label.setText(
+                f"上报次数: {telemetry.get('reports', 0)}，上报用户: {telemetry.get('reporters', 0)}"
+            )
+            self.telemetry_table.setRowCount(len(rows))
+            for i, row in enumerate(rows):
+                values = [
+                    row.get('action'), row.get('count'), row.get('failures'), row.get('errors'),
+                    row.get('p50'), row.get('p95'), row.get('p99'),
+                    row.get('avg_bytes_sent'), row.get('avg_bytes_received')
+                ]
+                for j, value in enumerate(values):
+                    self.telemetry_table.setItem(i, j, QTableWidgetItem('' if value is None else str(value)))
+        except Exception as e:
+            logger.error(f"加载客户端遥测数据失败: {e}")
+            QMessageBox.critical(self, "错误", f"加载客户端遥测数据失败: {str(e)}")
+    
+    def reset_client_telemetry(self):
+        """清空服务器上的客户端遥测汇总"""
+        reply = QMessageBox.question(
+            self,
+            '确认清空',
+            '确定要清空全体客户端的请求延迟统计吗？',
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        response = client.reset_client_telemetry()
+        if response.get('success'):
+            self.telemetry_table.setRowCount(0)
+            self.telemetry_summary_label.setText("已清空")
+        else:
+            QMessageBox.warning(self, "清空失败", response.get('message', '清空客户端遥测数据失败'))
+    
     def switch_page(self, page_name):
         """切换页面"""
         # 根据页面名称切换标签页
@@ -1583,6 +1784,12 @@ class EditCourseDialog(QDialog):
         self.location_edit.setPlaceholderText("如：教101")
         form_layout.addRow("上课地点:", self.location_edit)
 
+        # 课程容量（0 表示不限）
+        self.capacity_spin = QSpinBox()
+        self.capacity_spin.setRange(0, 10000)
+        self.capacity_spin.setSpecialValueText("不限")
+        form_layout.addRow("课程容量:", self.capacity_spin)
+
         # 添加表单到主布局
         layout.addLayout(form_layout)
 
@@ -1609,6 +1816,7 @@ class EditCourseDialog(QDialog):
             self.semester_edit.setText(self.course_data.get('semester', ''))
             self.time_edit.setText(self.course_data.get('class_time', ''))
             self.location_edit.setText(self.course_data.get('class_location', self.course_data.get('class_room', '')))
+            self.capacity_spin.setValue(int(self.course_data.get('capacity') or 0))
 
     def accept(self):
         # 获取表单数据
@@ -1619,6 +1827,7 @@ class EditCourseDialog(QDialog):
         semester = self.semester_edit.text().strip()
         time = self.time_edit.text().strip()
         location = self.location_edit.text().strip()
+        capacity = self.capacity_spin.value()
 
         # 验证表单
         if not code:
@@ -1645,7 +1854,8 @@ class EditCourseDialog(QDialog):
                 teacher_id=int(teacher_id),
                 semester=semester,
                 time=time,
-                location=location  # 即使为空也必须传递
+                location=location,  # 即使为空也必须传递
+                capacity=capacity
             )
             if result.get('success'):
                 QMessageBox.information(self, "成功", "课程更新成功")
@@ -1708,6 +1918,12 @@ class AddCourseDialog(QDialog):
         self.location_edit.setPlaceholderText("如：教101")
         form_layout.addRow("上课地点:", self.location_edit)
 
+        # 课程容量（0 表示不限）
+        self.capacity_spin = QSpinBox()
+        self.capacity_spin.setRange(0, 10000)
+        self.capacity_spin.setSpecialValueText("不限")
+        form_layout.addRow("课程容量:", self.capacity_spin)
+
         # 添加表单到主布局
         layout.addLayout(form_layout)
 
@@ -1734,6 +1950,7 @@ class AddCourseDialog(QDialog):
         semester = self.semester_edit.text().strip()
         time = self.time_edit.text().strip()
         location = self.location_edit.text().strip()
+        capacity = self.capacity_spin.value()
 
         # 验证表单
         if not code:
@@ -1758,7 +1975,8 @@ class AddCourseDialog(QDialog):
                 teacher_id=int(teacher_id),
                 semester=semester,
                 time=time,
-                location=location
+                location=location,
+                capacity=capacity
             )
             if result.get('success'):
                 QMessageBox.information(self, "成功", "课程添加成功")
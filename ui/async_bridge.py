@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""asyncio 与 Qt 事件循环的桥接
+
+在后台线程中运行 asyncio 事件循环，界面代码把协程（如 AsyncClient 的快捷方法）提交给它，
+结果通过 Qt 信号回到主线程再调用回调，网络请求期间界面不会卡住。
+
+用法:
+    bridge.submit(async_client.get_my_scores(), self.show_scores)
+"""
+
+import asyncio
+import threading
+import logging
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('async_bridge')
+
+
+class AsyncBridge(QObject):
+    """后台 asyncio 事件循环，协程结果回到 Qt 主线程交付"""
+
+    # 回调, 出错回调, 已完成的 concurrent.futures.Future；跨线程发射时 Qt 自动排队到主线程
+    _finished = pyqtSignal(object, object, object)
+
+    def __init__(self, parent=None):
+        """创建事件循环并启动后台线程"""
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name='asyncio-bridge', daemon=True)
+        self._thread.start()
+        self._finished.connect(self._deliver)
+
+    def _run_loop(self):
+        """后台线程：运行事件循环直到 stop()"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, callback=None, errback=None):
+        """提交协程，完成后在主线程调用 callback(result)，出错时调用 errback(exception)
+
+        返回 concurrent.futures.Future，可用于取消请求
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(lambda done: self._finished.emit(callback, errback, done))
+        return future
+
+    def run(self, coro, timeout=None):
+        """在事件循环中执行协程并阻塞等待结果（供非界面线程或脚本使用，不要在主线程调用）"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def _deliver(self, callback, errback, future):
+        """主线程：把结果交给回调"""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            logger.error(f"异步请求失败: {error}")
+            if errback is not None:
+                errback(error)
+            return
+        if callback is not None:
+            callback(future.result())
+
+    def stop(self):
+        """停止事件循环（程序退出时调用）"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2)
@@ -32,6 +32,45 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger('student_dashboard')
 
 
+# 仪表盘启动时加载的数据：(操作, 参数)
+DASHBOARD_REQUESTS = [
+    ('get_student_info', None),
+    ('get_my_scores', None),
+    ('get_student_courses', None)
+]
+
+
+def build_dashboard_data(student_response, scores_response, courses_response):
+    """由三个响应组装仪表盘数据"""
+    result = {
+        'student_info': None,
+        'scores': None,
+        'courses': None
+    }
+    
+    if student_response.get('success'):
+        result['student_info'] = student_response.get('student')
+    
+    if scores_response.get('success'):
+        result['scores'] = scores_response.get('scores', [])
+        result['gpa'] = scores_response.get('gpa', 0.0)
+    
+    if courses_response.get('success'):
+        result['courses'] = courses_response.get('courses', [])
+    else:
+        # 如果获取课程详情失败，则从成绩中提取课程信息
+        result['courses'] = result['scores']
+    return result
+
+
+def load_dashboard_snapshot():
+    """用本地快照组装仪表盘数据（不访问服务器），没有任何快照时返回 None"""
+    responses = [client.snapshot(action, params) for action, params in DASHBOARD_REQUESTS]
+    if not any(responses):
+        return None
+    return build_dashboard_data(*(response or {} for response in responses))
+
+
 class DataLoadingThread(QThread):
     """数据加载线程，用于在后台加载学生数据，避免阻塞GUI主线程"""
     # 定义信号
@@ -44,30 +83,9 @@ class DataLoadingThread(QThread):
     def run(self):
         """在线程中执行数据加载操作"""
         try:
-            result = {
-                'student_info': None,
-                'scores': None,
-                'courses': None
-            }
-            
-            # 获取学生信息
-            student_response = client.get_student_info()
-            if student_response.get('success'):
-                result['student_info'] = student_response.get('student')
-            
-            # 获取学生成绩
-            scores_response = client.get_my_scores()
-            if scores_response.get('success'):
-                result['scores'] = scores_response.get('scores', [])
-                result['gpa'] = scores_response.get('gpa', 0.0)
-            
-            # 获取学生课程详情
-            courses_response = client.get_student_courses()
-            if courses_response.get('success'):
-                result['courses'] = courses_response.get('courses', [])
-            else:
-                # 如果获取课程详情失败，则从成绩中提取课程信息
-                result['courses'] = result['scores']
+            # 学生信息、成绩和课程详情三个请求同时发出，共用一次往返时间；
+            # 请求带上快照的版本号，数据未变化时服务器只回答 not_modified
+            result = build_dashboard_data(*client.send_requests(DASHBOARD_REQUESTS))
             
             # 发送数据加载完成信号
             self.data_loaded.emit(result)
@@ -124,7 +142,14 @@ class StudentDashboard(QWidget):
         main_layout.addWidget(self.tab_widget)
     
     def start_data_loading(self):
-        """启动数据加载线程"""
+        """启动数据加载线程（有本地快照时先用快照渲染，加载完成后再核对）"""
+        try:
+            snapshot = load_dashboard_snapshot()
+            if snapshot:
+                self.on_data_loaded(snapshot)
+        except Exception as e:
+            logger.warning(f"读取本地快照失败: {e}")
+        
         # 创建数据加载线程
         self.loading_thread = DataLoadingThread()
         
@@ -137,6 +162,11 @@ class StudentDashboard(QWidget):
     
     def on_data_loaded(self, result):
         """处理数据加载完成事件"""
+        # 与已显示的快照相同时无需重新渲染
+        if result == getattr(self, 'rendered_data', None):
+            return
+        self.rendered_data = result
+        
         # 更新UI显示
         if result.get('student_info'):
             self.update_student_info(result['student_info'])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""输入联想补全器，为搜索框提供学号、姓名、教师编号、课程代码联想"""
+
+import logging
+from PyQt5.QtWidgets import QCompleter
+from PyQt5.QtCore import Qt, QStringListModel, QTimer, pyqtSignal
+from network.client import client
+from config.config import SEARCH_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('suggest_completer')
+
+
+class SuggestCompleter(QCompleter):
+    """基于服务器 suggest 接口的补全器
+
+    停止输入 suggest_delay 毫秒后才发出请求；请求经 client.submit() 异步发送，
+    结果由客户端 I/O 线程通过信号送回 GUI 线程，输入过程中界面不会等待网络。
+    """
+
+    # 请求序号, 联想列表（跨线程投递到 GUI 线程）
+    suggestions_ready = pyqtSignal(int, list)
+
+    def __init__(self, line_edit, fields, limit=10):
+        """初始化补全器
+
+        Args:
+            line_edit: 需要联想的输入框
+            fields: 联想字段，字符串或函数（根据当前输入返回字段名）
+            limit: 最多显示的联想条数
+        """
+        super().__init__(line_edit)
+        self.line_edit = line_edit
+        self.fields = fields
+        self.limit = limit
+        self.model = QStringListModel(self)
+        self.setModel(self.model)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self._sequence = 0  # 最近一次请求的序号，较早请求的结果直接丢弃
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(SEARCH_CONFIG['suggest_delay'])
+        self._timer.timeout.connect(self.request_suggestions)
+        self.suggestions_ready.connect(self.show_suggestions)
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.update_suggestions)
+
+    def update_suggestions(self, text):
+        """输入变化时重新计时，停止输入后再请求联想"""
+        # 使进行中的请求作废
+        self._sequence += 1
+        if not text.strip():
+            self._timer.stop()
+            self.model.setStringList([])
+            return
+        self._timer.start()
+
+    def request_suggestions(self):
+        """异步请求当前输入的联想"""
+        prefix = self.line_edit.text().strip()
+        # 未连接时不为联想触发重连（重连会在退避等待中阻塞界面）
+        if not prefix or not client.connected:
+            return
+        self._sequence += 1
+        sequence = self._sequence
+        field = self.fields(prefix) if callable(self.fields) else self.fields
+
+        def on_done(future):
+            # 在客户端 I/O 线程中执行，只发信号
+            try:
+                response = future.result()
+            except Exception as e:
+                logger.error(f"获取输入联想失败: {e}")
+                return
+            if response.get('success'):
+                self.suggestions_ready.emit(sequence, [item['value'] for item in response.get('suggestions', [])])
+
+        try:
+            client.submit('suggest', {'field': field, 'prefix': prefix, 'limit': self.limit}).add_done_callback(on_done)
+        except Exception as e:
+            logger.error(f"获取输入联想失败: {e}")
+
+    def show_suggestions(self, sequence, values):
+        """在 GUI 线程中显示联想结果（只显示最近一次请求的结果）"""
+        if sequence != self._sequence or not self.line_edit.hasFocus():
+            return
+        self.model.setStringList(values)
+        self.complete()
+
+
+def student_field(prefix):
+    """以数字开头按学号联想，否则按姓名联想"""
+    return 'student_id' if prefix[:1].isdigit() else 'student_name'
+
+
+def teacher_field(prefix):
+    """以字母或数字开头按教师编号（如 T001）联想，否则按姓名联想"""
+    return 'teacher_id' if prefix[:1].isascii() and prefix[:1].isalnum() else 'teacher_name'
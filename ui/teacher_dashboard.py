@@ -26,8 +26,8 @@ from models.teacher import Teacher
 from models.courses import Course
 from models.scores import Score
 from models.enrollment import Enrollment
-from models.student import Student
 import utils.data_visualization
+from ui.suggest_completer import SuggestCompleter, student_field
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -218,6 +218,7 @@ class TeacherDashboard(QWidget):
         search_layout = QHBoxLayout()
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("请输入学生姓名或学号")
+        self.search_completer = SuggestCompleter(self.search_edit, student_field)
         search_layout.addWidget(self.search_edit)
         
         # 搜索按钮
@@ -483,35 +484,17 @@ class TeacherDashboard(QWidget):
                 # 清空表格
                 self.scores_table.setRowCount(0)
                 
-                # 获取学生信息映射表
-                from models.student import Student
-                student_ids = list(set([score_info.get('student_id') for score_info in scores if score_info.get('student_id') is not None]))
-                students_map = {}
-                for student_id in student_ids:
-                    # 使用新方法根据内部ID查询学生信息
-                    student_info = Student.get_student_by_internal_id(student_id)
-                    if student_info:
-                        students_map[student_id] = student_info
-                
                 # 填充表格
                 for score_info in scores:
                     row_position = self.scores_table.rowCount()
                     self.scores_table.insertRow(row_position)
                     
                     # 设置表格数据 - 确保所有字段都正确处理
-                    # 学生ID - 获取真实学号
-                    student_id = score_info.get('student_id', '')
-                    student_info = students_map.get(student_id, {})
-                    # 使用学生表中的真实学号(student_id字段)
-                    actual_student_id = student_info.get('student_id', str(student_id))  # 如未找到则使用原始ID作为 fallback
-                    self.scores_table.setItem(row_position, 0, QTableWidgetItem(str(actual_student_id)))
+                    # 学号与姓名由服务器随成绩一并返回
+                    student_no = score_info.get('student_no', score_info.get('student_id', ''))
+                    self.scores_table.setItem(row_position, 0, QTableWidgetItem(str(student_no)))
                     
-                    # 学生姓名 - 优先使用学生表中的姓名
-                    student_name = student_info.get('name', '')
-                    if not student_name:
-                        student_name = score_info.get('student_name', '')
-                        if not student_name:
-                            student_name = score_info.get('name', '')
+                    student_name = score_info.get('student_name') or score_info.get('name', '')
                     self.scores_table.setItem(row_position, 1, QTableWidgetItem(str(student_name)))
                     
                     # 创建成绩编辑框
@@ -936,44 +919,29 @@ class TeacherDashboard(QWidget):
                     QMessageBox.critical(self, "错误", f"Excel文件缺少必要的列: {col}")
                     return
             
-            # 导入成绩
-            success_count = 0
-            fail_count = 0
-            fail_students = []
-            
-            for _, row in df.iterrows():
-                student_no = row['学生ID']  # 这里是学号，不是内部ID
-                score = row['成绩']
-                
-                # 验证成绩是否为数字且在0-100之间
+            # 整表一次提交，由服务器校验并批量写入
+            rows = [
+                {'student_no': str(row['学生ID']).strip(), 'course_id': course_id, 'semester': semester, 'score': row['成绩']}
+                for _, row in df.iterrows()
+            ]
+            # 成绩单元格可能为空或非数字，交由服务器逐行校验
+            for row in rows:
                 try:
-                    score = float(score)
-                    if not 0 <= score <= 100:
-                        fail_count += 1
-                        fail_students.append(f"{student_no}: 成绩必须在0-100之间")
-                        continue
-                except:
-                    fail_count += 1
-                    fail_students.append(f"{student_no}: 成绩格式无效")
-                    continue
-                
-                # 根据学号获取学生内部ID
-                student_info = Student.get_student_by_id(student_no)
-                if not student_info:
-                    fail_count += 1
-                    fail_students.append(f"{student_no}: 学号不存在")
-                    continue
-                
-                student_id = student_info.get('id')  # 获取内部ID
-                
-                # 调用client方法更新成绩
-                result = client.update_score_by_student_course(student_id=student_id, course_id=course_id, semester=semester, score=score)
-                
-                if result.get('success'):
-                    success_count += 1
-                else:
-                    fail_count += 1
-                    fail_students.append(f"{student_no}: {result.get('message', '更新失败')}")
+                    row['score'] = None if pd.isna(row['score']) else float(row['score'])
+                except (TypeError, ValueError):
+                    row['score'] = None
+            
+            response = client.bulk_upsert_scores(rows)
+            if not response.get('success'):
+                QMessageBox.critical(self, "导入失败", response.get('message', '导入失败'))
+                return
+            
+            success_count = response.get('success_count', 0)
+            fail_count = response.get('fail_count', 0)
+            fail_students = [
+                f"{result.get('student_no')}: {result.get('message')}"
+                for result in response.get('results', []) if not result.get('success')
+            ]
             
             # 显示导入结果
             message = f"导入完成！成功: {success_count}, 失败: {fail_count}\n"
@@ -1029,19 +997,9 @@ class TeacherDashboard(QWidget):
         try:
             # 准备数据
             data = []
-            students_map = {}
             
             for score in scores:
-                student_internal_id = score.get('student_id')
-                
-                # 缓存学生信息，避免重复查询
-                if student_internal_id not in students_map:
-                    student_info = Student.get_student_by_internal_id(student_internal_id)
-                    if student_info:
-                        students_map[student_internal_id] = student_info
-                
-                student_info = students_map.get(student_internal_id, {})
-                student_no = student_info.get('student_id', '')  # 获取学号
+                student_no = score.get('student_no', '')  # 服务器返回的学号
                 
                 data.append({
                     '学生ID': student_no,  # 显示学号而不是内部ID
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""密码哈希模块
+
+新密码使用加盐的 PBKDF2-SHA256，存储格式为 "pbkdf2_sha256$迭代次数$盐$哈希"；
+旧版本存储的无盐 SHA-256 十六进制串仍可校验，登录成功后由调用方升级为新格式。
+
+PBKDF2 是有意设计的 CPU 密集计算，在服务端线程中直接执行会因 GIL 拖慢其他请求，
+因此由 PasswordHasher 交给独立的进程池计算，并限制排队任务数量。
+"""
+
+import hashlib
+import hmac
+import os
+import math
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor, CancelledError, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from config.config import PASSWORD_CONFIG
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger('passwords')
+
+ALGORITHM = 'pbkdf2_sha256'
+SALT_BYTES = 16
+
+
+class PasswordHasherBusy(Exception):
+    """哈希任务排队已满或等待超时"""
+
+
+def hash_password(password, iterations=None):
+    """计算密码哈希，返回 "pbkdf2_sha256$迭代次数$盐$哈希" """
+    iterations = iterations or PASSWORD_CONFIG['iterations']
+    salt = os.urandom(SALT_BYTES).hex()
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+    return f"{ALGORITHM}${iterations}${salt}${digest}"
+
+
+def hash_passwords(passwords):
+    """依次计算一组密码的哈希（进程池中按块执行）"""
+    return [hash_password(password) for password in passwords]
+
+
+def is_legacy_hash(stored):
+    """判断是否为旧版无盐 SHA-256 哈希"""
+    return bool(stored) and '$' not in stored
+
+
+def needs_rehash(stored):
+    """判断存储的哈希是否需要升级（旧格式或迭代次数低于当前配置）"""
+    if is_legacy_hash(stored):
+        return True
+    try:
+        algorithm, iterations, _, _ = stored.split('$')
+        return algorithm != ALGORITHM or int(iterations) < PASSWORD_CONFIG['iterations']
+    except (AttributeError, ValueError):
+        return True
+
+
+def verify_password(password, stored):
+    """校验密码是否与存储的哈希匹配"""
+    if not password or not stored:
+        return False
+    if is_legacy_hash(stored):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+    try:
+        algorithm, iterations, salt, digest = stored.split('$')
+        if algorithm != ALGORITHM:
+            return False
+        candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), int(iterations)).hex()
+        return hmac.compare_digest(candidate, digest)
+    except ValueError:
+        return False
+
+
+class PasswordHasher:
+    """在有界进程池中计算密码哈希"""
+
+    def __init__(self, workers=None, max_pending=None, timeout=None):
+        """初始化哈希器（进程池在首次使用时创建）
+
+        Args:
+            workers: 哈希进程数
+            max_pending: 同时提交（含正在计算）的哈希任务上限
+            timeout: 单次哈希等待结果的最长时间（秒）
+        """
+        self.workers = workers or PASSWORD_CONFIG['workers']
+        self.max_pending = max_pending or PASSWORD_CONFIG['max_pending']
+        self.timeout = timeout or PASSWORD_CONFIG['timeout']
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self):
+        """获取进程池，首次调用时创建"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                logger.info(f"密码哈希进程池已启动，进程数 {self.workers}，排队上限 {self.max_pending}")
+            return self._pool
+
+    def _run(self, func, *args):
+        """在进程池中执行哈希函数；排队已满时立即抛出 PasswordHasherBusy
+        
+        排队名额在任务真正结束（完成或被取消）时才归还：等待超时后已开始计算的任务无法取消，
+        仍占用名额，进程池中的实际任务数始终不超过 max_pending。
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("密码校验请求过多")
+        try:
+            future = self._executor().submit(func, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # 进程池损坏（如子进程被杀死）时重建，本次在当前进程中计算
+            logger.error(f"密码哈希进程池不可用，已重建: {e}")
+            self.shutdown()
+            try:
+                return func(*args)
+            finally:
+                self._slots.release()
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy("密码校验超时")
+        except (BrokenProcessPool, CancelledError) as e:
+            # 计算期间进程池损坏（或因损坏被其他线程关闭），重建进程池，本次在当前进程中计算
+            logger.error(f"密码哈希进程池在计算中损坏，已重建: {e!r}")
+            self.shutdown()
+            return func(*args)
+
+    def hash(self, password):
+        """计算新密码的哈希"""
+        return self._run(hash_password, password)
+
+    def hash_many(self, passwords):
+        """并行计算一批密码的哈希（批量开户），整批只占用一个排队名额，返回与输入对应的列表"""
+        passwords = list(passwords)
+        if not passwords:
+            return []
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("密码哈希任务过多")
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        chunks = [passwords[i:i + chunksize] for i in range(0, len(passwords), chunksize)]
+        try:
+            executor = self._executor()
+            futures = [executor.submit(hash_passwords, chunk) for chunk in chunks]
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.error(f"密码哈希进程池不可用，已重建: {e}")
+            self.shutdown()
+            try:
+                return hash_passwords(passwords)
+            finally:
+                self._slots.release()
+        
+        # 整批的全部块结束（完成或被取消）后才归还名额
+        remaining = [len(futures)]
+        remaining_lock = threading.Lock()
+        
+        def on_done(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                self._slots.release()
+        
+        for future in futures:
+            future.add_done_callback(on_done)
+        
+        # 按每个进程依次计算的块数给出等待上限
+        timeout = self.timeout * chunksize * math.ceil(len(chunks) / self.workers)
+        done, not_done = wait(futures, timeout=timeout)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            raise PasswordHasherBusy("批量密码哈希超时")
+        try:
+            return [digest for future in futures for digest in future.result()]
+        except (BrokenProcessPool, CancelledError) as e:
+            logger.error(f"密码哈希进程池在计算中损坏，已重建: {e!r}")
+            self.shutdown()
+            return hash_passwords(passwords)
+
+    def verify(self, password, stored):
+        """校验密码（旧版 SHA-256 哈希计算量很小，直接在当前线程中校验）"""
+        if is_legacy_hash(stored):
+            return verify_password(password, stored)
+        return self._run(verify_password, password, stored)
+
+    def shutdown(self):
+        """关闭进程池"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 创建全局密码哈希器实例
+password_hasher = PasswordHasher()
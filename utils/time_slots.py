@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""上课时间解析模块，将 class_time 文本规范化为 (星期, 开始分钟, 结束分钟) 列表"""
+
+import re
+
+# 星期名称 -> 星期序号（周一为 1）
+WEEKDAYS = {
+    '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '日': 7, '天': 7,
+    '1': 1, '2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7
+}
+WEEKDAY_NAMES = {1: '周一', 2: '周二', 3: '周三', 4: '周四', 5: '周五', 6: '周六', 7: '周日'}
+
+# 匹配一个上课时段，如 "周一 10:00-11:40"、"星期三14:00~15:40"
+_SESSION_PATTERN = re.compile(
+    r'(?:周|星期)([一二三四五六日天1-7])\s*(\d{1,2})[:：](\d{2})\s*[-~～—]\s*(\d{1,2})[:：](\d{2})'
+)
+
+
+def parse_class_time(time_str):
+    """解析上课时间文本，支持每周多次上课
+
+    输入示例: "周一 10:00-11:40"、"周一 10:00-11:40, 周三 08:00-09:40"
+    返回: [(weekday, start_minute, end_minute), ...]，无法解析的部分忽略
+    """
+    if not time_str:
+        return []
+    sessions = []
+    for day, start_h, start_m, end_h, end_m in _SESSION_PATTERN.findall(str(time_str)):
+        start = int(start_h) * 60 + int(start_m)
+        end = int(end_h) * 60 + int(end_m)
+        if start >= end or end > 24 * 60:
+            continue
+        session = (WEEKDAYS[day], start, end)
+        if session not in sessions:
+            sessions.append(session)
+    return sessions
+
+
+def format_session(weekday, start_minute, end_minute):
+    """将一个上课时段格式化为 "周一 10:00-11:40" """
+    return (f"{WEEKDAY_NAMES.get(weekday, '')} "
+            f"{start_minute // 60:02d}:{start_minute % 60:02d}-{end_minute // 60:02d}:{end_minute % 60:02d}")